@@ -0,0 +1,85 @@
+"""
+Rotas de acompanhamento de pipelines do orquestrador
+"""
+
+from fastapi import APIRouter, HTTPException, WebSocket, WebSocketDisconnect
+from fastapi.responses import StreamingResponse
+from typing import Dict
+import json
+import logging
+
+from app.services.ai_orchestrator import ai_orchestrator
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter(prefix="/pipelines", tags=["pipelines"])
+
+async def _obter_tarefa(task_id: str):
+    task = await ai_orchestrator.consultar_status_tarefa(task_id)
+    if task is None:
+        raise HTTPException(status_code=404, detail="Tarefa não encontrada")
+    return task
+
+@router.post("/{pipeline_name}")
+async def iniciar_pipeline(pipeline_name: str, dados: Dict):
+    """
+    Inicia um pipeline em background; o progresso é acompanhado pelas rotas abaixo
+    """
+    try:
+        task_id = await ai_orchestrator.executar_pipeline(pipeline_name, dados)
+    except ValueError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    return {"task_id": task_id}
+
+@router.get("/{task_id}/events")
+async def acompanhar_pipeline_sse(task_id: str):
+    """
+    Eventos de progresso do pipeline via Server-Sent Events
+    """
+    await _obter_tarefa(task_id)
+
+    async def _gerar_eventos():
+        try:
+            async for evento in ai_orchestrator.acompanhar_pipeline(task_id):
+                if evento['type'] == 'heartbeat':
+                    # Comentário SSE mantém a conexão aberta em proxies
+                    yield ": heartbeat\n\n"
+                    continue
+
+                yield f"id: {evento['seq']}\nevent: {evento['type']}\ndata: {json.dumps(evento, default=str)}\n\n"
+        except Exception as e:
+            logger.error(f"Erro no stream de eventos do pipeline {task_id}: {e}")
+
+    return StreamingResponse(
+        _gerar_eventos(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+@router.websocket("/{task_id}/ws")
+async def acompanhar_pipeline_ws(websocket: WebSocket, task_id: str):
+    """
+    Eventos de progresso do pipeline via WebSocket
+    """
+    await websocket.accept()
+
+    try:
+        async for evento in ai_orchestrator.acompanhar_pipeline(task_id):
+            await websocket.send_text(json.dumps(evento, default=str))
+
+        await websocket.close()
+
+    except ValueError as e:
+        await websocket.close(code=4404, reason=str(e))
+    except WebSocketDisconnect:
+        logger.info(f"Cliente desconectou do pipeline {task_id}")
+    except Exception as e:
+        logger.error(f"Erro no WebSocket do pipeline {task_id}: {e}")
+        await websocket.close(code=1011)
+
+@router.get("/{task_id}")
+async def obter_status_pipeline(task_id: str):
+    """
+    Status atual do pipeline
+    """
+    return await _obter_tarefa(task_id)
@@ -0,0 +1,47 @@
+from fastapi import FastAPI
+from fastapi.middleware.cors import CORSMiddleware
+import logging
+from app.api.routes import router as pipelines_router
+from app.services.ai_orchestrator import ai_orchestrator
+
+# Configurar logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Criar aplicação FastAPI
+app = FastAPI(
+    title="Orquestrador de IA",
+    description="Coordena os serviços de IA e acompanha a execução dos pipelines",
+    version="1.0.0"
+)
+
+# Configurar CORS
+app.add_middleware(
+    CORSMiddleware,
+    allow_origins=["http://localhost:3000", "http://localhost:3001"],
+    allow_credentials=True,
+    allow_methods=["*"],
+    allow_headers=["*"],
+)
+
+# Incluir rotas de pipelines (status, SSE e WebSocket)
+app.include_router(pipelines_router)
+
+@app.on_event("startup")
+async def iniciar_orquestrador():
+    """Inicia o monitoramento dos serviços e carrega as configurações de pipeline"""
+    await ai_orchestrator.iniciar_orquestracao()
+
+@app.on_event("shutdown")
+async def parar_orquestrador():
+    """Aguarda os pipelines ativos e fecha os pools HTTP"""
+    await ai_orchestrator.parar_orquestracao()
+
+@app.get("/health")
+async def health_check():
+    """Verificação de saúde do serviço"""
+    return {
+        "status": "healthy",
+        "service": "ai-orchestrator",
+        "version": "1.0.0"
+    }
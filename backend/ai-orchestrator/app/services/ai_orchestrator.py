@@ -1,13 +1,20 @@
 import asyncio
+import hashlib
+import importlib.util
 import logging
-from typing import List, Dict, Optional, Any
+import os
+import random
+import time
+from collections import OrderedDict
+from typing import List, Dict, Optional, Any, AsyncIterator, Awaitable, Callable
 from datetime import datetime, timedelta
 import json
 import httpx
 from celery import Celery
 from celery.result import AsyncResult
-import redis
-from pydantic import BaseModel
+from celery.signals import worker_process_shutdown
+from redis import asyncio as aioredis
+from pydantic import BaseModel, Field
 import uuid
 
 logger = logging.getLogger(__name__)
@@ -24,8 +31,38 @@ celery_app.config_from_object({
     'enable_utc': True,
 })
 
-# Configuração do Redis
-redis_client = redis.Redis(host='localhost', port=6379, db=0, decode_responses=True)
+# Configuração do Redis (cliente asyncio, não bloqueia o event loop)
+redis_client = aioredis.Redis(host='localhost', port=6379, db=0, decode_responses=True)
+
+# Polling do resultado das tarefas Celery
+CELERY_RESULT_TIMEOUT = 300
+CELERY_POLL_INTERVAL_MIN = 0.05
+CELERY_POLL_INTERVAL_MAX = 1.0
+
+# Configuração dos pools HTTP
+HTTP_MAX_CONNECTIONS = int(os.getenv('ORCHESTRATOR_HTTP_MAX_CONNECTIONS', '20'))
+HTTP_MAX_KEEPALIVE_CONNECTIONS = int(os.getenv('ORCHESTRATOR_HTTP_MAX_KEEPALIVE', '10'))
+HTTP_KEEPALIVE_EXPIRY = float(os.getenv('ORCHESTRATOR_HTTP_KEEPALIVE_EXPIRY', '30'))
+HTTP2_DISPONIVEL = importlib.util.find_spec('h2') is not None
+
+# Registro de tarefas
+TASK_HISTORY_MAX_SIZE = int(os.getenv('ORCHESTRATOR_TASK_HISTORY_MAX_SIZE', '1000'))
+TASK_HISTORY_TTL = int(os.getenv('ORCHESTRATOR_TASK_HISTORY_TTL', '86400'))
+TASK_PERSISTENCE_ENABLED = os.getenv('ORCHESTRATOR_TASK_PERSISTENCE', 'true').lower() == 'true'
+
+# Resiliência das chamadas (circuit breaker e retry)
+CIRCUIT_FAILURE_THRESHOLD = int(os.getenv('ORCHESTRATOR_CIRCUIT_FAILURE_THRESHOLD', '5'))
+CIRCUIT_RECOVERY_TIMEOUT = float(os.getenv('ORCHESTRATOR_CIRCUIT_RECOVERY_TIMEOUT', '30'))
+RETRY_BACKOFF_BASE = float(os.getenv('ORCHESTRATOR_RETRY_BACKOFF_BASE', '0.5'))
+RETRY_BACKOFF_MAX = float(os.getenv('ORCHESTRATOR_RETRY_BACKOFF_MAX', '10'))
+LATENCY_EWMA_ALPHA = 0.3
+
+# Cache de resultados de steps
+STEP_CACHE_ENABLED = os.getenv('ORCHESTRATOR_STEP_CACHE', 'true').lower() == 'true'
+
+# Eventos de progresso dos pipelines
+PIPELINE_EVENTS_TTL = int(os.getenv('ORCHESTRATOR_PIPELINE_EVENTS_TTL', '3600'))
+PIPELINE_EVENTS_HEARTBEAT = 15.0
 
 class AIServiceConfig(BaseModel):
     """Configuração de um serviço de IA"""
@@ -38,6 +75,12 @@ class AIServiceConfig(BaseModel):
     response_time: Optional[float] = None
     error_count: int = 0
     success_count: int = 0
+    request_timeout: float = 60.0
+    health_timeout: float = 10.0
+    replicas: List[str] = Field(default_factory=list)
+    max_retries: int = 2
+    slow_call_threshold: Optional[float] = None
+    version: Optional[str] = None
 
 class TaskResult(BaseModel):
     """Resultado de uma tarefa"""
@@ -50,6 +93,463 @@ class TaskResult(BaseModel):
     end_time: Optional[datetime] = None
     duration: Optional[float] = None
 
+class CircuitBreaker:
+    """
+    Circuit breaker de uma réplica de serviço
+    
+    closed: chamadas liberadas; falhas consecutivas (ou chamadas lentas) acima do limite abrem o circuito.
+    open: chamadas bloqueadas até passar o recovery_timeout.
+    half_open: uma chamada de teste por vez; sucesso fecha o circuito, falha reabre.
+    """
+    
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+    
+    def __init__(
+        self,
+        failure_threshold: int = 5,
+        recovery_timeout: float = 30.0,
+        slow_call_threshold: Optional[float] = None
+    ):
+        self.failure_threshold = failure_threshold
+        self.recovery_timeout = recovery_timeout
+        self.slow_call_threshold = slow_call_threshold
+        self.state = self.CLOSED
+        self.consecutive_failures = 0
+        self.opened_at: Optional[float] = None
+        self.half_open_in_flight = False
+    
+    def permite_chamada(self) -> bool:
+        """
+        Indica se uma chamada pode ser feita agora (sem reservar a vaga de teste)
+        """
+        if self.state == self.OPEN and time.monotonic() - self.opened_at >= self.recovery_timeout:
+            self.state = self.HALF_OPEN
+            self.half_open_in_flight = False
+        
+        if self.state == self.CLOSED:
+            return True
+        if self.state == self.HALF_OPEN:
+            return not self.half_open_in_flight
+        return False
+    
+    def iniciar_chamada(self):
+        """
+        Reserva a chamada de teste quando o circuito está semiaberto
+        """
+        if self.state == self.HALF_OPEN:
+            self.half_open_in_flight = True
+    
+    def registrar_sucesso(self, latencia: Optional[float] = None):
+        if self.slow_call_threshold and latencia is not None and latencia > self.slow_call_threshold:
+            self.registrar_falha()
+            return
+        
+        self.state = self.CLOSED
+        self.consecutive_failures = 0
+        self.opened_at = None
+        self.half_open_in_flight = False
+    
+    def registrar_falha(self):
+        self.consecutive_failures += 1
+        self.half_open_in_flight = False
+        
+        if self.state == self.HALF_OPEN or self.consecutive_failures >= self.failure_threshold:
+            self.state = self.OPEN
+            self.opened_at = time.monotonic()
+    
+    def sinalizar_saude(self, saudavel: bool):
+        """
+        Aplica o resultado do health check: um serviço que voltou a responder passa
+        para semiaberto (a próxima chamada real decide), uma falha conta como erro
+        """
+        if saudavel:
+            if self.state == self.OPEN:
+                self.state = self.HALF_OPEN
+                self.half_open_in_flight = False
+        else:
+            self.registrar_falha()
+
+class ServiceReplica:
+    """
+    Réplica de um serviço de IA, com circuit breaker e latência observada
+    """
+    
+    def __init__(self, base_url: str, breaker: CircuitBreaker):
+        self.base_url = base_url
+        self.breaker = breaker
+        self.latencia_media: Optional[float] = None
+        self.em_andamento = 0
+    
+    def registrar_latencia(self, latencia: float):
+        if self.latencia_media is None:
+            self.latencia_media = latencia
+        else:
+            self.latencia_media = LATENCY_EWMA_ALPHA * latencia + (1 - LATENCY_EWMA_ALPHA) * self.latencia_media
+    
+    def custo_estimado(self) -> float:
+        """
+        Latência esperada considerando as chamadas já em andamento nesta réplica
+        """
+        return (self.latencia_media or 0.0) * (1 + self.em_andamento)
+
+class ErroNaoRecuperavel(Exception):
+    """Erro de chamada que não deve ser repetido nem contar contra o circuit breaker"""
+
+class LiderCancelado(RuntimeError):
+    """A chamada que executava o step compartilhado foi cancelada antes de concluir"""
+
+class StepResultCache:
+    """
+    Cache de resultados de steps endereçado pelo conteúdo da chamada
+    
+    A chave é o hash de (serviço, endpoint, payload normalizado, versão do serviço), de modo
+    que uma nova versão do serviço invalida naturalmente os resultados anteriores. Chamadas
+    concorrentes com a mesma chave são agrupadas (single-flight): apenas uma chega ao serviço.
+    """
+    
+    def __init__(self, redis=None):
+        self.redis = redis
+        self._em_voo: Dict[str, asyncio.Future] = {}
+        self.metricas: Dict[str, Dict[str, int]] = {}
+    
+    @staticmethod
+    def calcular_chave(service_name: str, endpoint: str, dados: Dict, versao: Optional[str]) -> str:
+        payload = json.dumps(dados, sort_keys=True, separators=(',', ':'), ensure_ascii=False, default=str)
+        conteudo = f"{service_name}\n{endpoint}\n{versao or ''}\n{payload}"
+        return f"step_cache:{hashlib.sha256(conteudo.encode('utf-8')).hexdigest()}"
+    
+    def _contar(self, service_name: str, evento: str):
+        metricas = self.metricas.setdefault(service_name, {'hits': 0, 'misses': 0, 'coalesced': 0, 'errors': 0})
+        metricas[evento] += 1
+    
+    async def obter_ou_calcular(
+        self,
+        service_name: str,
+        chave: str,
+        ttl: int,
+        calcular: Callable[[], Awaitable[Dict]]
+    ) -> Dict:
+        """
+        Retorna o resultado em cache ou executa `calcular`, armazenando o resultado por `ttl` segundos
+        """
+        # Outra chamada idêntica já está em andamento neste processo
+        em_voo = self._em_voo.get(chave)
+        while em_voo is not None:
+            self._contar(service_name, 'coalesced')
+            try:
+                return await asyncio.shield(em_voo)
+            except LiderCancelado:
+                # O primeiro seguidor a acordar assume o cálculo; os demais aguardam por ele
+                em_voo = self._em_voo.get(chave)
+        
+        future = asyncio.get_running_loop().create_future()
+        self._em_voo[chave] = future
+        try:
+            result = await self._buscar(service_name, chave)
+            if result is None:
+                self._contar(service_name, 'misses')
+                result = await calcular()
+                await self._armazenar(chave, ttl, result)
+            else:
+                self._contar(service_name, 'hits')
+            
+            future.set_result(result)
+            return result
+        except asyncio.CancelledError:
+            # Nunca cancelar o future compartilhado: o cancelamento chegaria aos seguidores
+            future.set_exception(LiderCancelado("líder cancelado"))
+            future.exception()
+            raise
+        except Exception as e:
+            future.set_exception(e)
+            # Evitar aviso de exceção não consumida quando não há outras chamadas aguardando
+            future.exception()
+            raise
+        finally:
+            self._em_voo.pop(chave, None)
+    
+    async def _buscar(self, service_name: str, chave: str) -> Optional[Dict]:
+        if self.redis is None:
+            return None
+        
+        try:
+            cached = await self.redis.get(chave)
+            return json.loads(cached) if cached else None
+        except Exception as e:
+            self._contar(service_name, 'errors')
+            logger.warning(f"Erro ao ler cache de step: {e}")
+            return None
+    
+    async def _armazenar(self, chave: str, ttl: int, result: Dict):
+        if self.redis is None:
+            return
+        
+        try:
+            await self.redis.setex(chave, ttl, json.dumps(result, default=str))
+        except Exception as e:
+            logger.warning(f"Erro ao gravar cache de step: {e}")
+    
+    def obter_metricas(self) -> Dict:
+        totais = {'hits': 0, 'misses': 0, 'coalesced': 0, 'errors': 0}
+        for metricas in self.metricas.values():
+            for evento, total in metricas.items():
+                totais[evento] += total
+        
+        consultas = totais['hits'] + totais['misses']
+        return {
+            **totais,
+            'hit_rate': totais['hits'] / consultas if consultas > 0 else 0,
+            'services': {service_name: dict(metricas) for service_name, metricas in self.metricas.items()}
+        }
+
+class PipelineEventBus:
+    """
+    Publica eventos de progresso dos pipelines via Redis pub/sub
+    
+    Cada evento também é anexado a uma lista com TTL, para que clientes que se conectam
+    depois do início do pipeline (em qualquer réplica) recebam os eventos já emitidos.
+    """
+    
+    EVENTOS_FINAIS = ('pipeline_completed', 'pipeline_failed')
+    
+    def __init__(self, redis, history_ttl: int = 3600):
+        self.redis = redis
+        self.history_ttl = history_ttl
+        self._sequencias: Dict[str, int] = {}
+    
+    @staticmethod
+    def _canal(task_id: str) -> str:
+        return f"pipeline_events:{task_id}"
+    
+    @staticmethod
+    def _chave_historico(task_id: str) -> str:
+        return f"pipeline_events_history:{task_id}"
+    
+    async def publicar(self, task_id: str, tipo: str, **dados):
+        """
+        Publica um evento do pipeline; falhas de publicação não interrompem a execução
+        """
+        seq = self._sequencias.get(task_id, 0) + 1
+        self._sequencias[task_id] = seq
+        if tipo in self.EVENTOS_FINAIS:
+            self._sequencias.pop(task_id, None)
+        
+        evento = {
+            'task_id': task_id,
+            'seq': seq,
+            'type': tipo,
+            'timestamp': datetime.now().isoformat(),
+            **dados
+        }
+        
+        try:
+            evento_json = json.dumps(evento, default=str)
+            async with self.redis.pipeline(transaction=False) as pipe:
+                pipe.rpush(self._chave_historico(task_id), evento_json)
+                pipe.expire(self._chave_historico(task_id), self.history_ttl)
+                pipe.publish(self._canal(task_id), evento_json)
+                await pipe.execute()
+        except Exception as e:
+            logger.warning(f"Erro ao publicar evento {tipo} do pipeline {task_id}: {e}")
+    
+    async def obter_historico(self, task_id: str) -> List[Dict]:
+        """
+        Retorna os eventos já emitidos de um pipeline
+        """
+        try:
+            historico = await self.redis.lrange(self._chave_historico(task_id), 0, -1)
+            return [json.loads(evento_json) for evento_json in historico]
+        except Exception as e:
+            logger.warning(f"Erro ao ler eventos do pipeline {task_id}: {e}")
+            return []
+    
+    async def assinar(self, task_id: str, heartbeat: float = PIPELINE_EVENTS_HEARTBEAT) -> AsyncIterator[Dict]:
+        """
+        Gera os eventos de um pipeline (já emitidos e novos) até o evento final
+        
+        Emite {'type': 'heartbeat'} quando não há eventos por `heartbeat` segundos.
+        """
+        pubsub = self.redis.pubsub()
+        try:
+            # Assinar antes de ler o histórico para não perder eventos no intervalo
+            await pubsub.subscribe(self._canal(task_id))
+            historico = await self.redis.lrange(self._chave_historico(task_id), 0, -1)
+            
+            # Eventos do histórico também podem chegar pelo canal: ignorá-los uma vez.
+            # Steps paralelos publicam concorrentemente, então o canal não chega em ordem de seq.
+            repetidos = set()
+            for evento_json in historico:
+                evento = json.loads(evento_json)
+                repetidos.add(evento['seq'])
+                yield evento
+                if evento['type'] in self.EVENTOS_FINAIS:
+                    return
+            
+            loop = asyncio.get_running_loop()
+            ultimo_envio = loop.time()
+            while True:
+                message = await pubsub.get_message(ignore_subscribe_messages=True, timeout=1.0)
+                if message is None:
+                    if loop.time() - ultimo_envio >= heartbeat:
+                        ultimo_envio = loop.time()
+                        yield {'task_id': task_id, 'type': 'heartbeat', 'timestamp': datetime.now().isoformat()}
+                    continue
+                
+                evento = json.loads(message['data'])
+                if evento['seq'] in repetidos:
+                    repetidos.discard(evento['seq'])
+                    continue
+                
+                ultimo_envio = loop.time()
+                yield evento
+                if evento['type'] in self.EVENTOS_FINAIS:
+                    return
+        finally:
+            try:
+                await pubsub.unsubscribe(self._canal(task_id))
+                await pubsub.reset()
+            except Exception as e:
+                logger.warning(f"Erro ao encerrar assinatura de eventos do pipeline {task_id}: {e}")
+
+class TaskRegistry:
+    """
+    Registro de tarefas finalizadas indexado por task_id, com memória limitada
+    
+    Mantém um buffer circular em memória (ordem de finalização) com expiração por TTL e,
+    opcionalmente, persiste cada tarefa no Redis para que o status sobreviva a reinícios
+    e fique visível para outras réplicas do orquestrador.
+    """
+    
+    def __init__(self, max_size: int = 1000, ttl: int = 86400, redis=None):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.redis = redis
+        self._tasks: "OrderedDict[str, TaskResult]" = OrderedDict()
+        self._armazenado_em: Dict[str, datetime] = {}
+    
+    def __len__(self) -> int:
+        return len(self._tasks)
+    
+    @staticmethod
+    def _chave(task_id: str) -> str:
+        return f"task_result:{task_id}"
+    
+    def adicionar(self, task: TaskResult):
+        """
+        Adiciona uma tarefa ao registro, descartando as mais antigas se necessário
+        """
+        self._tasks[task.task_id] = task
+        self._tasks.move_to_end(task.task_id)
+        self._armazenado_em[task.task_id] = datetime.now()
+        
+        while len(self._tasks) > self.max_size:
+            task_id, _ = self._tasks.popitem(last=False)
+            self._armazenado_em.pop(task_id, None)
+    
+    def obter(self, task_id: str) -> Optional[TaskResult]:
+        """
+        Obtém uma tarefa da memória em O(1)
+        """
+        task = self._tasks.get(task_id)
+        if task is None:
+            return None
+        
+        if self._expirada(task_id, datetime.now()):
+            self._remover(task_id)
+            return None
+        
+        return task
+    
+    def _expirada(self, task_id: str, agora: datetime) -> bool:
+        return (agora - self._armazenado_em[task_id]).total_seconds() > self.ttl
+    
+    def _remover(self, task_id: str):
+        self._tasks.pop(task_id, None)
+        self._armazenado_em.pop(task_id, None)
+    
+    def expirar(self) -> int:
+        """
+        Remove tarefas com TTL vencido; retorna quantas foram removidas
+        """
+        agora = datetime.now()
+        removidas = 0
+        
+        # As tarefas estão em ordem de armazenamento, então basta olhar o início
+        while self._tasks:
+            task_id = next(iter(self._tasks))
+            if not self._expirada(task_id, agora):
+                break
+            self._remover(task_id)
+            removidas += 1
+        
+        return removidas
+    
+    def consultar(
+        self,
+        limit: int = 100,
+        offset: int = 0,
+        service: Optional[str] = None,
+        status: Optional[str] = None,
+        inicio: Optional[datetime] = None,
+        fim: Optional[datetime] = None
+    ) -> List[TaskResult]:
+        """
+        Consulta paginada do histórico, das tarefas mais recentes para as mais antigas
+        """
+        resultado = []
+        ignoradas = 0
+        
+        for task in reversed(self._tasks.values()):
+            if service and task.service != service:
+                continue
+            if status and task.status != status:
+                continue
+            if inicio and task.start_time < inicio:
+                continue
+            if fim and task.start_time > fim:
+                continue
+            
+            if ignoradas < offset:
+                ignoradas += 1
+                continue
+            
+            resultado.append(task)
+            if len(resultado) >= limit:
+                break
+        
+        return resultado
+    
+    async def persistir(self, task: TaskResult):
+        """
+        Persiste a tarefa no Redis (quando habilitado)
+        """
+        if self.redis is None:
+            return
+        
+        try:
+            await self.redis.setex(self._chave(task.task_id), self.ttl, task.model_dump_json())
+        except Exception as e:
+            logger.warning(f"Erro ao persistir tarefa {task.task_id}: {e}")
+    
+    async def carregar(self, task_id: str) -> Optional[TaskResult]:
+        """
+        Obtém uma tarefa da memória ou, se não estiver presente, do Redis
+        """
+        task = self.obter(task_id)
+        if task is not None or self.redis is None:
+            return task
+        
+        try:
+            task_json = await self.redis.get(self._chave(task_id))
+            if task_json:
+                return TaskResult.model_validate_json(task_json)
+        except Exception as e:
+            logger.warning(f"Erro ao carregar tarefa {task_id}: {e}")
+        
+        return None
+
 class AIOrchestrator:
     """
     Orquestrador principal que coordena todos os serviços de IA
@@ -101,10 +601,80 @@ class AIOrchestrator:
             )
         }
         
+        # Réplicas adicionais via ORCHESTRATOR_REPLICAS_<SERVICO> (URLs separadas por vírgula)
+        for service_name, config in self.services.items():
+            replicas_env = os.getenv(f"ORCHESTRATOR_REPLICAS_{service_name.upper()}", "")
+            config.replicas.extend(url.strip() for url in replicas_env.split(',') if url.strip())
+        
+        self.replicas: Dict[str, List[ServiceReplica]] = {
+            service_name: self._criar_replicas(config)
+            for service_name, config in self.services.items()
+        }
+        
         self.active_tasks = {}
-        self.task_history = []
+        self.task_registry = TaskRegistry(
+            max_size=TASK_HISTORY_MAX_SIZE,
+            ttl=TASK_HISTORY_TTL,
+            redis=redis_client if TASK_PERSISTENCE_ENABLED else None
+        )
+        self.event_bus = PipelineEventBus(redis_client, history_ttl=PIPELINE_EVENTS_TTL)
+        self.step_cache = StepResultCache(redis=redis_client if STEP_CACHE_ENABLED else None)
         self.pipeline_configs = {}
         self.monitoring_enabled = True
+        self.http_clients: Dict[str, httpx.AsyncClient] = {}
+    
+    def _criar_replicas(self, config: AIServiceConfig) -> List[ServiceReplica]:
+        """
+        Cria as réplicas de um serviço (endereço principal + réplicas configuradas)
+        """
+        base_urls = [f"{config.url}:{config.port}"]
+        base_urls.extend(url.rstrip('/') for url in config.replicas if url.rstrip('/') not in base_urls)
+        
+        return [
+            ServiceReplica(
+                base_url,
+                CircuitBreaker(
+                    failure_threshold=CIRCUIT_FAILURE_THRESHOLD,
+                    recovery_timeout=CIRCUIT_RECOVERY_TIMEOUT,
+                    slow_call_threshold=config.slow_call_threshold
+                )
+            )
+            for base_url in base_urls
+        ]
+    
+    def _obter_cliente_http(self, service_name: str, base_url: str) -> httpx.AsyncClient:
+        """
+        Retorna o cliente HTTP (pool de conexões) de uma réplica, criando-o se necessário
+        """
+        client = self.http_clients.get(base_url)
+        if client is None or client.is_closed:
+            config = self.services[service_name]
+            client = httpx.AsyncClient(
+                base_url=base_url,
+                timeout=config.request_timeout,
+                limits=httpx.Limits(
+                    max_connections=HTTP_MAX_CONNECTIONS,
+                    max_keepalive_connections=HTTP_MAX_KEEPALIVE_CONNECTIONS,
+                    keepalive_expiry=HTTP_KEEPALIVE_EXPIRY
+                ),
+                http2=HTTP2_DISPONIVEL
+            )
+            self.http_clients[base_url] = client
+        
+        return client
+    
+    async def _fechar_clientes_http(self):
+        """
+        Fecha os pools de conexões HTTP de todos os serviços
+        """
+        clients = list(self.http_clients.values())
+        self.http_clients.clear()
+        
+        for client in clients:
+            try:
+                await client.aclose()
+            except Exception as e:
+                logger.warning(f"Erro ao fechar cliente HTTP: {e}")
         
     async def iniciar_orquestracao(self):
         """
@@ -144,34 +714,151 @@ class AIOrchestrator:
     
     async def _verificar_saude_servico(self, service_name: str, config: AIServiceConfig):
         """
-        Verifica a saúde de um serviço específico
+        Verifica a saúde de um serviço específico (todas as réplicas)
+        """
+        await asyncio.gather(*(
+            self._verificar_saude_replica(service_name, config, replica)
+            for replica in self.replicas[service_name]
+        ))
+        
+        config.last_health_check = datetime.now()
+        self._atualizar_status_servico(service_name)
+    
+    async def _verificar_saude_replica(self, service_name: str, config: AIServiceConfig, replica: ServiceReplica):
+        """
+        Verifica a saúde de uma réplica e alimenta o circuit breaker
         """
         try:
             start_time = datetime.now()
             
-            async with httpx.AsyncClient(timeout=10.0) as client:
-                response = await client.get(
-                    f"{config.url}:{config.port}{config.health_endpoint}"
-                )
-                
-                end_time = datetime.now()
-                response_time = (end_time - start_time).total_seconds()
-                
-                if response.status_code == 200:
-                    config.status = "healthy"
-                    config.success_count += 1
-                    config.response_time = response_time
-                else:
-                    config.status = "unhealthy"
-                    config.error_count += 1
-                
-                config.last_health_check = end_time
+            client = self._obter_cliente_http(service_name, replica.base_url)
+            response = await client.get(
+                config.health_endpoint,
+                timeout=config.health_timeout
+            )
+            
+            response_time = (datetime.now() - start_time).total_seconds()
+            
+            if response.status_code == 200:
+                replica.breaker.sinalizar_saude(True)
+                replica.registrar_latencia(response_time)
+                config.success_count += 1
+                config.response_time = response_time
+                config.version = self._extrair_versao(response) or config.version
+            else:
+                replica.breaker.sinalizar_saude(False)
+                config.error_count += 1
                 
         except Exception as e:
-            config.status = "unhealthy"
+            replica.breaker.sinalizar_saude(False)
             config.error_count += 1
-            config.last_health_check = datetime.now()
-            logger.warning(f"Serviço {service_name} não está respondendo: {e}")
+            logger.warning(f"Serviço {service_name} ({replica.base_url}) não está respondendo: {e}")
+    
+    @staticmethod
+    def _extrair_versao(response: httpx.Response) -> Optional[str]:
+        """
+        Extrai a versão do serviço informada no health check, se houver
+        """
+        try:
+            corpo = response.json()
+        except ValueError:
+            return None
+        
+        if isinstance(corpo, dict) and corpo.get('version') is not None:
+            return str(corpo['version'])
+        return None
+    
+    def _atualizar_status_servico(self, service_name: str):
+        """
+        Um serviço está saudável enquanto ao menos uma réplica não estiver com o circuito aberto
+        """
+        disponivel = any(
+            replica.breaker.state != CircuitBreaker.OPEN
+            for replica in self.replicas[service_name]
+        )
+        self.services[service_name].status = "healthy" if disponivel else "unhealthy"
+    
+    def _selecionar_replica(self, service_name: str, excluir: Optional[set] = None) -> Optional[ServiceReplica]:
+        """
+        Seleciona a réplica disponível de menor latência esperada
+        """
+        candidatas = [
+            replica for replica in self.replicas.get(service_name, [])
+            if replica.breaker.permite_chamada()
+        ]
+        
+        # Preferir réplicas que ainda não falharam nesta chamada
+        if excluir:
+            candidatas = [replica for replica in candidatas if replica.base_url not in excluir] or candidatas
+        
+        if not candidatas:
+            return None
+        
+        # Menos falhas recentes primeiro; entre essas, menor latência esperada
+        return min(
+            candidatas,
+            key=lambda replica: (replica.breaker.consecutive_failures, replica.custo_estimado(), random.random())
+        )
+    
+    async def _chamar_com_resiliencia(
+        self,
+        service_name: str,
+        chamada: Callable[[ServiceReplica], Awaitable[Dict]]
+    ) -> Dict:
+        """
+        Executa uma chamada a um serviço com balanceamento entre réplicas, circuit breaker
+        e retry com backoff exponencial (full jitter)
+        """
+        config = self.services.get(service_name)
+        if not config:
+            raise ValueError(f"Serviço {service_name} não encontrado")
+        
+        falharam = set()
+        ultimo_erro: Optional[Exception] = None
+        
+        for tentativa in range(config.max_retries + 1):
+            replica = self._selecionar_replica(service_name, excluir=falharam)
+            if replica is None:
+                if ultimo_erro is not None:
+                    raise ultimo_erro
+                raise ValueError(f"Serviço {service_name} não está saudável")
+            
+            replica.breaker.iniciar_chamada()
+            replica.em_andamento += 1
+            inicio = time.monotonic()
+            try:
+                result = await chamada(replica)
+            except ErroNaoRecuperavel:
+                replica.breaker.half_open_in_flight = False
+                raise
+            except asyncio.CancelledError:
+                replica.breaker.half_open_in_flight = False
+                raise
+            except Exception as e:
+                replica.breaker.registrar_falha()
+                config.error_count += 1
+                falharam.add(replica.base_url)
+                ultimo_erro = e
+                logger.warning(
+                    f"Falha na chamada ao serviço {service_name} ({replica.base_url}), "
+                    f"tentativa {tentativa + 1}/{config.max_retries + 1}: {e}"
+                )
+            else:
+                latencia = time.monotonic() - inicio
+                replica.breaker.registrar_sucesso(latencia)
+                replica.registrar_latencia(latencia)
+                config.success_count += 1
+                config.response_time = latencia
+                return result
+            finally:
+                replica.em_andamento -= 1
+                self._atualizar_status_servico(service_name)
+            
+            if tentativa < config.max_retries:
+                espera = min(RETRY_BACKOFF_MAX, RETRY_BACKOFF_BASE * (2 ** tentativa))
+                await asyncio.sleep(random.uniform(0, espera))
+        
+        raise ultimo_erro
     
     async def _limpar_tarefas_antigas(self):
         """
@@ -179,9 +866,8 @@ class AIOrchestrator:
         """
         while self.monitoring_enabled:
             try:
-                # Manter apenas as últimas 1000 tarefas
-                if len(self.task_history) > 1000:
-                    self.task_history = self.task_history[-1000:]
+                # Remover do histórico as tarefas com TTL vencido
+                self.task_registry.expirar()
                 
                 # Limpar tarefas ativas antigas (mais de 1 hora)
                 cutoff_time = datetime.now() - timedelta(hours=1)
@@ -217,8 +903,8 @@ class AIOrchestrator:
                 },
                 'processamento_edital': {
                     'steps': [
-                        {'service': 'edital_scraper', 'endpoint': '/scrape', 'async': True},
-                        {'service': 'edital_analyzer', 'endpoint': '/analyze', 'depends_on': ['edital_scraper']}
+                        {'service': 'edital_scraper', 'endpoint': '/scrape', 'async': True, 'cache_ttl': 3600},
+                        {'service': 'edital_analyzer', 'endpoint': '/analyze', 'depends_on': ['edital_scraper'], 'cache_ttl': 86400}
                     ],
                     'timeout': 180
                 },
@@ -245,7 +931,7 @@ class AIOrchestrator:
         """
         try:
             key = f"pipeline_config:{pipeline_name}"
-            redis_client.setex(key, 3600, json.dumps(config))  # Expira em 1 hora
+            await redis_client.setex(key, 3600, json.dumps(config))  # Expira em 1 hora
         except Exception as e:
             logger.error(f"Erro ao salvar configuração de pipeline: {e}")
     
@@ -270,6 +956,12 @@ class AIOrchestrator:
             )
             
             self.active_tasks[task_id] = task
+            await self.task_registry.persistir(task)
+            await self.event_bus.publicar(
+                task_id, 'pipeline_started',
+                pipeline=pipeline_name,
+                steps=[step['service'] for step in config.get('steps', [])]
+            )
             
             # Executar pipeline em background
             asyncio.create_task(self._executar_pipeline_async(task_id, config, dados))
@@ -289,15 +981,14 @@ class AIOrchestrator:
             steps = config.get('steps', [])
             timeout = config.get('timeout', 300)
             
-            # Executar steps em sequência
-            resultados = {}
-            for step in steps:
-                step_result = await self._executar_step(step, dados, resultados)
-                resultados[step['service']] = step_result
-                
-                # Verificar timeout
-                if (datetime.now() - task.start_time).total_seconds() > timeout:
-                    raise TimeoutError("Pipeline excedeu o tempo limite")
+            # Executar steps respeitando o grafo de dependências, com prazo real
+            try:
+                resultados = await asyncio.wait_for(
+                    self._executar_grafo_steps(steps, dados, task_id=task_id),
+                    timeout=timeout
+                )
+            except asyncio.TimeoutError:
+                raise TimeoutError("Pipeline excedeu o tempo limite")
             
             # Finalizar tarefa
             task.status = "completed"
@@ -306,8 +997,8 @@ class AIOrchestrator:
             task.result = resultados
             
             # Mover para histórico
-            self.task_history.append(task)
-            del self.active_tasks[task_id]
+            await self._arquivar_tarefa(task)
+            await self.event_bus.publicar(task_id, 'pipeline_completed', duration=task.duration)
             
             logger.info(f"Pipeline {task_id} executado com sucesso")
             
@@ -320,11 +1011,118 @@ class AIOrchestrator:
                 task.error = str(e)
                 
                 # Mover para histórico
-                self.task_history.append(task)
-                del self.active_tasks[task_id]
+                await self._arquivar_tarefa(task)
+                await self.event_bus.publicar(task_id, 'pipeline_failed', error=str(e), duration=task.duration)
             
             logger.error(f"Erro na execução do pipeline {task_id}: {e}")
     
+    async def _arquivar_tarefa(self, task: TaskResult):
+        """
+        Move uma tarefa finalizada das tarefas ativas para o registro de histórico
+        """
+        self.task_registry.adicionar(task)
+        self.active_tasks.pop(task.task_id, None)
+        await self.task_registry.persistir(task)
+    
+    def _construir_grafo_dependencias(self, steps: List[Dict]) -> List[str]:
+        """
+        Valida as dependências dos steps e retorna uma ordem topológica
+        """
+        dependencias = {}
+        for step in steps:
+            service_name = step['service']
+            if service_name in dependencias:
+                raise ValueError(f"Step {service_name} declarado mais de uma vez no pipeline")
+            dependencias[service_name] = list(step.get('depends_on', []))
+        
+        for service_name, deps in dependencias.items():
+            for dep in deps:
+                if dep not in dependencias:
+                    raise ValueError(f"Dependência {dep} do step {service_name} não existe no pipeline")
+        
+        # Ordenação topológica (Kahn)
+        pendentes = {service_name: len(deps) for service_name, deps in dependencias.items()}
+        dependentes = {service_name: [] for service_name in dependencias}
+        for service_name, deps in dependencias.items():
+            for dep in deps:
+                dependentes[dep].append(service_name)
+        
+        prontos = [service_name for service_name, total in pendentes.items() if total == 0]
+        ordem = []
+        while prontos:
+            service_name = prontos.pop(0)
+            ordem.append(service_name)
+            for dependente in dependentes[service_name]:
+                pendentes[dependente] -= 1
+                if pendentes[dependente] == 0:
+                    prontos.append(dependente)
+        
+        if len(ordem) != len(dependencias):
+            ciclo = [service_name for service_name, total in pendentes.items() if total > 0]
+            raise ValueError(f"Dependências circulares entre os steps: {', '.join(ciclo)}")
+        
+        return ordem
+    
+    async def _executar_grafo_steps(self, steps: List[Dict], dados: Dict, task_id: Optional[str] = None) -> Dict:
+        """
+        Executa os steps do pipeline em paralelo sempre que as dependências permitem,
+        publicando eventos de início/fim de cada step quando há um task_id
+        """
+        ordem = self._construir_grafo_dependencias(steps)
+        steps_por_servico = {step['service']: step for step in steps}
+        resultados = {}
+        tarefas: Dict[str, asyncio.Task] = {}
+        
+        async def _executar_quando_pronto(step: Dict) -> Dict:
+            depends_on = step.get('depends_on', [])
+            if depends_on:
+                await asyncio.gather(*(tarefas[dep] for dep in depends_on))
+            
+            service_name = step['service']
+            if task_id:
+                await self.event_bus.publicar(task_id, 'step_started', service=service_name)
+            
+            inicio = time.monotonic()
+            try:
+                step_result = await self._executar_step(step, dados, resultados)
+            except Exception as e:
+                if task_id:
+                    await self.event_bus.publicar(
+                        task_id, 'step_failed',
+                        service=service_name,
+                        error=str(e),
+                        duration=time.monotonic() - inicio
+                    )
+                raise
+            
+            resultados[service_name] = step_result
+            if task_id:
+                # O resultado parcial permite ao cliente exibir cada etapa assim que fica pronta
+                await self.event_bus.publicar(
+                    task_id, 'step_completed',
+                    service=service_name,
+                    duration=time.monotonic() - inicio,
+                    result=step_result
+                )
+            return step_result
+        
+        for service_name in ordem:
+            tarefas[service_name] = asyncio.create_task(
+                _executar_quando_pronto(steps_por_servico[service_name])
+            )
+        
+        try:
+            await asyncio.gather(*tarefas.values())
+        finally:
+            # Em caso de falha ou timeout, cancelar os steps que ainda estão rodando
+            pendentes = [tarefa for tarefa in tarefas.values() if not tarefa.done()]
+            for tarefa in pendentes:
+                tarefa.cancel()
+            await asyncio.gather(*tarefas.values(), return_exceptions=True)
+        
+        # Manter a ordem declarada no pipeline
+        return {step['service']: resultados[step['service']] for step in steps}
+    
     async def _executar_step(self, step: Dict, dados: Dict, resultados: Dict) -> Dict:
         """
         Executa um step do pipeline
@@ -343,15 +1141,23 @@ class AIOrchestrator:
             # Preparar dados para o serviço
             service_data = self._preparar_dados_servico(dados, resultados, depends_on)
             
-            # Executar chamada para o serviço
-            if is_async:
-                # Executar de forma assíncrona
-                result = await self._chamar_servico_async(service_name, endpoint, service_data)
-            else:
+            async def _chamar() -> Dict:
+                if is_async:
+                    # Executar de forma assíncrona
+                    return await self._chamar_servico_async(service_name, endpoint, service_data)
                 # Executar de forma síncrona
-                result = await self._chamar_servico_sync(service_name, endpoint, service_data)
+                return await self._chamar_servico_sync(service_name, endpoint, service_data)
             
-            return result
+            # Steps com cache_ttl reaproveitam resultados de chamadas idênticas
+            cache_ttl = step.get('cache_ttl')
+            if not cache_ttl:
+                return await _chamar()
+            
+            config = self.services.get(service_name)
+            chave = self.step_cache.calcular_chave(
+                service_name, endpoint, service_data, config.version if config else None
+            )
+            return await self.step_cache.obter_ou_calcular(service_name, chave, cache_ttl, _chamar)
             
         except Exception as e:
             logger.error(f"Erro na execução do step: {e}")
@@ -380,49 +1186,72 @@ class AIOrchestrator:
         Chama um serviço de forma assíncrona
         """
         try:
-            config = self.services.get(service_name)
-            if not config:
-                raise ValueError(f"Serviço {service_name} não encontrado")
-            
-            if config.status != "healthy":
-                raise ValueError(f"Serviço {service_name} não está saudável")
-            
-            # Executar tarefa assíncrona
-            task = celery_app.send_task(
-                'chamar_servico',
-                args=[service_name, endpoint, dados],
-                queue=f'service_{service_name}'
-            )
-            
-            # Aguardar resultado
-            result = task.get(timeout=300)
+            async def _chamar(replica: ServiceReplica) -> Dict:
+                # Executar tarefa assíncrona na réplica escolhida
+                task = celery_app.send_task(
+                    'chamar_servico',
+                    args=[service_name, endpoint, dados, replica.base_url],
+                    queue=f'service_{service_name}'
+                )
+                
+                # Aguardar resultado sem bloquear o event loop
+                return await self._aguardar_resultado_celery(task.id, timeout=CELERY_RESULT_TIMEOUT)
             
-            return result
+            return await self._chamar_com_resiliencia(service_name, _chamar)
             
         except Exception as e:
             logger.error(f"Erro na chamada assíncrona do serviço {service_name}: {e}")
             raise
     
+    async def _aguardar_resultado_celery(self, celery_task_id: str, timeout: float) -> Dict:
+        """
+        Aguarda o resultado de uma tarefa Celery consultando o result backend via Redis assíncrono
+        """
+        key = celery_app.backend.get_key_for_task(celery_task_id)
+        if isinstance(key, bytes):
+            key = key.decode()
+        
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + timeout
+        intervalo = CELERY_POLL_INTERVAL_MIN
+        
+        while True:
+            meta_json = await redis_client.get(key)
+            if meta_json:
+                meta = json.loads(meta_json)
+                status = meta.get('status')
+                
+                if status == 'SUCCESS':
+                    return meta.get('result')
+                if status in ('FAILURE', 'REVOKED'):
+                    raise RuntimeError(f"Tarefa Celery {celery_task_id} falhou: {meta.get('result')}")
+            
+            if loop.time() >= deadline:
+                raise TimeoutError(f"Tarefa Celery {celery_task_id} excedeu o tempo limite")
+            
+            # Backoff exponencial entre consultas
+            await asyncio.sleep(intervalo)
+            intervalo = min(intervalo * 2, CELERY_POLL_INTERVAL_MAX)
+    
     async def _chamar_servico_sync(self, service_name: str, endpoint: str, dados: Dict) -> Dict:
         """
         Chama um serviço de forma síncrona
         """
         try:
-            config = self.services.get(service_name)
-            if not config:
-                raise ValueError(f"Serviço {service_name} não encontrado")
-            
-            if config.status != "healthy":
-                raise ValueError(f"Serviço {service_name} não está saudável")
-            
-            async with httpx.AsyncClient(timeout=60.0) as client:
-                response = await client.post(
-                    f"{config.url}:{config.port}{endpoint}",
-                    json=dados
-                )
+            async def _chamar(replica: ServiceReplica) -> Dict:
+                client = self._obter_cliente_http(service_name, replica.base_url)
+                response = await client.post(endpoint, json=dados)
+                
+                # Erros 4xx indicam requisição inválida, não indisponibilidade do serviço
+                if 400 <= response.status_code < 500:
+                    raise ErroNaoRecuperavel(
+                        f"Serviço {service_name} rejeitou a requisição ({response.status_code}): {response.text}"
+                    )
                 
                 response.raise_for_status()
                 return response.json()
+            
+            return await self._chamar_com_resiliencia(service_name, _chamar)
                 
         except Exception as e:
             logger.error(f"Erro na chamada síncrona do serviço {service_name}: {e}")
@@ -434,7 +1263,7 @@ class AIOrchestrator:
         """
         try:
             key = f"pipeline_config:{pipeline_name}"
-            config_json = redis_client.get(key)
+            config_json = await redis_client.get(key)
             
             if config_json:
                 return json.loads(config_json)
@@ -454,11 +1283,44 @@ class AIOrchestrator:
             return self.active_tasks[task_id]
         
         # Verificar histórico
-        for task in self.task_history:
-            if task.task_id == task_id:
-                return task
+        return self.task_registry.obter(task_id)
+    
+    async def consultar_status_tarefa(self, task_id: str) -> Optional[TaskResult]:
+        """
+        Obtém o status de uma tarefa, consultando também o Redis (tarefas de outras réplicas ou anteriores a um reinício)
+        """
+        if task_id in self.active_tasks:
+            return self.active_tasks[task_id]
         
-        return None
+        return await self.task_registry.carregar(task_id)
+    
+    async def acompanhar_pipeline(self, task_id: str) -> AsyncIterator[Dict]:
+        """
+        Gera os eventos de progresso de um pipeline até a sua conclusão
+        """
+        task = await self.consultar_status_tarefa(task_id)
+        if task is None:
+            raise ValueError(f"Tarefa {task_id} não encontrada")
+        
+        if task.status in ("completed", "failed"):
+            # Pipeline já finalizado: repetir os eventos emitidos, garantindo o evento final
+            historico = await self.event_bus.obter_historico(task_id)
+            if not any(evento['type'] in PipelineEventBus.EVENTOS_FINAIS for evento in historico):
+                historico.append({
+                    'task_id': task_id,
+                    'seq': len(historico) + 1,
+                    'type': 'pipeline_completed' if task.status == "completed" else 'pipeline_failed',
+                    'timestamp': (task.end_time or datetime.now()).isoformat(),
+                    'duration': task.duration,
+                    'error': task.error
+                })
+            
+            for evento in historico:
+                yield evento
+            return
+        
+        async for evento in self.event_bus.assinar(task_id):
+            yield evento
     
     def obter_estatisticas_servicos(self) -> Dict:
         """
@@ -474,7 +1336,16 @@ class AIOrchestrator:
                     'response_time': config.response_time,
                     'error_count': config.error_count,
                     'success_count': config.success_count,
-                    'success_rate': config.success_count / (config.success_count + config.error_count) if (config.success_count + config.error_count) > 0 else 0
+                    'success_rate': config.success_count / (config.success_count + config.error_count) if (config.success_count + config.error_count) > 0 else 0,
+                    'replicas': [
+                        {
+                            'url': replica.base_url,
+                            'circuit_state': replica.breaker.state,
+                            'latency': replica.latencia_media,
+                            'in_flight': replica.em_andamento
+                        }
+                        for replica in self.replicas[service_name]
+                    ]
                 }
             
             return {
@@ -483,19 +1354,36 @@ class AIOrchestrator:
                 'healthy_services': sum(1 for s in self.services.values() if s.status == "healthy"),
                 'unhealthy_services': sum(1 for s in self.services.values() if s.status == "unhealthy"),
                 'active_tasks': len(self.active_tasks),
-                'completed_tasks': len(self.task_history)
+                'completed_tasks': len(self.task_registry),
+                'step_cache': self.step_cache.obter_metricas()
             }
             
         except Exception as e:
             logger.error(f"Erro ao obter estatísticas: {e}")
             return {}
     
-    def obter_historico_tarefas(self, limit: int = 100) -> List[TaskResult]:
+    def obter_historico_tarefas(
+        self,
+        limit: int = 100,
+        offset: int = 0,
+        service: Optional[str] = None,
+        status: Optional[str] = None,
+        inicio: Optional[datetime] = None,
+        fim: Optional[datetime] = None
+    ) -> List[TaskResult]:
         """
-        Obtém histórico de tarefas
+        Obtém histórico de tarefas (mais recentes primeiro), com paginação e filtros
+        por serviço/pipeline, status e intervalo de início
         """
         try:
-            return self.task_history[-limit:] if self.task_history else []
+            return self.task_registry.consultar(
+                limit=limit,
+                offset=offset,
+                service=service,
+                status=status,
+                inicio=inicio,
+                fim=fim
+            )
         except Exception as e:
             logger.error(f"Erro ao obter histórico: {e}")
             return []
@@ -513,53 +1401,72 @@ class AIOrchestrator:
             while self.active_tasks:
                 await asyncio.sleep(1)
             
+            await self._fechar_clientes_http()
+            
             logger.info("Sistema de orquestração parado")
             
         except Exception as e:
             logger.error(f"Erro ao parar orquestração: {e}")
 
+# Serviços acessados pelos workers Celery
+CELERY_SERVICE_URLS = {
+    'edital_scraper': 'http://localhost:8001',
+    'edital_analyzer': 'http://localhost:8002',
+    'prova_scraper': 'http://localhost:8003',
+    'proficiency_test': 'http://localhost:8004',
+    'weakness_analyzer': 'http://localhost:8005',
+    'study_plan_generator': 'http://localhost:8006',
+    'question_predictor': 'http://localhost:8007'
+}
+
+# Pools HTTP do processo worker (um cliente por réplica, reutilizado entre tarefas)
+_worker_http_clients: Dict[str, httpx.Client] = {}
+
+def _obter_cliente_worker(service_name: str, base_url: Optional[str] = None) -> httpx.Client:
+    """
+    Retorna o cliente HTTP do worker para uma réplica de serviço, criando-o se necessário
+    """
+    base_url = base_url or CELERY_SERVICE_URLS.get(service_name)
+    if not base_url:
+        raise ValueError(f"Serviço {service_name} não encontrado")
+    
+    client = _worker_http_clients.get(base_url)
+    if client is None or client.is_closed:
+        client = httpx.Client(
+            base_url=base_url,
+            timeout=60.0,
+            limits=httpx.Limits(
+                max_connections=HTTP_MAX_CONNECTIONS,
+                max_keepalive_connections=HTTP_MAX_KEEPALIVE_CONNECTIONS,
+                keepalive_expiry=HTTP_KEEPALIVE_EXPIRY
+            ),
+            http2=HTTP2_DISPONIVEL
+        )
+        _worker_http_clients[base_url] = client
+    
+    return client
+
+@worker_process_shutdown.connect
+def _fechar_clientes_worker(**kwargs):
+    """
+    Fecha os pools HTTP ao encerrar o processo worker
+    """
+    for client in _worker_http_clients.values():
+        client.close()
+    _worker_http_clients.clear()
+
 # Tarefas do Celery
 @celery_app.task(bind=True)
-def chamar_servico(self, service_name: str, endpoint: str, dados: Dict):
+def chamar_servico(self, service_name: str, endpoint: str, dados: Dict, base_url: Optional[str] = None):
     """
     Tarefa Celery para chamar serviços de forma assíncrona
     """
     try:
-        import httpx
-        import asyncio
-        
-        async def _chamar():
-            config = {
-                'edital_scraper': {'url': 'http://localhost:8001'},
-                'edital_analyzer': {'url': 'http://localhost:8002'},
-                'prova_scraper': {'url': 'http://localhost:8003'},
-                'proficiency_test': {'url': 'http://localhost:8004'},
-                'weakness_analyzer': {'url': 'http://localhost:8005'},
-                'study_plan_generator': {'url': 'http://localhost:8006'},
-                'question_predictor': {'url': 'http://localhost:8007'}
-            }
-            
-            service_config = config.get(service_name)
-            if not service_config:
-                raise ValueError(f"Serviço {service_name} não encontrado")
-            
-            async with httpx.AsyncClient(timeout=60.0) as client:
-                response = await client.post(
-                    f"{service_config['url']}{endpoint}",
-                    json=dados
-                )
-                
-                response.raise_for_status()
-                return response.json()
+        client = _obter_cliente_worker(service_name, base_url)
+        response = client.post(endpoint, json=dados)
         
-        # Executar de forma síncrona
-        loop = asyncio.new_event_loop()
-        asyncio.set_event_loop(loop)
-        try:
-            result = loop.run_until_complete(_chamar())
-            return result
-        finally:
-            loop.close()
+        response.raise_for_status()
+        return response.json()
             
     except Exception as e:
         logger.error(f"Erro na tarefa Celery: {e}")
@@ -0,0 +1,90 @@
+"""Testes do acompanhamento de pipelines via SSE"""
+import asyncio
+import json
+from datetime import datetime
+
+import httpx
+import pytest
+from fakeredis import aioredis as fake_aioredis
+
+from app.main import app
+from app.services.ai_orchestrator import PipelineEventBus, TaskResult, ai_orchestrator
+
+
+@pytest.fixture
+def event_bus():
+    bus = PipelineEventBus(fake_aioredis.FakeRedis(decode_responses=True))
+    original = ai_orchestrator.event_bus
+    ai_orchestrator.event_bus = bus
+    yield bus
+    ai_orchestrator.event_bus = original
+
+
+@pytest.fixture
+def tarefa():
+    task = TaskResult(task_id="tarefa-sse", service="coleta_provas", status="started", start_time=datetime.now())
+    ai_orchestrator.active_tasks[task.task_id] = task
+    yield task
+    ai_orchestrator.active_tasks.pop(task.task_id, None)
+
+
+def ler_eventos_sse(corpo: str):
+    eventos = []
+    for bloco in corpo.split("\n\n"):
+        for linha in bloco.splitlines():
+            if linha.startswith("data: "):
+                eventos.append(json.loads(linha[len("data: "):]))
+    return eventos
+
+
+@pytest.mark.asyncio
+async def test_stream_sse_entrega_historico_e_eventos_ao_vivo(event_bus, tarefa):
+    await event_bus.publicar(tarefa.task_id, 'pipeline_started', pipeline='coleta_provas')
+    
+    async def publicar_ao_vivo():
+        await asyncio.sleep(0.2)
+        await event_bus.publicar(tarefa.task_id, 'step_completed', service='prova_scraper')
+        await event_bus.publicar(tarefa.task_id, 'pipeline_completed', duration=1.0)
+    
+    publicador = asyncio.create_task(publicar_ao_vivo())
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://teste") as cliente:
+        response = await asyncio.wait_for(cliente.get(f"/pipelines/{tarefa.task_id}/events"), timeout=10)
+    await publicador
+    
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/event-stream")
+    assert [evento['type'] for evento in ler_eventos_sse(response.text)] == [
+        'pipeline_started', 'step_completed', 'pipeline_completed'
+    ]
+
+
+@pytest.mark.asyncio
+async def test_stream_sse_de_tarefa_inexistente(event_bus):
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://teste") as cliente:
+        response = await cliente.get("/pipelines/nao-existe/events")
+    
+    assert response.status_code == 404
+
+
+@pytest.mark.asyncio
+async def test_assinatura_entrega_eventos_ao_vivo_fora_de_ordem(event_bus, tarefa):
+    redis = event_bus.redis
+    canal = event_bus._canal(tarefa.task_id)
+    historico = event_bus._chave_historico(tarefa.task_id)
+    
+    def evento(seq, tipo):
+        return json.dumps({'task_id': tarefa.task_id, 'seq': seq, 'type': tipo})
+    
+    # Evento 1 está no histórico e também chega pelo canal
+    await redis.rpush(historico, evento(1, 'pipeline_started'))
+    
+    async def publicar_fora_de_ordem():
+        await asyncio.sleep(0.1)
+        for seq, tipo in [(1, 'pipeline_started'), (3, 'step_completed'), (2, 'step_completed'), (4, 'pipeline_completed')]:
+            await redis.publish(canal, evento(seq, tipo))
+    
+    publicador = asyncio.create_task(publicar_fora_de_ordem())
+    recebidos = [e['seq'] async for e in event_bus.assinar(tarefa.task_id) if e['type'] != 'heartbeat']
+    await publicador
+    
+    assert recebidos == [1, 3, 2, 4]
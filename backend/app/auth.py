@@ -1,3 +1,7 @@
+import json
+import threading
+import time
+from collections import OrderedDict
 from datetime import datetime, timedelta
 from typing import Optional
 from jose import JWTError, jwt
@@ -5,10 +9,11 @@ from passlib.context import CryptContext
 from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
 from app.config import settings
-from app.database import get_db
+from app.database import Database, get_database
 from app.models import User
-from app.schemas import TokenData
+from app.schemas import TokenData, CurrentUser
 
 # Password hashing
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
@@ -35,7 +40,7 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     else:
         expire = datetime.utcnow() + timedelta(minutes=settings.access_token_expire_minutes)
     
-    to_encode.update({"exp": expire})
+    to_encode.update({"exp": expire, "iat": datetime.utcnow()})
     encoded_jwt = jwt.encode(to_encode, settings.secret_key, algorithm=settings.algorithm)
     return encoded_jwt
 
@@ -47,17 +52,137 @@ def verify_token(token: str, credentials_exception):
         email: str = payload.get("sub")
         if email is None:
             raise credentials_exception
-        token_data = TokenData(email=email)
+        token_data = TokenData(
+            email=email,
+            user_id=payload.get("uid"),
+            is_active=payload.get("active"),
+            issued_at=payload.get("iat"),
+        )
         return token_data
     except JWTError:
         raise credentials_exception
 
 
-def get_current_user(
+def user_token_claims(user: User) -> dict:
+    """Claims that let get_current_user skip the database for fresh tokens"""
+    return {"sub": user.email, "uid": user.id, "active": user.is_active}
+
+
+class UserCache:
+    """
+    Short-TTL cache of authenticated users keyed by token subject (email).
+    
+    Uses Redis when user_cache_redis_url is set (shared by all instances),
+    otherwise an in-process LRU. With Redis it also keeps a "changed at" marker
+    per subject, so tokens issued before the last update/deactivation stop being
+    trusted on their claims. Markers live as long as a token can and are never
+    kept in process: a local marker can't reach other instances, so without
+    Redis token claims are not trusted at all.
+    """
+    
+    def __init__(self, ttl: int, max_size: int, redis_url: Optional[str] = None):
+        self.ttl = ttl
+        self.max_size = max_size
+        self.marker_ttl = settings.access_token_expire_minutes * 60
+        self._lock = threading.Lock()
+        self._users: OrderedDict = OrderedDict()
+        self._redis = None
+        if redis_url:
+            import redis
+            self._redis = redis.Redis.from_url(redis_url, decode_responses=True)
+    
+    @property
+    def remote(self) -> bool:
+        return self._redis is not None
+    
+    # In-process LRU with per-entry expiry
+    def _local_get(self, store: OrderedDict, key: str):
+        with self._lock:
+            entry = store.get(key)
+            if entry is None:
+                return None
+            value, expires_at = entry
+            if expires_at <= time.monotonic():
+                del store[key]
+                return None
+            store.move_to_end(key)
+            return value
+    
+    def _local_set(self, store: OrderedDict, key: str, value, ttl: int):
+        with self._lock:
+            store[key] = (value, time.monotonic() + ttl)
+            store.move_to_end(key)
+            while len(store) > self.max_size:
+                store.popitem(last=False)
+    
+    def get(self, email: str) -> Optional[CurrentUser]:
+        if self._redis is not None:
+            data = self._redis.get(f"auth_user:{email}")
+            return CurrentUser(**json.loads(data)) if data else None
+        return self._local_get(self._users, email)
+    
+    def set(self, user: CurrentUser):
+        if self._redis is not None:
+            self._redis.set(f"auth_user:{user.email}", user.model_dump_json(), ex=self.ttl)
+        else:
+            self._local_set(self._users, user.email, user, self.ttl)
+    
+    def changed_at(self, email: str) -> Optional[float]:
+        value = self._redis.get(f"auth_user_changed:{email}")
+        return float(value) if value is not None else None
+    
+    def invalidate(self, email: str):
+        """Drop the cached user and distrust claims of tokens issued until now"""
+        now = time.time()
+        if self._redis is not None:
+            pipe = self._redis.pipeline()
+            pipe.delete(f"auth_user:{email}")
+            pipe.set(f"auth_user_changed:{email}", now, ex=self.marker_ttl)
+            pipe.execute()
+        else:
+            with self._lock:
+                self._users.pop(email, None)
+    
+    def clear(self):
+        with self._lock:
+            self._users.clear()
+
+
+user_cache = UserCache(
+    ttl=settings.user_cache_ttl,
+    max_size=settings.user_cache_max_size,
+    redis_url=settings.user_cache_redis_url,
+)
+
+
+def invalidate_user(*emails: str):
+    """Invalidate cached auth state after a user is updated or deactivated"""
+    for email in emails:
+        if email:
+            user_cache.invalidate(email)
+
+
+def _resolve_cached_user(token_data: TokenData) -> Optional[CurrentUser]:
+    # Tokens carrying id/is_active claims are trusted unless the user changed since issue,
+    # which is only known reliably when the markers are shared through Redis
+    has_claims = token_data.user_id is not None and token_data.is_active is not None and token_data.issued_at is not None
+    if user_cache.remote and has_claims:
+        changed_at = user_cache.changed_at(token_data.email)
+        if changed_at is None or token_data.issued_at > changed_at:
+            return CurrentUser(id=token_data.user_id, email=token_data.email, is_active=token_data.is_active)
+    
+    return user_cache.get(token_data.email)
+
+
+def _get_user_by_email(db: Session, email: str) -> Optional[User]:
+    return db.query(User).filter(User.email == email).first()
+
+
+async def get_current_user(
     credentials: HTTPAuthorizationCredentials = Depends(security),
-    db: Session = Depends(get_db)
-) -> User:
-    """Get current authenticated user"""
+    db: Database = Depends(get_database)
+) -> CurrentUser:
+    """Get current authenticated user (from token claims or cache when possible)"""
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
@@ -67,14 +192,26 @@ def get_current_user(
     token = credentials.credentials
     token_data = verify_token(token, credentials_exception)
     
-    user = db.query(User).filter(User.email == token_data.email).first()
+    if user_cache.remote:
+        current_user = await run_in_threadpool(_resolve_cached_user, token_data)
+    else:
+        current_user = _resolve_cached_user(token_data)
+    if current_user is not None:
+        return current_user
+    
+    user = await db.run(_get_user_by_email, token_data.email)
     if user is None:
         raise credentials_exception
     
-    return user
+    current_user = CurrentUser(id=user.id, email=user.email, is_active=user.is_active)
+    if user_cache.remote:
+        await run_in_threadpool(user_cache.set, current_user)
+    else:
+        user_cache.set(current_user)
+    return current_user
 
 
-def get_current_active_user(current_user: User = Depends(get_current_user)) -> User:
+async def get_current_active_user(current_user: CurrentUser = Depends(get_current_user)) -> CurrentUser:
     """Get current active user"""
     if not current_user.is_active:
         raise HTTPException(status_code=400, detail="Inactive user")
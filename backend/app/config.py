@@ -7,11 +7,24 @@ class Settings(BaseSettings):
     database_url: str = "sqlite:///./concurso_ai.db"
     database_url_test: str = "sqlite:///./concurso_ai_test.db"
     
+    # Database engine and connection pool
+    database_async: bool = False  # asyncpg (PostgreSQL) / aiosqlite (SQLite) engine for the API
+    db_pool_size: int = 5
+    db_max_overflow: int = 10
+    db_pool_timeout: int = 30  # seconds
+    db_pool_recycle: int = 1800  # seconds
+    db_pool_pre_ping: bool = True
+    
     # Security
     secret_key: str = "your-secret-key-here-change-in-production"
     algorithm: str = "HS256"
     access_token_expire_minutes: int = 30
     
+    # Authenticated-user cache
+    user_cache_ttl: int = 60  # seconds
+    user_cache_max_size: int = 10000
+    user_cache_redis_url: Optional[str] = None
+    
     # CORS
     frontend_url: str = "http://localhost:3001"
     
@@ -1,9 +1,10 @@
-from sqlalchemy.orm import Session
-from sqlalchemy import and_, func
+from sqlalchemy.orm import Session, selectinload
+from sqlalchemy import and_, func, select, update
+from sqlalchemy.exc import IntegrityError
 from typing import List, Optional, Dict, Any
-from app.models import User, Question, Simulado, SimuladoQuestion, SimuladoResult
-from app.schemas import UserCreate, QuestionCreate, SimuladoCreate, SimuladoResultCreate
-from app.auth import get_password_hash
+from app.models import User, Question, Simulado, SimuladoQuestion, SimuladoResult, UserStats
+from app.schemas import UserCreate, UserUpdate, QuestionCreate, SimuladoCreate, SimuladoResultCreate
+from app.auth import get_password_hash, invalidate_user
 import random
 
 
@@ -13,9 +14,10 @@ def get_user_by_email(db: Session, email: str) -> Optional[User]:
     return db.query(User).filter(User.email == email).first()
 
 
-def create_user(db: Session, user: UserCreate) -> User:
-    """Create new user"""
-    hashed_password = get_password_hash(user.password)
+def create_user(db: Session, user: UserCreate, hashed_password: Optional[str] = None) -> User:
+    """Create new user (hashed_password can be precomputed off the event loop)"""
+    if hashed_password is None:
+        hashed_password = get_password_hash(user.password)
     db_user = User(
         email=user.email,
         name=user.name,
@@ -32,6 +34,35 @@ def get_user(db: Session, user_id: int) -> Optional[User]:
     return db.query(User).filter(User.id == user_id).first()
 
 
+def update_user(db: Session, user_id: int, user_update: UserUpdate) -> Optional[User]:
+    """Update user profile and invalidate its cached auth state"""
+    db_user = get_user(db, user_id)
+    if not db_user:
+        return None
+    
+    old_email = db_user.email
+    for field, value in user_update.model_dump(exclude_unset=True).items():
+        if value is not None:
+            setattr(db_user, field, value)
+    db.commit()
+    db.refresh(db_user)
+    invalidate_user(old_email, db_user.email)
+    return db_user
+
+
+def deactivate_user(db: Session, user_id: int) -> Optional[User]:
+    """Deactivate user; tokens issued before this stop resolving from claims/cache"""
+    db_user = get_user(db, user_id)
+    if not db_user:
+        return None
+    
+    db_user.is_active = False
+    db.commit()
+    db.refresh(db_user)
+    invalidate_user(db_user.email)
+    return db_user
+
+
 # Question CRUD
 def get_questions(
     db: Session, 
@@ -68,6 +99,44 @@ def create_question(db: Session, question: QuestionCreate) -> Question:
     return db_question
 
 
+def _subject_quotas(subjects: List[str], num_questions: int) -> Dict[str, int]:
+    """Split the number of questions evenly across subjects (remainder goes to random subjects)"""
+    base, extra = divmod(num_questions, len(subjects))
+    bonus = set(random.sample(range(len(subjects)), extra))
+    return {subject: base + (1 if i in bonus else 0) for i, subject in enumerate(subjects)}
+
+
+def _tier_filters(subject: str, banca: str, level: str) -> List[list]:
+    """Fallback tiers for one subject: same banca and level, then same banca, then any banca"""
+    return [
+        [Question.subject == subject, Question.banca == banca, Question.level == level],
+        [Question.subject == subject, Question.banca == banca, Question.level != level],
+        [Question.subject == subject, Question.banca != banca],
+    ]
+
+
+def _sample_by_random_key(
+    db: Session,
+    filters: list,
+    pivot: float,
+    limit: int,
+    exclude_ids: Optional[set] = None
+) -> List[Question]:
+    """Take up to limit questions starting at pivot on random_key, wrapping around to the start
+    
+    Each half is a range scan on an index ending in random_key that stops after limit rows.
+    """
+    rows = []
+    for key_range in (Question.random_key >= pivot, Question.random_key < pivot):
+        if len(rows) >= limit:
+            break
+        query = db.query(Question).filter(*filters, key_range)
+        if exclude_ids:
+            query = query.filter(Question.id.notin_(exclude_ids))
+        rows.extend(query.order_by(Question.random_key).limit(limit - len(rows)).all())
+    return rows
+
+
 def get_questions_for_simulado(
     db: Session,
     subjects: List[str],
@@ -75,37 +144,67 @@ def get_questions_for_simulado(
     level: str,
     num_questions: int
 ) -> List[Question]:
-    """Get questions for simulado generation"""
-    query = db.query(Question).filter(
-        and_(
-            Question.subject.in_(subjects),
-            Question.banca == banca,
-            Question.level == level
-        )
-    )
+    """Get questions for simulado generation
     
-    all_questions = query.all()
+    Sampling runs in the database: each subject's quota is read from its fallback tiers
+    (same banca and level, then same banca, then any) as random_key range scans rotated
+    around a random pivot, so only about num_questions rows are transferred and nothing
+    is written.
+    """
+    subjects = list(dict.fromkeys(subjects))
+    if not subjects or num_questions <= 0:
+        return []
     
-    # If we don't have enough questions, get from all levels
-    if len(all_questions) < num_questions:
-        query = db.query(Question).filter(
-            and_(
-                Question.subject.in_(subjects),
-                Question.banca == banca
-            )
-        )
-        all_questions = query.all()
+    quotas = _subject_quotas(subjects, num_questions)
+    pivot = random.random()
     
-    # If still not enough, get any questions from the subjects
-    if len(all_questions) < num_questions:
-        query = db.query(Question).filter(Question.subject.in_(subjects))
-        all_questions = query.all()
+    # Stratified selection: each subject's quota first
+    selected = []
+    for subject in subjects:
+        needed = quotas[subject]
+        for filters in _tier_filters(subject, banca, level):
+            if needed <= 0:
+                break
+            questions = _sample_by_random_key(db, filters, pivot, needed)
+            selected.extend(questions)
+            needed -= len(questions)
     
-    # Randomly select questions
-    if len(all_questions) >= num_questions:
-        return random.sample(all_questions, num_questions)
-    else:
-        return all_questions
+    # Subjects with spare questions fill the quotas the others could not
+    missing = num_questions - len(selected)
+    if missing > 0:
+        selected_ids = {question.id for question in selected}
+        for subject in subjects:
+            for filters in _tier_filters(subject, banca, level):
+                if missing <= 0:
+                    break
+                questions = _sample_by_random_key(db, filters, pivot, missing, selected_ids)
+                selected.extend(questions)
+                selected_ids.update(question.id for question in questions)
+                missing -= len(questions)
+    
+    random.shuffle(selected)
+    return selected
+
+
+def reshuffle_question_keys(db: Session, batch_size: int = 1000) -> int:
+    """Assign fresh random keys to all questions, in id order and in short transactions
+    
+    Meant for a periodic job, outside request handling, so questions that sit next to
+    each other on random_key don't keep being drawn together.
+    """
+    updated = 0
+    last_id = 0
+    while True:
+        ids = db.scalars(
+            select(Question.id).where(Question.id > last_id).order_by(Question.id).limit(batch_size)
+        ).all()
+        if not ids:
+            break
+        db.execute(update(Question), [{"id": question_id, "random_key": random.random()} for question_id in ids])
+        db.commit()
+        updated += len(ids)
+        last_id = ids[-1]
+    return updated
 
 
 # Simulado CRUD
@@ -118,6 +217,10 @@ def create_simulado(db: Session, simulado: SimuladoCreate, user_id: int) -> Simu
         time_limit=simulado.time_limit,
         total_questions=simulado.total_questions
     )
+    
+    stats = get_user_stats_for_update(db, user_id)
+    stats.total_simulados += 1
+    
     db.add(db_simulado)
     db.commit()
     db.refresh(db_simulado)
@@ -136,6 +239,15 @@ def get_user_simulados(db: Session, user_id: int, skip: int = 0, limit: int = 10
     return db.query(Simulado).filter(Simulado.user_id == user_id).offset(skip).limit(limit).all()
 
 
+def get_simulado_questions(db: Session, simulado_id: int) -> List[Question]:
+    """Get simulado questions in order with a single joined query"""
+    return db.query(Question).join(
+        SimuladoQuestion, SimuladoQuestion.question_id == Question.id
+    ).filter(
+        SimuladoQuestion.simulado_id == simulado_id
+    ).order_by(SimuladoQuestion.order).all()
+
+
 def add_questions_to_simulado(db: Session, simulado_id: int, questions: List[Question]):
     """Add questions to simulado"""
     for i, question in enumerate(questions):
@@ -176,8 +288,10 @@ def create_simulado_result(db: Session, result: SimuladoResultCreate, user_id: i
     if not simulado:
         raise ValueError("Simulado not found")
     
-    # Get questions for this simulado
-    simulado_questions = db.query(SimuladoQuestion).filter(
+    # Get questions for this simulado (questions eager-loaded in one extra query)
+    simulado_questions = db.query(SimuladoQuestion).options(
+        selectinload(SimuladoQuestion.question)
+    ).filter(
         SimuladoQuestion.simulado_id == result.simulado_id
     ).order_by(SimuladoQuestion.order).all()
     
@@ -185,21 +299,18 @@ def create_simulado_result(db: Session, result: SimuladoResultCreate, user_id: i
     subject_scores = {}
     
     for sq in simulado_questions:
-        question = get_question(db, sq.question_id)
+        question = sq.question
         if not question:
             continue
-            
-        user_answer = result.answers.get(str(question.id))
-        if user_answer == question.correct_answer:
-            correct_answers += 1
         
-        # Track subject scores
-        if question.subject not in subject_scores:
-            subject_scores[question.subject] = {"correct": 0, "total": 0}
+        is_correct = result.answers.get(str(question.id)) == question.correct_answer
         
-        subject_scores[question.subject]["total"] += 1
-        if user_answer == question.correct_answer:
-            subject_scores[question.subject]["correct"] += 1
+        # Track subject scores
+        scores = subject_scores.setdefault(question.subject, {"correct": 0, "total": 0})
+        scores["total"] += 1
+        if is_correct:
+            correct_answers += 1
+            scores["correct"] += 1
     
     score = int((correct_answers / len(simulado_questions)) * 100) if simulado_questions else 0
     
@@ -213,13 +324,18 @@ def create_simulado_result(db: Session, result: SimuladoResultCreate, user_id: i
         subject_scores=subject_scores
     )
     
+    # Update materialized dashboard stats in the same transaction
+    stats = get_user_stats_for_update(db, user_id)
+    add_result_to_stats(stats, db_result)
+    
     db.add(db_result)
+    
+    # Mark simulado as completed in the same transaction
+    simulado.completed_at = func.now()
+    
     db.commit()
     db.refresh(db_result)
     
-    # Mark simulado as completed
-    complete_simulado(db, result.simulado_id, user_id)
-    
     return db_result
 
 
@@ -240,56 +356,120 @@ def get_user_results(db: Session, user_id: int, skip: int = 0, limit: int = 100)
     ).offset(skip).limit(limit).all()
 
 
-# Dashboard stats
-def get_dashboard_stats(db: Session, user_id: int) -> Dict[str, Any]:
-    """Get dashboard statistics for user"""
-    # Total simulados
-    total_simulados = db.query(Simulado).filter(Simulado.user_id == user_id).count()
+# User stats (materialized dashboard statistics)
+def compute_user_stats(db: Session, user_id: int) -> UserStats:
+    """Compute user stats from the simulado and result tables (not added to the session)"""
+    total_simulados = db.query(func.count(Simulado.id)).filter(Simulado.user_id == user_id).scalar() or 0
     
-    # Total questions answered
-    total_questions = db.query(func.sum(SimuladoResult.correct_answers)).filter(
-        SimuladoResult.user_id == user_id
-    ).scalar() or 0
+    total_results, total_correct, score_sum, best_score, total_time = db.query(
+        func.count(SimuladoResult.id),
+        func.sum(SimuladoResult.correct_answers),
+        func.sum(SimuladoResult.score),
+        func.max(SimuladoResult.score),
+        func.sum(SimuladoResult.time_spent)
+    ).filter(SimuladoResult.user_id == user_id).one()
     
-    # Average score
-    avg_score = db.query(func.avg(SimuladoResult.score)).filter(
+    subject_scores = {}
+    for (result_subject_scores,) in db.query(SimuladoResult.subject_scores).filter(
         SimuladoResult.user_id == user_id
-    ).scalar() or 0
+    ):
+        for subject, scores in result_subject_scores.items():
+            merged = subject_scores.setdefault(subject, {"correct": 0, "total": 0})
+            merged["correct"] += scores["correct"]
+            merged["total"] += scores["total"]
     
-    # Best score
-    best_score = db.query(func.max(SimuladoResult.score)).filter(
-        SimuladoResult.user_id == user_id
-    ).scalar() or 0
+    return UserStats(
+        user_id=user_id,
+        total_simulados=total_simulados,
+        total_results=total_results or 0,
+        total_correct_answers=total_correct or 0,
+        score_sum=score_sum or 0,
+        best_score=best_score or 0,
+        time_spent_total=total_time or 0,
+        subject_scores=subject_scores
+    )
+
+
+def get_user_stats_for_update(db: Session, user_id: int) -> UserStats:
+    """Get the user's stats row locked for update, creating it from history if missing"""
+    stats = db.query(UserStats).filter(UserStats.user_id == user_id).with_for_update().first()
+    if stats is not None:
+        return stats
     
-    # Total time spent
-    total_time = db.query(func.sum(SimuladoResult.time_spent)).filter(
-        SimuladoResult.user_id == user_id
-    ).scalar() or 0
+    stats = compute_user_stats(db, user_id)
+    try:
+        with db.begin_nested():
+            db.add(stats)
+    except IntegrityError:
+        # Created concurrently by another request
+        stats = db.query(UserStats).filter(UserStats.user_id == user_id).with_for_update().one()
+    return stats
+
+
+def add_result_to_stats(stats: UserStats, result: SimuladoResult):
+    """Add a new simulado result to the user's stats"""
+    stats.total_results += 1
+    stats.total_correct_answers += result.correct_answers
+    stats.score_sum += result.score
+    stats.best_score = max(stats.best_score, result.score)
+    stats.time_spent_total += result.time_spent
+    
+    # Assign a new dict so the JSON column change is detected
+    subject_scores = {subject: dict(scores) for subject, scores in (stats.subject_scores or {}).items()}
+    for subject, scores in result.subject_scores.items():
+        merged = subject_scores.setdefault(subject, {"correct": 0, "total": 0})
+        merged["correct"] += scores["correct"]
+        merged["total"] += scores["total"]
+    stats.subject_scores = subject_scores
+
+
+def rebuild_user_stats(db: Session, user_id: int) -> UserStats:
+    """Recompute the user's stats from history and store them"""
+    stats = db.merge(compute_user_stats(db, user_id))
+    db.commit()
+    return stats
+
+
+def check_user_stats(db: Session, user_id: int) -> Dict[str, Any]:
+    """Compare stored user stats with a recomputation; returns {field: (stored, expected)} for mismatches"""
+    expected = compute_user_stats(db, user_id)
+    stored = db.query(UserStats).filter(UserStats.user_id == user_id).first()
+    
+    fields = [
+        "total_simulados", "total_results", "total_correct_answers", "score_sum",
+        "best_score", "time_spent_total", "subject_scores"
+    ]
+    if stored is None:
+        return {field: (None, getattr(expected, field)) for field in fields}
+    
+    return {
+        field: (getattr(stored, field), getattr(expected, field))
+        for field in fields
+        if getattr(stored, field) != getattr(expected, field)
+    }
+
+
+# Dashboard stats
+def get_dashboard_stats(db: Session, user_id: int) -> Dict[str, Any]:
+    """Get dashboard statistics for user"""
+    stats = db.query(UserStats).filter(UserStats.user_id == user_id).first()
+    if stats is None:
+        stats = get_user_stats_for_update(db, user_id)
+        db.commit()
     
-    # Subject performance
-    results = db.query(SimuladoResult).filter(SimuladoResult.user_id == user_id).all()
+    # Subject performance percentages
     subject_performance = {}
+    for subject, scores in stats.subject_scores.items():
+        total = scores["total"]
+        subject_performance[subject] = (scores["correct"] / total) * 100 if total > 0 else 0
     
-    for result in results:
-        for subject, scores in result.subject_scores.items():
-            if subject not in subject_performance:
-                subject_performance[subject] = {"correct": 0, "total": 0}
-            subject_performance[subject]["correct"] += scores["correct"]
-            subject_performance[subject]["total"] += scores["total"]
-    
-    # Calculate percentages
-    for subject in subject_performance:
-        total = subject_performance[subject]["total"]
-        if total > 0:
-            subject_performance[subject] = (subject_performance[subject]["correct"] / total) * 100
-        else:
-            subject_performance[subject] = 0
+    average_score = stats.score_sum / stats.total_results if stats.total_results else 0
     
     return {
-        "total_simulados": total_simulados,
-        "total_questions_answered": total_questions,
-        "average_score": round(avg_score, 2),
-        "best_score": best_score,
-        "time_spent_total": total_time,
+        "total_simulados": stats.total_simulados,
+        "total_questions_answered": stats.total_correct_answers,
+        "average_score": round(average_score, 2),
+        "best_score": stats.best_score,
+        "time_spent_total": stats.time_spent_total,
         "subjects_performance": subject_performance
     }
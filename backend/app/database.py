@@ -1,6 +1,9 @@
 from sqlalchemy import create_engine
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
+from starlette.concurrency import run_in_threadpool
 from app.config import settings
 import os
 
@@ -13,11 +16,48 @@ if os.getenv("CLOUD_SQL_DATABASE_URL"):
 elif os.getenv("DATABASE_URL"):
     database_url = os.getenv("DATABASE_URL")
 
+
+def _engine_options(url: str) -> dict:
+    """Connection pool settings for the given database URL"""
+    if make_url(url).get_backend_name() == "sqlite":
+        return {"connect_args": {"check_same_thread": False}}
+    
+    return {
+        "pool_size": settings.db_pool_size,
+        "max_overflow": settings.db_max_overflow,
+        "pool_timeout": settings.db_pool_timeout,
+        "pool_recycle": settings.db_pool_recycle,
+        "pool_pre_ping": settings.db_pool_pre_ping,
+    }
+
+
+def _async_database_url(url: str) -> str:
+    """Same database with its async driver (asyncpg / aiosqlite)"""
+    url = make_url(url)
+    backend = url.get_backend_name()
+    if backend == "postgresql":
+        return url.set(drivername="postgresql+asyncpg").render_as_string(hide_password=False)
+    if backend == "sqlite":
+        return url.set(drivername="sqlite+aiosqlite").render_as_string(hide_password=False)
+    raise ValueError(f"No async driver configured for {backend}")
+
+
 # Create database engine
-engine = create_engine(database_url)
+engine = create_engine(database_url, **_engine_options(database_url))
 
 # Create session factory
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+# Async routes serialize returned objects on the event loop after commit: keep them loaded
+SessionLocal = sessionmaker(autocommit=False, autoflush=False, expire_on_commit=False, bind=engine)
+
+# Async engine for the API (optional)
+async_engine = None
+AsyncSessionLocal = None
+if settings.database_async:
+    async_url = _async_database_url(database_url)
+    async_engine = create_async_engine(async_url, **_engine_options(async_url))
+    AsyncSessionLocal = async_sessionmaker(
+        bind=async_engine, autoflush=False, expire_on_commit=False
+    )
 
 # Create base class for models
 Base = declarative_base()
@@ -30,3 +70,33 @@ def get_db():
         yield db
     finally:
         db.close()
+
+
+class Database:
+    """Runs synchronous ORM code (e.g. app.crud functions) without blocking the event loop
+    
+    With the async engine the code runs on the async connection via AsyncSession.run_sync;
+    otherwise it runs in the threadpool with a regular Session.
+    """
+    
+    def __init__(self, session):
+        self.session = session
+    
+    async def run(self, fn, *args, **kwargs):
+        """Call fn(session, *args, **kwargs)"""
+        if isinstance(self.session, AsyncSession):
+            return await self.session.run_sync(fn, *args, **kwargs)
+        return await run_in_threadpool(fn, self.session, *args, **kwargs)
+
+
+async def get_database():
+    """Dependency to get a database handle for async routes"""
+    if AsyncSessionLocal is not None:
+        async with AsyncSessionLocal() as session:
+            yield Database(session)
+    else:
+        session = SessionLocal()
+        try:
+            yield Database(session)
+        finally:
+            await run_in_threadpool(session.close)
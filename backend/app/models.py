@@ -1,7 +1,8 @@
-from sqlalchemy import Column, Integer, String, DateTime, Boolean, Text, ForeignKey, JSON
+from sqlalchemy import Column, Integer, String, DateTime, Boolean, Text, ForeignKey, JSON, Float, Index
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from app.database import Base
+import random
 
 
 class User(Base):
@@ -18,6 +19,7 @@ class User(Base):
     # Relationships
     simulados = relationship("Simulado", back_populates="user")
     results = relationship("SimuladoResult", back_populates="user")
+    stats = relationship("UserStats", back_populates="user", uselist=False)
 
 
 class Question(Base):
@@ -32,10 +34,17 @@ class Question(Base):
     banca = Column(String, nullable=False)
     level = Column(String, nullable=False)  # basic, intermediate, advanced
     year = Column(Integer)
+    random_key = Column(Float, nullable=False, default=random.random)  # Used for random sampling
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     
     # Relationships
     simulado_questions = relationship("SimuladoQuestion", back_populates="question")
+    
+    __table_args__ = (
+        Index("ix_questions_subject_banca_level_random_key", "subject", "banca", "level", "random_key"),
+        Index("ix_questions_subject_banca_random_key", "subject", "banca", "random_key"),
+        Index("ix_questions_subject_random_key", "subject", "random_key"),
+    )
 
 
 class Simulado(Base):
@@ -86,3 +95,21 @@ class SimuladoResult(Base):
     # Relationships
     simulado = relationship("Simulado", back_populates="result")
     user = relationship("User", back_populates="results")
+
+
+class UserStats(Base):
+    """Per-user dashboard statistics, kept up to date as simulados and results are created"""
+    __tablename__ = "user_stats"
+    
+    user_id = Column(Integer, ForeignKey("users.id"), primary_key=True)
+    total_simulados = Column(Integer, nullable=False, default=0)
+    total_results = Column(Integer, nullable=False, default=0)
+    total_correct_answers = Column(Integer, nullable=False, default=0)
+    score_sum = Column(Integer, nullable=False, default=0)
+    best_score = Column(Integer, nullable=False, default=0)
+    time_spent_total = Column(Integer, nullable=False, default=0)  # in seconds
+    subject_scores = Column(JSON, nullable=False, default=dict)  # subject -> {correct, total}
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+    
+    # Relationships
+    user = relationship("User", back_populates="stats")
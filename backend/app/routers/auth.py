@@ -1,8 +1,8 @@
 from datetime import timedelta
 from fastapi import APIRouter, Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordRequestForm
-from sqlalchemy.orm import Session
-from app.database import get_db
+from starlette.concurrency import run_in_threadpool
+from app.database import Database, get_database
 from app import crud, schemas, auth
 from app.config import settings
 
@@ -10,26 +10,27 @@ router = APIRouter(prefix="/auth", tags=["authentication"])
 
 
 @router.post("/register", response_model=schemas.User)
-def register(user: schemas.UserCreate, db: Session = Depends(get_db)):
+async def register(user: schemas.UserCreate, db: Database = Depends(get_database)):
     """Register a new user"""
     # Check if user already exists
-    db_user = crud.get_user_by_email(db, email=user.email)
+    db_user = await db.run(crud.get_user_by_email, email=user.email)
     if db_user:
         raise HTTPException(
             status_code=400,
             detail="Email already registered"
         )
     
-    # Create user
-    return crud.create_user(db=db, user=user)
+    # Create user (bcrypt hashing is CPU-bound, keep it off the event loop)
+    hashed_password = await run_in_threadpool(auth.get_password_hash, user.password)
+    return await db.run(crud.create_user, user=user, hashed_password=hashed_password)
 
 
 @router.post("/login", response_model=schemas.Token)
-def login(form_data: OAuth2PasswordRequestForm = Depends(), db: Session = Depends(get_db)):
+async def login(form_data: OAuth2PasswordRequestForm = Depends(), db: Database = Depends(get_database)):
     """Login user and return access token"""
     # Authenticate user
-    user = crud.get_user_by_email(db, email=form_data.username)
-    if not user or not auth.verify_password(form_data.password, user.hashed_password):
+    user = await db.run(crud.get_user_by_email, email=form_data.username)
+    if not user or not await run_in_threadpool(auth.verify_password, form_data.password, user.hashed_password):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect email or password",
@@ -39,13 +40,51 @@ def login(form_data: OAuth2PasswordRequestForm = Depends(), db: Session = Depend
     # Create access token
     access_token_expires = timedelta(minutes=settings.access_token_expire_minutes)
     access_token = auth.create_access_token(
-        data={"sub": user.email}, expires_delta=access_token_expires
+        data=auth.user_token_claims(user), expires_delta=access_token_expires
     )
     
     return {"access_token": access_token, "token_type": "bearer"}
 
 
 @router.get("/me", response_model=schemas.User)
-def read_users_me(current_user: schemas.User = Depends(auth.get_current_active_user)):
+async def read_users_me(
+    current_user: schemas.CurrentUser = Depends(auth.get_current_active_user),
+    db: Database = Depends(get_database)
+):
     """Get current user information"""
-    return current_user
+    user = await db.run(crud.get_user, user_id=current_user.id)
+    if user is None:
+        raise HTTPException(status_code=404, detail="User not found")
+    return user
+
+
+@router.put("/me", response_model=schemas.User)
+async def update_users_me(
+    user_update: schemas.UserUpdate,
+    current_user: schemas.CurrentUser = Depends(auth.get_current_active_user),
+    db: Database = Depends(get_database)
+):
+    """Update current user information (changing the email requires a new login)"""
+    if user_update.email and user_update.email != current_user.email:
+        if await db.run(crud.get_user_by_email, email=user_update.email):
+            raise HTTPException(
+                status_code=400,
+                detail="Email already registered"
+            )
+    
+    user = await db.run(crud.update_user, user_id=current_user.id, user_update=user_update)
+    if user is None:
+        raise HTTPException(status_code=404, detail="User not found")
+    return user
+
+
+@router.delete("/me", response_model=schemas.User)
+async def deactivate_users_me(
+    current_user: schemas.CurrentUser = Depends(auth.get_current_active_user),
+    db: Database = Depends(get_database)
+):
+    """Deactivate the current user's account (existing tokens stop working)"""
+    user = await db.run(crud.deactivate_user, user_id=current_user.id)
+    if user is None:
+        raise HTTPException(status_code=404, detail="User not found")
+    return user
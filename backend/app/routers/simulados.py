@@ -1,23 +1,21 @@
 from typing import List
 from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
-from app.database import get_db
+from app.database import Database, get_database
 from app import crud, schemas, auth
-from app.models import User
 
 router = APIRouter(prefix="/simulados", tags=["simulados"])
 
 
 @router.post("/", response_model=schemas.Simulado)
-def create_simulado(
+async def create_simulado(
     simulado: schemas.SimuladoCreate,
-    current_user: User = Depends(auth.get_current_active_user),
-    db: Session = Depends(get_db)
+    current_user: schemas.CurrentUser = Depends(auth.get_current_active_user),
+    db: Database = Depends(get_database)
 ):
     """Create a new simulado"""
     # Generate questions for the simulado
-    questions = crud.get_questions_for_simulado(
-        db=db,
+    questions = await db.run(
+        crud.get_questions_for_simulado,
         subjects=simulado.config.subjects,
         banca=simulado.config.banca,
         level=simulado.config.level,
@@ -31,46 +29,38 @@ def create_simulado(
         )
     
     # Create simulado
-    db_simulado = crud.create_simulado(db=db, simulado=simulado, user_id=current_user.id)
+    db_simulado = await db.run(crud.create_simulado, simulado=simulado, user_id=current_user.id)
     
     # Add questions to simulado
-    crud.add_questions_to_simulado(db=db, simulado_id=db_simulado.id, questions=questions)
+    await db.run(crud.add_questions_to_simulado, simulado_id=db_simulado.id, questions=questions)
     
     return db_simulado
 
 
 @router.get("/", response_model=List[schemas.Simulado])
-def get_simulados(
+async def get_simulados(
     skip: int = 0,
     limit: int = 100,
-    current_user: User = Depends(auth.get_current_active_user),
-    db: Session = Depends(get_db)
+    current_user: schemas.CurrentUser = Depends(auth.get_current_active_user),
+    db: Database = Depends(get_database)
 ):
     """Get user's simulados"""
-    return crud.get_user_simulados(db=db, user_id=current_user.id, skip=skip, limit=limit)
+    return await db.run(crud.get_user_simulados, user_id=current_user.id, skip=skip, limit=limit)
 
 
 @router.get("/{simulado_id}", response_model=schemas.SimuladoWithQuestions)
-def get_simulado(
+async def get_simulado(
     simulado_id: int,
-    current_user: User = Depends(auth.get_current_active_user),
-    db: Session = Depends(get_db)
+    current_user: schemas.CurrentUser = Depends(auth.get_current_active_user),
+    db: Database = Depends(get_database)
 ):
     """Get simulado with questions"""
-    simulado = crud.get_simulado(db=db, simulado_id=simulado_id, user_id=current_user.id)
+    simulado = await db.run(crud.get_simulado, simulado_id=simulado_id, user_id=current_user.id)
     if not simulado:
         raise HTTPException(status_code=404, detail="Simulado not found")
     
     # Get questions for this simulado
-    simulado_questions = db.query(crud.SimuladoQuestion).filter(
-        crud.SimuladoQuestion.simulado_id == simulado_id
-    ).order_by(crud.SimuladoQuestion.order).all()
-    
-    questions = []
-    for sq in simulado_questions:
-        question = crud.get_question(db=db, question_id=sq.question_id)
-        if question:
-            questions.append(question)
+    questions = await db.run(crud.get_simulado_questions, simulado_id=simulado_id)
     
     # Convert to response model
     simulado_dict = {
@@ -90,13 +80,13 @@ def get_simulado(
 
 
 @router.post("/{simulado_id}/start", response_model=schemas.Simulado)
-def start_simulado(
+async def start_simulado(
     simulado_id: int,
-    current_user: User = Depends(auth.get_current_active_user),
-    db: Session = Depends(get_db)
+    current_user: schemas.CurrentUser = Depends(auth.get_current_active_user),
+    db: Database = Depends(get_database)
 ):
     """Start a simulado"""
-    simulado = crud.start_simulado(db=db, simulado_id=simulado_id, user_id=current_user.id)
+    simulado = await db.run(crud.start_simulado, simulado_id=simulado_id, user_id=current_user.id)
     if not simulado:
         raise HTTPException(status_code=404, detail="Simulado not found")
     
@@ -104,35 +94,35 @@ def start_simulado(
 
 
 @router.post("/{simulado_id}/submit", response_model=schemas.SimuladoResult)
-def submit_simulado(
+async def submit_simulado(
     simulado_id: int,
     result: schemas.SimuladoResultCreate,
-    current_user: User = Depends(auth.get_current_active_user),
-    db: Session = Depends(get_db)
+    current_user: schemas.CurrentUser = Depends(auth.get_current_active_user),
+    db: Database = Depends(get_database)
 ):
     """Submit simulado answers and get results"""
     # Verify simulado belongs to user
-    simulado = crud.get_simulado(db=db, simulado_id=simulado_id, user_id=current_user.id)
+    simulado = await db.run(crud.get_simulado, simulado_id=simulado_id, user_id=current_user.id)
     if not simulado:
         raise HTTPException(status_code=404, detail="Simulado not found")
     
     # Check if already submitted
-    existing_result = crud.get_simulado_result(db=db, simulado_id=simulado_id, user_id=current_user.id)
+    existing_result = await db.run(crud.get_simulado_result, simulado_id=simulado_id, user_id=current_user.id)
     if existing_result:
         raise HTTPException(status_code=400, detail="Simulado already submitted")
     
     # Create result
-    return crud.create_simulado_result(db=db, result=result, user_id=current_user.id)
+    return await db.run(crud.create_simulado_result, result=result, user_id=current_user.id)
 
 
 @router.get("/{simulado_id}/result", response_model=schemas.SimuladoResult)
-def get_simulado_result(
+async def get_simulado_result(
     simulado_id: int,
-    current_user: User = Depends(auth.get_current_active_user),
-    db: Session = Depends(get_db)
+    current_user: schemas.CurrentUser = Depends(auth.get_current_active_user),
+    db: Database = Depends(get_database)
 ):
     """Get simulado result"""
-    result = crud.get_simulado_result(db=db, simulado_id=simulado_id, user_id=current_user.id)
+    result = await db.run(crud.get_simulado_result, simulado_id=simulado_id, user_id=current_user.id)
     if not result:
         raise HTTPException(status_code=404, detail="Result not found")
     
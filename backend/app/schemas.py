@@ -35,6 +35,16 @@ class Token(BaseModel):
 
 class TokenData(BaseModel):
     email: Optional[str] = None
+    user_id: Optional[int] = None
+    is_active: Optional[bool] = None
+    issued_at: Optional[int] = None
+
+
+class CurrentUser(BaseModel):
+    """Authenticated user as seen by the routers (resolved from token claims or cache)"""
+    id: int
+    email: str
+    is_active: bool
 
 
 # Question schemas
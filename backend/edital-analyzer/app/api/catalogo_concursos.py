@@ -0,0 +1,371 @@
+"""
+Catálogo de concursos indexado por id, atualizado em background
+
+As rotas consultam apenas o índice em memória; as fontes externas são
+visitadas em paralelo por uma thread de atualização (com event loop
+próprio) conforme ficam desatualizadas, com GET condicional
+(ETag/Last-Modified) e persistência em banco para sobreviver a reinícios.
+"""
+
+import asyncio
+import logging
+import os
+from datetime import datetime
+from threading import Event, Lock, Thread
+from typing import Dict, List, Optional
+
+from sqlalchemy import JSON, Column, DateTime, Integer, MetaData, String, Table, Text, create_engine, delete, select
+
+logger = logging.getLogger(__name__)
+
+# Configuração do catálogo
+CATALOGO_DATABASE_URL = os.getenv('EDITAL_CATALOG_DATABASE_URL', 'sqlite:///./catalogo_editais.db')
+CATALOGO_TTL_SEGUNDOS = int(os.getenv('EDITAL_CATALOG_TTL_SECONDS', '1800'))
+CATALOGO_INTERVALO_VERIFICACAO = int(os.getenv('EDITAL_CATALOG_CHECK_SECONDS', '60'))
+
+# Filtros respondidos por índice exato; os demais são por substring
+CAMPOS_INDEXADOS = ('status', 'nivel')
+
+metadata = MetaData()
+
+tabela_concursos = Table(
+    'catalogo_concursos', metadata,
+    Column('id', String(255), primary_key=True),
+    Column('fonte_id', String(50), index=True, nullable=False),
+    Column('posicao', Integer, nullable=False),
+    Column('dados', JSON, nullable=False),
+    Column('atualizado_em', DateTime, nullable=False)
+)
+
+tabela_fontes = Table(
+    'catalogo_fontes', metadata,
+    Column('fonte_id', String(50), primary_key=True),
+    Column('etag', String(255)),
+    Column('last_modified', String(255)),
+    Column('ultima_atualizacao', DateTime),
+    Column('ultima_tentativa', DateTime),
+    Column('ultimo_erro', Text),
+    Column('exemplo', Integer, default=0)
+)
+
+class CatalogoConcursos:
+    """
+    Índice de concursos por id, fonte, status e nível com estado de
+    atualização por fonte
+    """
+
+    def __init__(self, fetcher, database_url: Optional[str] = CATALOGO_DATABASE_URL,
+                 ttl_segundos: int = CATALOGO_TTL_SEGUNDOS):
+        self.fetcher = fetcher
+        self.ttl_segundos = ttl_segundos
+        self.engine = create_engine(database_url) if database_url else None
+
+        self._lock = Lock()
+        self._por_id: Dict[str, Dict] = {}
+        self._ids_por_fonte: Dict[str, List[str]] = {}
+        self._indices: Dict[str, Dict[str, set]] = {campo: {} for campo in CAMPOS_INDEXADOS}
+        self._estado_fontes: Dict[str, Dict] = {}
+
+        self._parar = Event()
+        self._acordar = Event()
+        self._thread: Optional[Thread] = None
+        self._carregado = False
+
+    # Ciclo de vida
+    def carregar(self):
+        """
+        Carrega o catálogo persistido; fontes sem dados recebem os concursos de
+        exemplo (marcados como desatualizados) até a primeira atualização real
+        """
+        if self._carregado:
+            return
+
+        if self.engine is not None:
+            try:
+                metadata.create_all(self.engine)
+                self._carregar_persistido()
+            except Exception as e:
+                logger.error(f"Erro ao carregar catálogo persistido: {e}")
+
+        for fonte_id, fonte_info in self.fetcher.fontes_editais.items():
+            if fonte_id not in self._ids_por_fonte:
+                self._substituir_fonte(fonte_id, self.fetcher._get_concursos_exemplo(fonte_id, fonte_info))
+                self._estado_fontes.setdefault(fonte_id, self._estado_inicial(exemplo=True))
+
+        # Manter a ordem das fontes configuradas nas listagens
+        with self._lock:
+            self._ids_por_fonte = {
+                fonte_id: self._ids_por_fonte[fonte_id]
+                for fonte_id in self.fetcher.fontes_editais if fonte_id in self._ids_por_fonte
+            }
+
+        self._carregado = True
+        logger.info(f"Catálogo carregado com {len(self._por_id)} concursos")
+
+    def iniciar(self):
+        """Carrega o catálogo e inicia a thread de atualização"""
+        self.carregar()
+        if self._thread is not None and self._thread.is_alive():
+            return
+
+        self._parar.clear()
+        self._thread = Thread(target=self._executar_atualizacoes, name='catalogo-concursos', daemon=True)
+        self._thread.start()
+        logger.info("Atualização do catálogo de concursos iniciada")
+
+    def parar(self):
+        """Para a thread de atualização"""
+        self._parar.set()
+        self._acordar.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+        logger.info("Atualização do catálogo de concursos parada")
+
+    def solicitar_atualizacao(self, fonte: Optional[str] = None):
+        """Marca fontes como desatualizadas e acorda a thread de atualização"""
+        with self._lock:
+            for fonte_id, estado in self._estado_fontes.items():
+                if fonte is None or fonte_id == fonte:
+                    estado['forcar'] = True
+        self._acordar.set()
+
+    def _executar_atualizacoes(self):
+        # Um único loop para a thread, reaproveitando o pool de conexões entre rodadas
+        loop = asyncio.new_event_loop()
+        try:
+            while not self._parar.is_set():
+                try:
+                    loop.run_until_complete(self.atualizar_fontes_vencidas())
+                except Exception as e:
+                    logger.error(f"Erro na atualização do catálogo: {e}")
+
+                self._acordar.wait(CATALOGO_INTERVALO_VERIFICACAO)
+                self._acordar.clear()
+        finally:
+            loop.run_until_complete(self.fetcher.http.fechar())
+            loop.close()
+
+    # Atualização
+    def fontes_vencidas(self) -> List[str]:
+        """Fontes cuja última atualização (ou tentativa com erro) passou do TTL"""
+        agora = datetime.utcnow()
+        vencidas = []
+        with self._lock:
+            for fonte_id in self.fetcher.fontes_editais:
+                estado = self._estado_fontes.get(fonte_id) or self._estado_inicial()
+                # Tentativas com erro também aguardam o TTL para não martelar a fonte
+                ultima = max(filter(None, (estado.get('ultima_atualizacao'), estado.get('ultima_tentativa'))), default=None)
+                if estado.get('forcar') or ultima is None or (agora - ultima).total_seconds() >= self.ttl_segundos:
+                    vencidas.append(fonte_id)
+        return vencidas
+
+    async def atualizar_fontes_vencidas(self) -> Dict[str, str]:
+        """
+        Atualiza as fontes vencidas em paralelo; o rate limiting por host fica
+        a cargo do cliente HTTP
+        """
+        fontes = self.fontes_vencidas()
+        resultados = await asyncio.gather(*(self.atualizar_fonte(fonte_id) for fonte_id in fontes))
+        return dict(zip(fontes, resultados))
+
+    async def atualizar_fonte(self, fonte_id: str) -> str:
+        """
+        Atualiza uma fonte; retorna 'atualizada', 'nao_modificada' ou 'erro'.
+        Em caso de erro os concursos já catalogados são mantidos.
+        """
+        fonte_info = self.fetcher.fontes_editais[fonte_id]
+        with self._lock:
+            estado = dict(self._estado_fontes.get(fonte_id) or self._estado_inicial())
+        agora = datetime.utcnow()
+        estado['ultima_tentativa'] = agora
+        estado['forcar'] = False
+
+        try:
+            logger.info(f"Atualizando catálogo de {fonte_info['nome']}")
+            # Sem cache condicional enquanto a fonte só tem dados de exemplo
+            resposta = await self.fetcher.buscar_fonte_condicional(
+                fonte_id,
+                etag=None if estado.get('exemplo') else estado.get('etag'),
+                last_modified=None if estado.get('exemplo') else estado.get('last_modified')
+            )
+        except Exception as e:
+            logger.error(f"Erro ao atualizar catálogo de {fonte_info['nome']}: {e}")
+            estado['ultimo_erro'] = str(e)
+            self._registrar_estado(fonte_id, estado)
+            return 'erro'
+
+        estado.update({
+            'etag': resposta['etag'],
+            'last_modified': resposta['last_modified'],
+            'ultima_atualizacao': agora,
+            'ultimo_erro': None
+        })
+
+        if not resposta['modificado']:
+            self._registrar_estado(fonte_id, estado)
+            return 'nao_modificada'
+
+        concursos = resposta['concursos']
+        if not concursos:
+            # Página sem concursos reconhecíveis: manter o que já existe
+            concursos = self.listar(fonte_id) or self.fetcher._get_concursos_exemplo(fonte_id, fonte_info)
+        else:
+            estado['exemplo'] = False
+
+        self._substituir_fonte(fonte_id, concursos)
+        self._registrar_estado(fonte_id, estado, concursos)
+        logger.info(f"Catálogo de {fonte_info['nome']} atualizado com {len(concursos)} concursos")
+        return 'atualizada'
+
+    # Consultas
+    def obter(self, concurso_id: str) -> Optional[Dict]:
+        """Concurso pelo id"""
+        self.carregar()
+        return self._por_id.get(concurso_id)
+
+    def listar(self, fonte: Optional[str] = None) -> List[Dict]:
+        """Concursos de uma fonte (ou de todas), na ordem das fontes"""
+        self.carregar()
+        with self._lock:
+            if fonte:
+                return [self._por_id[i] for i in self._ids_por_fonte.get(fonte, [])]
+            return [self._por_id[i] for ids in self._ids_por_fonte.values() for i in ids]
+
+    def filtrar(self, filtros: Dict, fonte: Optional[str] = None) -> List[Dict]:
+        """
+        Aplica os filtros de filtrar_concursos usando os índices de status/nível
+        antes das comparações por substring
+        """
+        self.carregar()
+        with self._lock:
+            candidatos = None
+            for campo in CAMPOS_INDEXADOS:
+                if filtros.get(campo):
+                    ids = self._indices[campo].get(filtros[campo], set())
+                    candidatos = ids if candidatos is None else candidatos & ids
+
+            fontes = [fonte] if fonte else list(self._ids_por_fonte)
+            concursos = [
+                self._por_id[i]
+                for f in fontes for i in self._ids_por_fonte.get(f, [])
+                if candidatos is None or i in candidatos
+            ]
+
+        filtros_texto = {campo: valor for campo, valor in filtros.items() if campo not in CAMPOS_INDEXADOS}
+        return self.fetcher.filtrar_concursos(concursos, filtros_texto)
+
+    def estado(self) -> Dict:
+        """Estado de atualização de cada fonte"""
+        self.carregar()
+        agora = datetime.utcnow()
+        with self._lock:
+            fontes = {}
+            for fonte_id, estado in self._estado_fontes.items():
+                ultima = estado.get('ultima_atualizacao')
+                fontes[fonte_id] = {
+                    'total_concursos': len(self._ids_por_fonte.get(fonte_id, [])),
+                    'ultima_atualizacao': ultima.isoformat() if ultima else None,
+                    'ultima_tentativa': estado['ultima_tentativa'].isoformat() if estado.get('ultima_tentativa') else None,
+                    'desatualizada': ultima is None or (agora - ultima).total_seconds() >= self.ttl_segundos,
+                    'dados_exemplo': bool(estado.get('exemplo')),
+                    'etag': estado.get('etag'),
+                    'last_modified': estado.get('last_modified'),
+                    'ultimo_erro': estado.get('ultimo_erro')
+                }
+            return {
+                'total_concursos': len(self._por_id),
+                'ttl_segundos': self.ttl_segundos,
+                'atualizacao_ativa': self._thread is not None and self._thread.is_alive(),
+                'fontes': fontes
+            }
+
+    # Índice em memória
+    @staticmethod
+    def _estado_inicial(exemplo: bool = False) -> Dict:
+        return {
+            'etag': None,
+            'last_modified': None,
+            'ultima_atualizacao': None,
+            'ultima_tentativa': None,
+            'ultimo_erro': None,
+            'exemplo': exemplo,
+            'forcar': False
+        }
+
+    def _substituir_fonte(self, fonte_id: str, concursos: List[Dict]):
+        with self._lock:
+            for concurso_id in self._ids_por_fonte.get(fonte_id, []):
+                concurso = self._por_id.pop(concurso_id, None)
+                if concurso is not None:
+                    self._desindexar(concurso_id, concurso)
+
+            ids = []
+            for concurso in concursos:
+                concurso_id = concurso.get('id')
+                if not concurso_id or concurso_id in self._por_id:
+                    continue
+                self._por_id[concurso_id] = concurso
+                self._indexar(concurso_id, concurso)
+                ids.append(concurso_id)
+            self._ids_por_fonte[fonte_id] = ids
+
+    def _indexar(self, concurso_id: str, concurso: Dict):
+        for campo in CAMPOS_INDEXADOS:
+            self._indices[campo].setdefault(concurso.get(campo), set()).add(concurso_id)
+
+    def _desindexar(self, concurso_id: str, concurso: Dict):
+        for campo in CAMPOS_INDEXADOS:
+            self._indices[campo].get(concurso.get(campo), set()).discard(concurso_id)
+
+    # Persistência
+    def _carregar_persistido(self):
+        with self.engine.connect() as conn:
+            for linha in conn.execute(select(tabela_fontes)).mappings():
+                estado = self._estado_inicial(exemplo=bool(linha['exemplo']))
+                estado.update({campo: linha[campo] for campo in ('etag', 'last_modified', 'ultima_atualizacao',
+                                                                  'ultima_tentativa', 'ultimo_erro')})
+                self._estado_fontes[linha['fonte_id']] = estado
+
+            concursos_por_fonte: Dict[str, List[Dict]] = {}
+            consulta = select(tabela_concursos.c.fonte_id, tabela_concursos.c.dados).order_by(
+                tabela_concursos.c.fonte_id, tabela_concursos.c.posicao
+            )
+            for fonte_id, dados in conn.execute(consulta):
+                concursos_por_fonte.setdefault(fonte_id, []).append(dados)
+
+        for fonte_id, concursos in concursos_por_fonte.items():
+            if fonte_id in self.fetcher.fontes_editais and fonte_id in self._estado_fontes:
+                self._substituir_fonte(fonte_id, concursos)
+
+    def _registrar_estado(self, fonte_id: str, estado: Dict, concursos: Optional[List[Dict]] = None):
+        with self._lock:
+            self._estado_fontes[fonte_id] = estado
+
+        if self.engine is None:
+            return
+
+        try:
+            with self.engine.begin() as conn:
+                conn.execute(delete(tabela_fontes).where(tabela_fontes.c.fonte_id == fonte_id))
+                conn.execute(tabela_fontes.insert(), {
+                    'fonte_id': fonte_id,
+                    'etag': estado.get('etag'),
+                    'last_modified': estado.get('last_modified'),
+                    'ultima_atualizacao': estado.get('ultima_atualizacao'),
+                    'ultima_tentativa': estado.get('ultima_tentativa'),
+                    'ultimo_erro': estado.get('ultimo_erro'),
+                    'exemplo': int(bool(estado.get('exemplo')))
+                })
+
+                if concursos is not None:
+                    conn.execute(delete(tabela_concursos).where(tabela_concursos.c.fonte_id == fonte_id))
+                    ids_fonte = self._ids_por_fonte.get(fonte_id, [])
+                    if ids_fonte:
+                        agora = datetime.utcnow()
+                        conn.execute(tabela_concursos.insert(), [
+                            {'id': concurso_id, 'fonte_id': fonte_id, 'posicao': posicao,
+                             'dados': self._por_id[concurso_id], 'atualizado_em': agora}
+                            for posicao, concurso_id in enumerate(ids_fonte)
+                        ])
+        except Exception as e:
+            logger.error(f"Erro ao persistir catálogo da fonte {fonte_id}: {e}")
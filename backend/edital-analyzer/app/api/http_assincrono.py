@@ -0,0 +1,206 @@
+"""
+Camada de busca HTTP assíncrona compartilhada pelas fontes de editais
+
+- Um httpx.AsyncClient por event loop (pool de conexões compartilhado);
+  quem cria o loop fecha o cliente dele com fechar() antes de encerrá-lo
+- Limite de requisições simultâneas e token bucket por host
+- GET condicional (If-None-Match / If-Modified-Since)
+- Modo de fixtures: grava respostas em disco ou as reproduz sem rede
+"""
+
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import time
+import weakref
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, Optional
+from urllib.parse import urlparse
+
+import httpx
+
+logger = logging.getLogger(__name__)
+
+# Configuração da camada HTTP
+HTTP_TIMEOUT = float(os.getenv('EDITAL_HTTP_TIMEOUT', '15'))
+HTTP_MAX_CONEXOES = int(os.getenv('EDITAL_HTTP_MAX_CONNECTIONS', '20'))
+HTTP_MAX_POR_HOST = int(os.getenv('EDITAL_HTTP_MAX_PER_HOST', '2'))
+# Requisições por segundo por host (0.5 = uma a cada 2 s, como o antigo time.sleep(2))
+HTTP_TAXA_POR_HOST = float(os.getenv('EDITAL_HTTP_RATE_PER_HOST', '0.5'))
+HTTP_RAJADA_POR_HOST = int(os.getenv('EDITAL_HTTP_BURST_PER_HOST', '1'))
+
+# Fixtures: '' (rede), 'gravar' (rede + grava respostas) ou 'reproduzir' (somente disco)
+HTTP_FIXTURES_MODO = os.getenv('EDITAL_HTTP_FIXTURES_MODE', '')
+HTTP_FIXTURES_DIR = os.getenv('EDITAL_HTTP_FIXTURES_DIR', './fixtures_http')
+
+USER_AGENT = 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
+
+@dataclass
+class RespostaHttp:
+    """Resposta desacoplada do cliente (também usada pelas fixtures)"""
+    url: str
+    status_code: int
+    headers: Dict[str, str] = field(default_factory=dict)
+    content: bytes = b''
+
+    def __post_init__(self):
+        # Cabeçalhos sem distinção de maiúsculas, como em requests/httpx
+        self.headers = httpx.Headers(self.headers)
+
+    @property
+    def text(self) -> str:
+        return self.content.decode('utf-8', errors='replace')
+
+    @property
+    def nao_modificada(self) -> bool:
+        return self.status_code == 304
+
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            raise httpx.HTTPStatusError(
+                f"HTTP {self.status_code} em {self.url}",
+                request=httpx.Request('GET', self.url),
+                response=httpx.Response(self.status_code)
+            )
+
+class TokenBucket:
+    """Token bucket assíncrono: `taxa` tokens por segundo, até `capacidade`"""
+
+    def __init__(self, taxa: float, capacidade: int):
+        self.taxa = taxa
+        self.capacidade = max(1, capacidade)
+        self.tokens = float(self.capacidade)
+        self.atualizado_em = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def adquirir(self):
+        if self.taxa <= 0:
+            return
+        async with self._lock:
+            while True:
+                agora = time.monotonic()
+                self.tokens = min(self.capacidade, self.tokens + (agora - self.atualizado_em) * self.taxa)
+                self.atualizado_em = agora
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                await asyncio.sleep((1 - self.tokens) / self.taxa)
+
+class _EstadoLoop:
+    """Pool de conexões, semáforos e buckets de um event loop"""
+
+    def __init__(self):
+        self.cliente: Optional[httpx.AsyncClient] = None
+        self.semaforos: Dict[str, asyncio.Semaphore] = {}
+        self.buckets: Dict[str, TokenBucket] = {}
+
+class ClienteHttpAssincrono:
+    """
+    Cliente HTTP assíncrono com limites por host. O pool de conexões pertence
+    ao event loop em que foi criado: cada loop tem o seu, e quem encerra um
+    loop deve chamar fechar() nele antes.
+    """
+
+    def __init__(self, max_por_host: int = HTTP_MAX_POR_HOST, taxa_por_host: float = HTTP_TAXA_POR_HOST,
+                 rajada_por_host: int = HTTP_RAJADA_POR_HOST, modo_fixtures: str = HTTP_FIXTURES_MODO,
+                 diretorio_fixtures: str = HTTP_FIXTURES_DIR):
+        self.max_por_host = max_por_host
+        self.taxa_por_host = taxa_por_host
+        self.rajada_por_host = rajada_por_host
+        self.modo_fixtures = modo_fixtures
+        self.diretorio_fixtures = Path(diretorio_fixtures)
+
+        # Estado por loop; a entrada some quando o loop é coletado
+        self._estados: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, _EstadoLoop]" = weakref.WeakKeyDictionary()
+
+    def _estado_loop(self) -> _EstadoLoop:
+        loop = asyncio.get_running_loop()
+        estado = self._estados.get(loop)
+        if estado is None:
+            estado = self._estados[loop] = _EstadoLoop()
+        return estado
+
+    def _obter_cliente(self, estado: _EstadoLoop) -> httpx.AsyncClient:
+        if estado.cliente is None or estado.cliente.is_closed:
+            estado.cliente = httpx.AsyncClient(
+                headers={'User-Agent': USER_AGENT},
+                timeout=HTTP_TIMEOUT,
+                follow_redirects=True,
+                limits=httpx.Limits(max_connections=HTTP_MAX_CONEXOES,
+                                    max_keepalive_connections=HTTP_MAX_CONEXOES)
+            )
+        return estado.cliente
+
+    def _limites_host(self, estado: _EstadoLoop, host: str):
+        if host not in estado.semaforos:
+            estado.semaforos[host] = asyncio.Semaphore(self.max_por_host)
+            estado.buckets[host] = TokenBucket(self.taxa_por_host, self.rajada_por_host)
+        return estado.semaforos[host], estado.buckets[host]
+
+    async def get(self, url: str, etag: Optional[str] = None,
+                  last_modified: Optional[str] = None) -> RespostaHttp:
+        """GET respeitando os limites do host; aceita validadores para GET condicional"""
+        if self.modo_fixtures == 'reproduzir':
+            return self._ler_fixture(url)
+
+        headers = {}
+        if etag:
+            headers['If-None-Match'] = etag
+        if last_modified:
+            headers['If-Modified-Since'] = last_modified
+
+        estado = self._estado_loop()
+        semaforo, bucket = self._limites_host(estado, urlparse(url).netloc)
+        async with semaforo:
+            await bucket.adquirir()
+            response = await self._obter_cliente(estado).get(url, headers=headers)
+
+        resposta = RespostaHttp(
+            url=url,
+            status_code=response.status_code,
+            headers=response.headers,
+            content=response.content
+        )
+
+        if self.modo_fixtures == 'gravar' and not resposta.nao_modificada:
+            self._gravar_fixture(resposta)
+        return resposta
+
+    async def fechar(self):
+        """Fecha o pool de conexões do loop atual"""
+        estado = self._estados.pop(asyncio.get_running_loop(), None)
+        if estado is not None and estado.cliente is not None:
+            await estado.cliente.aclose()
+
+    # Fixtures
+    def _caminho_fixture(self, url: str) -> Path:
+        return self.diretorio_fixtures / f"{hashlib.sha1(url.encode()).hexdigest()}.json"
+
+    def _gravar_fixture(self, resposta: RespostaHttp):
+        try:
+            self.diretorio_fixtures.mkdir(parents=True, exist_ok=True)
+            dados = {
+                'url': resposta.url,
+                'status_code': resposta.status_code,
+                'headers': {k: v for k, v in resposta.headers.items() if k.lower() in ('content-type', 'etag', 'last-modified')},
+                'conteudo': resposta.text
+            }
+            self._caminho_fixture(resposta.url).write_text(json.dumps(dados, ensure_ascii=False), encoding='utf-8')
+        except Exception as e:
+            logger.error(f"Erro ao gravar fixture de {resposta.url}: {e}")
+
+    def _ler_fixture(self, url: str) -> RespostaHttp:
+        caminho = self._caminho_fixture(url)
+        if not caminho.exists():
+            raise httpx.ConnectError(f"Fixture não encontrada para {url}")
+
+        dados = json.loads(caminho.read_text(encoding='utf-8'))
+        return RespostaHttp(
+            url=url,
+            status_code=dados['status_code'],
+            headers=dados.get('headers', {}),
+            content=dados.get('conteudo', '').encode('utf-8')
+        )
@@ -5,7 +5,7 @@ from typing import Dict, Any
 import logging
 from app.ai.edital_analyzer_simples import EditalAnalyzerSimples
 from app.ai.edital_analyzer_real import EditalAnalyzerReal
-from .routes_editais import router as editais_router
+from .routes_editais import router as editais_router, catalogo_concursos
 
 # Configurar logging
 logging.basicConfig(level=logging.INFO)
@@ -30,6 +30,15 @@ app.add_middleware(
 # Incluir rotas de editais
 app.include_router(editais_router)
 
+@app.on_event("startup")
+async def iniciar_catalogo():
+    """Carrega o catálogo de concursos e inicia sua atualização em background"""
+    catalogo_concursos.iniciar()
+
+@app.on_event("shutdown")
+async def parar_catalogo():
+    catalogo_concursos.parar()
+
 # Instanciar analisador real
 analyzer = EditalAnalyzerReal()
 
@@ -3,14 +3,15 @@ Sistema de Busca de Editais Reais de Concursos Públicos
 Busca editais de fontes oficiais e portais especializados
 """
 
-import requests
+import asyncio
 import re
 from typing import List, Dict, Optional
 import logging
 from urllib.parse import urljoin, urlparse
-import time
 from datetime import datetime, timedelta
 
+from .http_assincrono import ClienteHttpAssincrono
+
 # Import opcional do BeautifulSoup
 try:
     from bs4 import BeautifulSoup
@@ -24,10 +25,11 @@ class RealEditalFetcher:
     """Classe para buscar editais reais de concursos públicos"""
     
     def __init__(self):
-        self.session = requests.Session()
-        self.session.headers.update({
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
-        })
+        # Cliente assíncrono com pool compartilhado e rate limiting por host
+        self.http = ClienteHttpAssincrono()
+        
+        # Catálogo indexado (opcional) usado para consultas por id e listagens
+        self.catalogo = None
         
         # Fontes oficiais e portais especializados
         self.fontes_editais = {
@@ -68,57 +70,81 @@ class RealEditalFetcher:
             }
         }
     
-    def get_all_concursos(self) -> List[Dict]:
-        """Retorna todos os concursos disponíveis (buscando dados reais)"""
-        concursos = []
+    def _executar_sincrono(self, nome: str, criar_coroutine):
+        """
+        Executa uma busca assíncrona a partir de código síncrono, em um loop
+        próprio cujo pool de conexões é fechado ao final
+        """
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            pass
+        else:
+            raise RuntimeError(f"{nome}() não pode ser chamado dentro de um event loop; use {nome}_async()")
         
-        # Buscar concursos reais de cada fonte
-        for fonte_id, fonte_info in self.fontes_editais.items():
+        async def _executar():
             try:
-                logger.info(f"Buscando concursos em {fonte_info['nome']}")
-                concursos_fonte = self._buscar_concursos_fonte(fonte_id, fonte_info)
-                concursos.extend(concursos_fonte)
-                time.sleep(2)  # Respeitar rate limiting
-            except Exception as e:
-                logger.error(f"Erro ao buscar concursos de {fonte_info['nome']}: {e}")
-                # Em caso de erro, adicionar dados de exemplo
-                concursos.extend(self._get_concursos_exemplo(fonte_id, fonte_info))
+                return await criar_coroutine()
+            finally:
+                await self.http.fechar()
+        
+        return asyncio.run(_executar())
+    
+    def get_all_concursos(self) -> List[Dict]:
+        """
+        Retorna todos os concursos disponíveis (buscando dados reais).
+        Dentro de um event loop use get_all_concursos_async.
+        """
+        return self._executar_sincrono('get_all_concursos', self.get_all_concursos_async)
+    
+    async def get_all_concursos_async(self) -> List[Dict]:
+        """Busca todas as fontes em paralelo, mantendo a ordem das fontes"""
+        resultados = await asyncio.gather(*(
+            self._buscar_concursos_fonte(fonte_id, fonte_info)
+            for fonte_id, fonte_info in self.fontes_editais.items()
+        ))
         
+        concursos = []
+        for concursos_fonte in resultados:
+            concursos.extend(concursos_fonte)
         return concursos
     
+    def usar_catalogo(self, catalogo):
+        """Passa a responder consultas a partir do catálogo em vez das fontes"""
+        self.catalogo = catalogo
+    
     def buscar_concursos_ativos(self, fonte: Optional[str] = None) -> List[Dict]:
-        """Busca concursos ativos (compatibilidade com interface existente)"""
+        """
+        Busca concursos ativos (compatibilidade com interface existente).
+        Dentro de um event loop use buscar_concursos_ativos_async.
+        """
+        if self.catalogo is not None:
+            return self.catalogo.listar(fonte)
+        return self._executar_sincrono('buscar_concursos_ativos', lambda: self.buscar_concursos_ativos_async(fonte))
+    
+    async def buscar_concursos_ativos_async(self, fonte: Optional[str] = None) -> List[Dict]:
+        """Busca concursos ativos no catálogo ou, sem ele, nas fontes"""
+        if self.catalogo is not None:
+            return self.catalogo.listar(fonte)
+        
         if fonte:
             # Buscar apenas de uma fonte específica
-            if fonte in self.fontes_editais:
-                fonte_info = self.fontes_editais[fonte]
-                try:
-                    logger.info(f"Buscando concursos em {fonte_info['nome']}")
-                    return self._buscar_concursos_fonte(fonte, fonte_info)
-                except Exception as e:
-                    logger.error(f"Erro ao buscar concursos de {fonte_info['nome']}: {e}")
-                    return self._get_concursos_exemplo(fonte, fonte_info)
-            else:
+            if fonte not in self.fontes_editais:
                 return []
-        else:
-            # Buscar de todas as fontes
-            return self.get_all_concursos()
+            return await self._buscar_concursos_fonte(fonte, self.fontes_editais[fonte])
+        
+        # Buscar de todas as fontes
+        return await self.get_all_concursos_async()
     
-    def _buscar_concursos_fonte(self, fonte_id: str, fonte_info: Dict) -> List[Dict]:
+    async def _buscar_concursos_fonte(self, fonte_id: str, fonte_info: Dict) -> List[Dict]:
         """Busca concursos reais de uma fonte específica"""
         concursos = []
         
         try:
-            # Fazer requisição para a fonte
-            response = self.session.get(fonte_info['url'], timeout=15)
+            logger.info(f"Buscando concursos em {fonte_info['nome']}")
+            response = await self.http.get(fonte_info['url'])
             response.raise_for_status()
-            
-            if BEAUTIFULSOUP_AVAILABLE:
-                soup = BeautifulSoup(response.content, 'html.parser')
-                concursos = self._extrair_concursos_html(soup, fonte_info)
-            else:
-                # Fallback: usar regex para extrair informações básicas
-                concursos = self._extrair_concursos_regex(response.text, fonte_info)
+            concursos = self._extrair_concursos_resposta(response, fonte_info)
                 
         except Exception as e:
             logger.error(f"Erro ao buscar concursos de {fonte_info['nome']}: {e}")
@@ -127,6 +153,33 @@ class RealEditalFetcher:
         
         return concursos
     
+    async def buscar_fonte_condicional(self, fonte_id: str, etag: Optional[str] = None,
+                                       last_modified: Optional[str] = None) -> Dict:
+        """
+        Busca uma fonte com GET condicional (If-None-Match / If-Modified-Since).
+        Erros de rede são propagados para o chamador decidir o fallback.
+        """
+        fonte_info = self.fontes_editais[fonte_id]
+        response = await self.http.get(fonte_info['url'], etag=etag, last_modified=last_modified)
+        if response.nao_modificada:
+            return {'modificado': False, 'concursos': [], 'etag': etag, 'last_modified': last_modified}
+        
+        response.raise_for_status()
+        return {
+            'modificado': True,
+            'concursos': self._extrair_concursos_resposta(response, fonte_info),
+            'etag': response.headers.get('ETag'),
+            'last_modified': response.headers.get('Last-Modified')
+        }
+    
+    def _extrair_concursos_resposta(self, response, fonte_info: Dict) -> List[Dict]:
+        """Extrai concursos do HTML de uma resposta da fonte"""
+        if BEAUTIFULSOUP_AVAILABLE:
+            soup = BeautifulSoup(response.content, 'html.parser')
+            return self._extrair_concursos_html(soup, fonte_info)
+        # Fallback: usar regex para extrair informações básicas
+        return self._extrair_concursos_regex(response.text, fonte_info)
+    
     def _extrair_concursos_html(self, soup: BeautifulSoup, fonte_info: Dict) -> List[Dict]:
         """Extrai concursos do HTML usando BeautifulSoup"""
         concursos = []
@@ -350,8 +403,20 @@ Este edital foi extraído automaticamente de fontes oficiais.
         return concursos_filtrados
     
     def buscar_edital_por_id(self, concurso_id: str) -> Optional[Dict]:
-        """Busca um edital específico pelo ID"""
-        concursos = self.get_all_concursos()
+        """
+        Busca um edital específico pelo ID.
+        Dentro de um event loop use buscar_edital_por_id_async.
+        """
+        if self.catalogo is not None:
+            return self.catalogo.obter(concurso_id)
+        return self._executar_sincrono('buscar_edital_por_id', lambda: self.buscar_edital_por_id_async(concurso_id))
+    
+    async def buscar_edital_por_id_async(self, concurso_id: str) -> Optional[Dict]:
+        """Busca um edital específico pelo ID no catálogo ou, sem ele, nas fontes"""
+        if self.catalogo is not None:
+            return self.catalogo.obter(concurso_id)
+        
+        concursos = await self.get_all_concursos_async()
         for concurso in concursos:
             if concurso.get('id') == concurso_id:
                 return concurso
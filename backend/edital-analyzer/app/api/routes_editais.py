@@ -9,6 +9,7 @@ import logging
 
 from .edital_fetcher import EditalFetcher
 from .real_edital_fetcher import RealEditalFetcher
+from .catalogo_concursos import CatalogoConcursos
 
 logger = logging.getLogger(__name__)
 
@@ -17,6 +18,10 @@ router = APIRouter(prefix="/editais", tags=["editais"])
 # Instância global do fetcher (usando fetcher real)
 edital_fetcher = RealEditalFetcher()
 
+# Catálogo indexado atualizado em background; as consultas não tocam as fontes
+catalogo_concursos = CatalogoConcursos(edital_fetcher)
+edital_fetcher.usar_catalogo(catalogo_concursos)
+
 class FiltroConcursos(BaseModel):
     """Modelo para filtros de concursos"""
     banca: Optional[str] = None
@@ -70,10 +75,7 @@ async def listar_concursos(
     try:
         logger.info(f"Listando concursos - fonte: {fonte}, filtros: banca={banca}, orgao={orgao}, nivel={nivel}, status={status}")
         
-        # Buscar concursos
-        concursos = edital_fetcher.buscar_concursos_ativos(fonte)
-        
-        # Aplicar filtros
+        # Aplicar filtros sobre o catálogo indexado
         filtros = {
             'banca': banca,
             'orgao': orgao,
@@ -81,7 +83,7 @@ async def listar_concursos(
             'status': status
         }
         
-        concursos_filtrados = edital_fetcher.filtrar_concursos(concursos, filtros)
+        concursos_filtrados = catalogo_concursos.filtrar(filtros, fonte=fonte)
         
         logger.info(f"Encontrados {len(concursos_filtrados)} concursos")
         
@@ -99,7 +101,7 @@ async def obter_concurso(concurso_id: str):
     try:
         logger.info(f"Buscando concurso: {concurso_id}")
         
-        concurso = edital_fetcher.buscar_edital_por_id(concurso_id)
+        concurso = await edital_fetcher.buscar_edital_por_id_async(concurso_id)
         
         if not concurso:
             raise HTTPException(status_code=404, detail="Concurso não encontrado")
@@ -123,7 +125,7 @@ async def obter_conteudo_edital(concurso_id: str):
         logger.info(f"Buscando conteúdo do edital: {concurso_id}")
         
         # Buscar informações do concurso
-        concurso = edital_fetcher.buscar_edital_por_id(concurso_id)
+        concurso = await edital_fetcher.buscar_edital_por_id_async(concurso_id)
         
         if not concurso:
             raise HTTPException(status_code=404, detail="Concurso não encontrado")
@@ -178,6 +180,31 @@ async def listar_fontes():
         logger.error(f"Erro ao listar fontes: {e}")
         raise HTTPException(status_code=500, detail=f"Erro interno: {str(e)}")
 
+@router.get("/catalogo/status")
+async def obter_status_catalogo():
+    """
+    Estado de atualização do catálogo por fonte
+    """
+    try:
+        return catalogo_concursos.estado()
+        
+    except Exception as e:
+        logger.error(f"Erro ao obter status do catálogo: {e}")
+        raise HTTPException(status_code=500, detail=f"Erro interno: {str(e)}")
+
+@router.post("/catalogo/atualizar")
+async def solicitar_atualizacao_catalogo(
+    fonte: Optional[str] = Query(None, description="Fonte específica a atualizar")
+):
+    """
+    Agenda a atualização imediata do catálogo em background
+    """
+    if fonte and fonte not in edital_fetcher.fontes_editais:
+        raise HTTPException(status_code=404, detail="Fonte não encontrada")
+    
+    catalogo_concursos.solicitar_atualizacao(fonte)
+    return {"status": "agendada", "fonte": fonte}
+
 @router.get("/concursos/{concurso_id}/analisar")
 async def analisar_edital_concurso(concurso_id: str):
     """
@@ -187,7 +214,7 @@ async def analisar_edital_concurso(concurso_id: str):
         logger.info(f"Iniciando análise automática do concurso: {concurso_id}")
         
         # Buscar informações do concurso
-        concurso = edital_fetcher.buscar_edital_por_id(concurso_id)
+        concurso = await edital_fetcher.buscar_edital_por_id_async(concurso_id)
         
         if not concurso:
             raise HTTPException(status_code=404, detail="Concurso não encontrado")
@@ -231,7 +258,7 @@ async def obter_estatisticas():
     try:
         logger.info("Gerando estatísticas dos concursos")
         
-        concursos = edital_fetcher.buscar_concursos_ativos()
+        concursos = await edital_fetcher.buscar_concursos_ativos_async()
         
         # Estatísticas por banca
         bancas = {}
@@ -0,0 +1,32 @@
+"""
+Conexão com o banco compartilhado pelos serviços
+
+Usa DATABASE_URL (PostgreSQL em produção, ex.: postgresql://user:password@db:5432/concurso_ai);
+sem ela, o SQLite local do backend. Os upserts em lote do crawler suportam os dois.
+"""
+
+import os
+
+from sqlalchemy import create_engine
+from sqlalchemy.engine import make_url
+from sqlalchemy.orm import sessionmaker
+
+DATABASE_URL = os.getenv('DATABASE_URL', 'sqlite:///./concurso_ai.db')
+
+def _opcoes_engine(url: str) -> dict:
+    if make_url(url).get_backend_name() == 'sqlite':
+        # Scrapers e orquestrador usam a sessão a partir de threads diferentes
+        return {'connect_args': {'check_same_thread': False}}
+    return {'pool_pre_ping': True}
+
+engine = create_engine(DATABASE_URL, **_opcoes_engine(DATABASE_URL))
+
+SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+def get_db():
+    """Sessão do banco (gerador, no formato de dependência do FastAPI)"""
+    db = SessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Text, DateTime, Boolean, JSON, ForeignKey
+from sqlalchemy import Column, Integer, String, Text, DateTime, Boolean, JSON, ForeignKey, Index
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import relationship
 from datetime import datetime
@@ -29,6 +29,11 @@ class Concurso(Base):
     # Relacionamentos
     editais = relationship("Edital", back_populates="concurso")
     cargos = relationship("Cargo", back_populates="concurso")
+    
+    # Chave de deduplicação usada pelo upsert em lote do crawler
+    __table_args__ = (
+        Index("ux_concursos_url_edital", "url_edital", unique=True),
+    )
 
 class Edital(Base):
     __tablename__ = "editais"
@@ -127,3 +132,19 @@ class ConfiguracaoScraping(Base):
     proxima_busca = Column(DateTime)
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+class FingerprintPagina(Base):
+    __tablename__ = "fingerprints_paginas"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    url = Column(Text, nullable=False)
+    tipo = Column(String(20), nullable=False, default="pagina")  # pagina (listagem) ou item (concurso)
+    hash_conteudo = Column(String(64))
+    etag = Column(String(255))
+    last_modified = Column(String(255))
+    ultima_verificacao = Column(DateTime, default=datetime.utcnow)
+    ultima_mudanca = Column(DateTime, default=datetime.utcnow)
+    
+    __table_args__ = (
+        Index("ux_fingerprints_paginas_url_tipo", "url", "tipo", unique=True),
+    )
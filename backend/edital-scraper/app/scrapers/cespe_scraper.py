@@ -1,17 +1,18 @@
 import requests
 from bs4 import BeautifulSoup
-from selenium import webdriver
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
-from selenium.webdriver.chrome.options import Options
 from typing import List, Dict, Optional
+from urllib.parse import urljoin
 import time
 import logging
 from datetime import datetime
 import hashlib
 import json
 
+from .pool_navegadores import pool_navegadores, buscar_html_estatico
+
 logger = logging.getLogger(__name__)
 
 class CESPEscraper:
@@ -25,59 +26,88 @@ class CESPEscraper:
         self.headers = {
             'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
         }
-        
-    def setup_driver(self) -> webdriver.Chrome:
-        """Configura o driver do Selenium"""
-        chrome_options = Options()
-        chrome_options.add_argument('--headless')
-        chrome_options.add_argument('--no-sandbox')
-        chrome_options.add_argument('--disable-dev-shm-usage')
-        chrome_options.add_argument('--disable-gpu')
-        chrome_options.add_argument('--window-size=1920,1080')
-        
-        try:
-            driver = webdriver.Chrome(options=chrome_options)
-            return driver
-        except Exception as e:
-            logger.error(f"Erro ao configurar driver: {e}")
-            raise
+        self.session = requests.Session()
+        self.session.headers.update(self.headers)
     
     def buscar_concursos_ativos(self) -> List[Dict]:
         """
         Busca todos os concursos ativos do CESPE
         """
+        # Caminho rápido: HTML estático já contém a listagem
+        soup = buscar_html_estatico(self.search_url, ".concurso-item", self.session)
+        if soup is not None:
+            return self._extrair_concursos_soup(soup)
+        
+        return self._buscar_com_selenium()
+    
+    def _extrair_concursos_soup(self, soup) -> List[Dict]:
+        """Extrai os concursos de uma listagem estática"""
+        concursos = []
+        for element in soup.select(".concurso-item"):
+            concurso_data = self._extrair_dados_concurso_bs4(element)
+            if concurso_data:
+                concursos.append(concurso_data)
+        return concursos
+    
+    def _buscar_com_selenium(self) -> List[Dict]:
+        """Busca concursos com um navegador do pool (listagem renderizada por JavaScript)"""
         concursos = []
         
         try:
-            driver = self.setup_driver()
-            driver.get(self.search_url)
-            
-            # Aguardar carregamento da página
-            WebDriverWait(driver, 10).until(
-                EC.presence_of_element_located((By.CLASS_NAME, "concurso-item"))
-            )
-            
-            # Buscar elementos dos concursos
-            concurso_elements = driver.find_elements(By.CLASS_NAME, "concurso-item")
-            
-            for element in concurso_elements:
-                try:
-                    concurso_data = self._extrair_dados_concurso(element)
-                    if concurso_data:
-                        concursos.append(concurso_data)
-                except Exception as e:
-                    logger.error(f"Erro ao extrair dados do concurso: {e}")
-                    continue
-            
-            driver.quit()
+            with pool_navegadores.navegador() as driver:
+                driver.get(self.search_url)
+                
+                # Aguardar carregamento da página
+                WebDriverWait(driver, 10).until(
+                    EC.presence_of_element_located((By.CLASS_NAME, "concurso-item"))
+                )
+                
+                # Buscar elementos dos concursos
+                concurso_elements = driver.find_elements(By.CLASS_NAME, "concurso-item")
+                
+                for element in concurso_elements:
+                    try:
+                        concurso_data = self._extrair_dados_concurso(element)
+                        if concurso_data:
+                            concursos.append(concurso_data)
+                    except Exception as e:
+                        logger.error(f"Erro ao extrair dados do concurso: {e}")
+                        continue
             
         except Exception as e:
             logger.error(f"Erro ao buscar concursos do CESPE: {e}")
-            if 'driver' in locals():
-                driver.quit()
         
         return concursos
     
+    def _extrair_dados_concurso_bs4(self, element) -> Optional[Dict]:
+        """Extrai dados de um elemento de concurso usando BeautifulSoup"""
+        try:
+            titulo = element.select_one(".concurso-titulo").get_text(strip=True)
+            link = urljoin(self.search_url, element.select_one("a").get("href"))
+            status = element.select_one(".concurso-status").get_text(strip=True)
+            data_texto = element.select_one(".concurso-data").get_text(strip=True)
+            
+            info_dict = {}
+            for info in element.select(".concurso-info span"):
+                texto = info.get_text(strip=True)
+                if ":" in texto:
+                    chave, valor = texto.split(":", 1)
+                    info_dict[chave.strip()] = valor.strip()
+            
+            return {
+                "titulo": titulo,
+                "link": link,
+                "status": status,
+                "data_publicacao": data_texto,
+                "informacoes": info_dict,
+                "fonte": "CESPE",
+                "data_coleta": datetime.now().isoformat()
+            }
+            
+        except Exception as e:
+            logger.error(f"Erro ao extrair dados do concurso: {e}")
+            return None
+    
     def _extrair_dados_concurso(self, element) -> Optional[Dict]:
         """Extrai dados de um elemento de concurso"""
         try:
@@ -126,32 +156,37 @@ class CESPEscraper:
         Busca o edital completo de um concurso específico
         """
         try:
-            driver = self.setup_driver()
-            driver.get(url_concurso)
-            
-            # Aguardar carregamento
-            WebDriverWait(driver, 10).until(
-                EC.presence_of_element_located((By.TAG_NAME, "body"))
-            )
+            # Caminho rápido: página estática com título e link do edital
+            soup = buscar_html_estatico(url_concurso, "h1, .titulo-concurso", self.session)
+            edital_link = None
+            if soup is not None:
+                concurso_info = self._extrair_info_concurso_bs4(soup)
+                edital_link = self._buscar_link_edital_bs4(soup, url_concurso)
             
-            # Extrair informações do concurso
-            concurso_info = self._extrair_info_concurso(driver)
-            
-            # Buscar link do edital
-            edital_link = self._buscar_link_edital(driver)
+            if soup is None or not edital_link:
+                with pool_navegadores.navegador() as driver:
+                    driver.get(url_concurso)
+                    
+                    # Aguardar carregamento
+                    WebDriverWait(driver, 10).until(
+                        EC.presence_of_element_located((By.TAG_NAME, "body"))
+                    )
+                    
+                    # Extrair informações do concurso
+                    concurso_info = self._extrair_info_concurso(driver)
+                    
+                    # Buscar link do edital
+                    edital_link = self._buscar_link_edital(driver)
             
             if edital_link:
                 # Baixar e processar o edital
                 edital_data = self._processar_edital_pdf(edital_link)
                 concurso_info.update(edital_data)
             
-            driver.quit()
             return concurso_info
             
         except Exception as e:
             logger.error(f"Erro ao buscar edital completo: {e}")
-            if 'driver' in locals():
-                driver.quit()
             return None
     
     def _extrair_info_concurso(self, driver) -> Dict:
@@ -186,6 +221,49 @@ class CESPEscraper:
         
         return info
     
+    def _extrair_info_concurso_bs4(self, soup) -> Dict:
+        """Extrai informações detalhadas do concurso usando BeautifulSoup"""
+        info = {}
+        
+        try:
+            titulo_element = soup.select_one("h1, .titulo-concurso")
+            if titulo_element:
+                info["titulo"] = titulo_element.get_text(strip=True)
+            
+            for element in soup.select(".info-concurso, .dados-concurso"):
+                texto = element.get_text(strip=True)
+                if ":" in texto:
+                    chave, valor = texto.split(":", 1)
+                    info[chave.strip().lower().replace(" ", "_")] = valor.strip()
+            
+            for element in soup.select(".status, .datas"):
+                texto = element.get_text(strip=True)
+                if "inscrições" in texto.lower():
+                    info["periodo_inscricoes"] = texto
+                elif "prova" in texto.lower():
+                    info["data_prova"] = texto
+            
+        except Exception as e:
+            logger.error(f"Erro ao extrair informações do concurso: {e}")
+        
+        return info
+    
+    def _buscar_link_edital_bs4(self, soup, url_pagina: str) -> Optional[str]:
+        """Busca o link para download do edital usando BeautifulSoup"""
+        try:
+            for link in soup.select("a[href*='edital'], a[href*='pdf']"):
+                href = urljoin(url_pagina, link.get("href"))
+                texto = link.get_text().lower()
+                
+                if "edital" in texto or "pdf" in href:
+                    return href
+            
+            return None
+            
+        except Exception as e:
+            logger.error(f"Erro ao buscar link do edital: {e}")
+            return None
+    
     def _buscar_link_edital(self, driver) -> Optional[str]:
         """Busca o link para download do edital"""
         try:
@@ -213,7 +291,7 @@ class CESPEscraper:
             # Em uma implementação real, aqui seria feito o download e processamento do PDF
             # Por enquanto, retornamos informações básicas
             
-            response = requests.head(pdf_url, headers=self.headers)
+            response = self.session.head(pdf_url, timeout=15)
             
             return {
                 "edital_url": pdf_url,
@@ -226,10 +304,21 @@ class CESPEscraper:
             logger.error(f"Erro ao processar edital PDF: {e}")
             return {}
     
-    def verificar_novos_concursos(self, ultima_verificacao: datetime) -> List[Dict]:
+    def verificar_novos_concursos(self, ultima_verificacao: datetime, crawler=None) -> List[Dict]:
         """
-        Verifica se há novos concursos desde a última verificação
+        Verifica se há novos concursos desde a última verificação.
+        Com um CrawlerIncremental, a listagem sem mudança (304 ou mesmo hash)
+        é pulada e os concursos da listagem alterada são devolvidos inteiros;
+        a seleção dos novos/alterados fica com as impressões digitais dos itens.
         """
+        if crawler is not None:
+            pagina = crawler.buscar(self.search_url, ".concurso-item")
+            if pagina is not None and not pagina.modificada:
+                return []
+            if pagina is not None and pagina.soup is not None:
+                return self._extrair_concursos_soup(pagina.soup)
+            return self.buscar_concursos_ativos()
+        
         concursos = self.buscar_concursos_ativos()
         novos_concursos = []
         
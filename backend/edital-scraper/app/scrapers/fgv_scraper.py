@@ -1,10 +1,8 @@
 import requests
 from bs4 import BeautifulSoup
-from selenium import webdriver
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
-from selenium.webdriver.chrome.options import Options
 from typing import List, Dict, Optional
 import time
 import logging
@@ -12,6 +10,8 @@ from datetime import datetime
 import hashlib
 import json
 
+from .pool_navegadores import pool_navegadores
+
 logger = logging.getLogger(__name__)
 
 class FGVScraper:
@@ -25,22 +25,8 @@ class FGVScraper:
         self.headers = {
             'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
         }
-        
-    def setup_driver(self) -> webdriver.Chrome:
-        """Configura o driver do Selenium"""
-        chrome_options = Options()
-        chrome_options.add_argument('--headless')
-        chrome_options.add_argument('--no-sandbox')
-        chrome_options.add_argument('--disable-dev-shm-usage')
-        chrome_options.add_argument('--disable-gpu')
-        chrome_options.add_argument('--window-size=1920,1080')
-        
-        try:
-            driver = webdriver.Chrome(options=chrome_options)
-            return driver
-        except Exception as e:
-            logger.error(f"Erro ao configurar driver: {e}")
-            raise
+        self.session = requests.Session()
+        self.session.headers.update(self.headers)
     
     def buscar_concursos_ativos(self) -> List[Dict]:
         """
@@ -50,26 +36,11 @@ class FGVScraper:
         
         try:
             # Usar requests primeiro para verificar se a página é estática
-            response = requests.get(self.concursos_url, headers=self.headers)
+            response = self.session.get(self.concursos_url, timeout=15)
             response.raise_for_status()
             
             soup = BeautifulSoup(response.content, 'html.parser')
-            
-            # Buscar elementos dos concursos
-            concurso_elements = soup.find_all('div', class_=['concurso-item', 'card-concurso', 'item-concurso'])
-            
-            if not concurso_elements:
-                # Tentar com seletores alternativos
-                concurso_elements = soup.find_all('div', class_=lambda x: x and 'concurso' in x.lower())
-            
-            for element in concurso_elements:
-                try:
-                    concurso_data = self._extrair_dados_concurso_bs4(element)
-                    if concurso_data:
-                        concursos.append(concurso_data)
-                except Exception as e:
-                    logger.error(f"Erro ao extrair dados do concurso: {e}")
-                    continue
+            concursos = self._extrair_concursos_soup(soup)
             
             # Se não encontrou com BeautifulSoup, tentar com Selenium
             if not concursos:
@@ -82,38 +53,56 @@ class FGVScraper:
         
         return concursos
     
+    def _extrair_concursos_soup(self, soup) -> List[Dict]:
+        """Extrai os concursos de uma listagem estática"""
+        concursos = []
+        
+        # Buscar elementos dos concursos
+        concurso_elements = soup.find_all('div', class_=['concurso-item', 'card-concurso', 'item-concurso'])
+        
+        if not concurso_elements:
+            # Tentar com seletores alternativos
+            concurso_elements = soup.find_all('div', class_=lambda x: x and 'concurso' in x.lower())
+        
+        for element in concurso_elements:
+            try:
+                concurso_data = self._extrair_dados_concurso_bs4(element)
+                if concurso_data:
+                    concursos.append(concurso_data)
+            except Exception as e:
+                logger.error(f"Erro ao extrair dados do concurso: {e}")
+                continue
+        
+        return concursos
+    
     def _buscar_com_selenium(self) -> List[Dict]:
-        """Busca concursos usando Selenium como fallback"""
+        """Busca concursos usando um navegador do pool como fallback"""
         concursos = []
         
         try:
-            driver = self.setup_driver()
-            driver.get(self.concursos_url)
-            
-            # Aguardar carregamento da página
-            WebDriverWait(driver, 10).until(
-                EC.presence_of_element_located((By.TAG_NAME, "body"))
-            )
-            
-            # Buscar elementos dos concursos
-            concurso_elements = driver.find_elements(By.CSS_SELECTOR, 
-                ".concurso-item, .card-concurso, .item-concurso, [class*='concurso']")
-            
-            for element in concurso_elements:
-                try:
-                    concurso_data = self._extrair_dados_concurso_selenium(element)
-                    if concurso_data:
-                        concursos.append(concurso_data)
-                except Exception as e:
-                    logger.error(f"Erro ao extrair dados do concurso: {e}")
-                    continue
-            
-            driver.quit()
+            with pool_navegadores.navegador() as driver:
+                driver.get(self.concursos_url)
+                
+                # Aguardar carregamento da página
+                WebDriverWait(driver, 10).until(
+                    EC.presence_of_element_located((By.TAG_NAME, "body"))
+                )
+                
+                # Buscar elementos dos concursos
+                concurso_elements = driver.find_elements(By.CSS_SELECTOR, 
+                    ".concurso-item, .card-concurso, .item-concurso, [class*='concurso']")
+                
+                for element in concurso_elements:
+                    try:
+                        concurso_data = self._extrair_dados_concurso_selenium(element)
+                        if concurso_data:
+                            concursos.append(concurso_data)
+                    except Exception as e:
+                        logger.error(f"Erro ao extrair dados do concurso: {e}")
+                        continue
             
         except Exception as e:
             logger.error(f"Erro ao buscar concursos com Selenium: {e}")
-            if 'driver' in locals():
-                driver.quit()
         
         return concursos
     
@@ -216,7 +205,7 @@ class FGVScraper:
         Busca o edital completo de um concurso específico
         """
         try:
-            response = requests.get(url_concurso, headers=self.headers)
+            response = self.session.get(url_concurso, timeout=15)
             response.raise_for_status()
             
             soup = BeautifulSoup(response.content, 'html.parser')
@@ -293,7 +282,7 @@ class FGVScraper:
         Processa o PDF do edital (simplificado - em produção usar PyPDF2 ou similar)
         """
         try:
-            response = requests.head(pdf_url, headers=self.headers)
+            response = self.session.head(pdf_url, timeout=15)
             
             return {
                 "edital_url": pdf_url,
@@ -306,10 +295,23 @@ class FGVScraper:
             logger.error(f"Erro ao processar edital PDF: {e}")
             return {}
     
-    def verificar_novos_concursos(self, ultima_verificacao: datetime) -> List[Dict]:
+    def verificar_novos_concursos(self, ultima_verificacao: datetime, crawler=None) -> List[Dict]:
         """
-        Verifica se há novos concursos desde a última verificação
+        Verifica se há novos concursos desde a última verificação.
+        Com um CrawlerIncremental, a listagem sem mudança (304 ou mesmo hash)
+        é pulada; a seleção dos novos/alterados fica com as impressões
+        digitais dos itens.
         """
+        if crawler is not None:
+            pagina = crawler.buscar(self.concursos_url, "div.concurso-item, div.card-concurso, div.item-concurso")
+            if pagina is not None and not pagina.modificada:
+                return []
+            if pagina is not None and pagina.soup is not None:
+                concursos = self._extrair_concursos_soup(pagina.soup)
+                if concursos:
+                    return concursos
+            return self.buscar_concursos_ativos()
+        
         concursos = self.buscar_concursos_ativos()
         novos_concursos = []
         
@@ -0,0 +1,197 @@
+"""
+Pool de navegadores headless reutilizáveis para os scrapers
+
+Abrir um Chrome custa segundos; o pool mantém até SCRAPER_MAX_BROWSERS
+instâncias por processo, emprestadas por contexto e recicladas após
+SCRAPER_BROWSER_MAX_PAGES páginas ou quando deixam de responder.
+Páginas estáticas devem passar antes por buscar_html_estatico, que só
+exige o navegador quando o conteúdo depende de JavaScript.
+"""
+
+import atexit
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import List, Optional
+
+import requests
+from bs4 import BeautifulSoup
+from selenium import webdriver
+from selenium.webdriver.chrome.options import Options
+
+logger = logging.getLogger(__name__)
+
+# Configuração do pool
+SCRAPER_MAX_NAVEGADORES = int(os.getenv('SCRAPER_MAX_BROWSERS', '2'))
+SCRAPER_MAX_PAGINAS_NAVEGADOR = int(os.getenv('SCRAPER_BROWSER_MAX_PAGES', '50'))
+SCRAPER_TIMEOUT_EMPRESTIMO = float(os.getenv('SCRAPER_BROWSER_LEASE_TIMEOUT', '120'))
+SCRAPER_TIMEOUT_ESTATICO = float(os.getenv('SCRAPER_STATIC_TIMEOUT', '15'))
+
+USER_AGENT = 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
+
+class NavegadorDoPool:
+    """Navegador emprestado com contagem de páginas servidas"""
+
+    def __init__(self, driver):
+        self.driver = driver
+        self.paginas = 0
+        self.criado_em = time.time()
+
+class DriverContado:
+    """
+    Driver entregue aos scrapers: repassa tudo ao WebDriver e conta cada
+    driver.get, para que a reciclagem ocorra por página e não por empréstimo
+    """
+
+    def __init__(self, item: NavegadorDoPool):
+        self._item = item
+
+    def get(self, url: str):
+        self._item.paginas += 1
+        return self._item.driver.get(url)
+
+    def __getattr__(self, nome):
+        return getattr(self._item.driver, nome)
+
+class PoolNavegadores:
+    """
+    Pool limitado de WebDrivers (empréstimo/devolução, verificação de saúde
+    e reciclagem)
+    """
+
+    def __init__(self, max_navegadores: int = SCRAPER_MAX_NAVEGADORES,
+                 max_paginas: int = SCRAPER_MAX_PAGINAS_NAVEGADOR):
+        self.max_navegadores = max_navegadores
+        self.max_paginas = max_paginas
+        self._vagas = threading.BoundedSemaphore(max_navegadores)
+        self._lock = threading.Lock()
+        self._ociosos: List[NavegadorDoPool] = []
+        self._criados = 0
+        self._reciclados = 0
+
+    @staticmethod
+    def criar_driver() -> webdriver.Chrome:
+        """Configura o driver do Selenium"""
+        chrome_options = Options()
+        chrome_options.add_argument('--headless')
+        chrome_options.add_argument('--no-sandbox')
+        chrome_options.add_argument('--disable-dev-shm-usage')
+        chrome_options.add_argument('--disable-gpu')
+        chrome_options.add_argument('--window-size=1920,1080')
+
+        try:
+            return webdriver.Chrome(options=chrome_options)
+        except Exception as e:
+            logger.error(f"Erro ao configurar driver: {e}")
+            raise
+
+    @contextmanager
+    def navegador(self, timeout: float = SCRAPER_TIMEOUT_EMPRESTIMO):
+        """
+        Empresta um driver do pool:
+
+            with pool_navegadores.navegador() as driver:
+                driver.get(url)
+        """
+        if not self._vagas.acquire(timeout=timeout):
+            raise TimeoutError("Nenhum navegador disponível no pool")
+
+        item = None
+        try:
+            item = self._obter_navegador()
+            yield DriverContado(item)
+        finally:
+            try:
+                if item is not None:
+                    self._devolver(item)
+            finally:
+                self._vagas.release()
+
+    def _obter_navegador(self) -> NavegadorDoPool:
+        while True:
+            with self._lock:
+                item = self._ociosos.pop() if self._ociosos else None
+
+            if item is None:
+                item = NavegadorDoPool(self.criar_driver())
+                with self._lock:
+                    self._criados += 1
+                return item
+
+            if self._saudavel(item):
+                return item
+
+            logger.warning("Navegador do pool sem resposta; descartando")
+            self._encerrar(item)
+
+    def _devolver(self, item: NavegadorDoPool):
+        if item.paginas >= self.max_paginas or not self._saudavel(item):
+            self._encerrar(item)
+            return
+
+        try:
+            # Não vazar sessão/cookies entre scrapers
+            item.driver.delete_all_cookies()
+        except Exception:
+            self._encerrar(item)
+            return
+
+        with self._lock:
+            self._ociosos.append(item)
+
+    @staticmethod
+    def _saudavel(item: NavegadorDoPool) -> bool:
+        try:
+            item.driver.execute_script('return 1')
+            return True
+        except Exception:
+            return False
+
+    def _encerrar(self, item: NavegadorDoPool):
+        with self._lock:
+            self._reciclados += 1
+        try:
+            item.driver.quit()
+        except Exception as e:
+            logger.error(f"Erro ao encerrar navegador: {e}")
+
+    def fechar_todos(self):
+        """Encerra os navegadores ociosos"""
+        with self._lock:
+            ociosos, self._ociosos = self._ociosos, []
+        for item in ociosos:
+            self._encerrar(item)
+
+    def estatisticas(self) -> dict:
+        with self._lock:
+            return {
+                'max_navegadores': self.max_navegadores,
+                'ociosos': len(self._ociosos),
+                'criados': self._criados,
+                'reciclados': self._reciclados
+            }
+
+def buscar_html_estatico(url: str, seletor: str, session: Optional[requests.Session] = None) -> Optional[BeautifulSoup]:
+    """
+    Caminho rápido sem navegador: baixa a página com requests e só a aceita se
+    o seletor CSS já estiver presente no HTML (sem depender de JavaScript)
+    """
+    try:
+        cliente = session or requests
+        response = cliente.get(url, headers={'User-Agent': USER_AGENT}, timeout=SCRAPER_TIMEOUT_ESTATICO)
+        response.raise_for_status()
+
+        soup = BeautifulSoup(response.content, 'html.parser')
+        if soup.select_one(seletor) is not None:
+            return soup
+
+        logger.info(f"Conteúdo de {url} depende de JavaScript; usando navegador")
+    except Exception as e:
+        logger.info(f"Caminho estático indisponível para {url}: {e}")
+    return None
+
+# Pool compartilhado por todos os scrapers do processo
+pool_navegadores = PoolNavegadores()
+atexit.register(pool_navegadores.fechar_todos)
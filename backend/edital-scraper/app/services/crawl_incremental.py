@@ -0,0 +1,303 @@
+"""
+Crawl incremental para a verificação periódica de concursos
+
+- Impressões digitais por URL (hash do conteúdo, ETag, Last-Modified):
+  listagens sem mudança são puladas com GET condicional e itens sem
+  mudança não voltam ao banco
+- Fronteira com prioridade: concursos com inscrições abertas primeiro
+- Upsert em lote dos concursos novos/alterados em uma única instrução
+"""
+
+import hashlib
+import heapq
+import itertools
+import json
+import logging
+import os
+import threading
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import requests
+from bs4 import BeautifulSoup
+from sqlalchemy.dialects import postgresql, sqlite
+
+from ..models.edital import Concurso, FingerprintPagina
+
+logger = logging.getLogger(__name__)
+
+# Configuração do crawl
+CRAWL_TIMEOUT = float(os.getenv('CRAWL_TIMEOUT', '15'))
+CRAWL_MAX_ITENS_POR_CICLO = int(os.getenv('CRAWL_MAX_ITEMS_PER_CYCLE', '500'))
+
+USER_AGENT = 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
+
+TIPO_PAGINA = 'pagina'
+TIPO_ITEM = 'item'
+
+# Campos que mudam a cada coleta e não indicam alteração do concurso
+CAMPOS_VOLATEIS = ('data_coleta',)
+
+def calcular_hash(conteudo) -> str:
+    """SHA-256 de bytes, texto ou dicionário (serializado de forma estável)"""
+    if isinstance(conteudo, dict):
+        conteudo = json.dumps(conteudo, sort_keys=True, ensure_ascii=False, default=str)
+    if isinstance(conteudo, str):
+        conteudo = conteudo.encode('utf-8')
+    return hashlib.sha256(conteudo).hexdigest()
+
+def hash_item(item: Dict) -> str:
+    return calcular_hash({k: v for k, v in item.items() if k not in CAMPOS_VOLATEIS})
+
+def _insert(db, tabela):
+    """INSERT com suporte a ON CONFLICT no dialeto da sessão"""
+    dialeto = db.get_bind().dialect.name
+    if dialeto == 'postgresql':
+        return postgresql.insert(tabela)
+    if dialeto == 'sqlite':
+        return sqlite.insert(tabela)
+    raise ValueError(f"Upsert em lote não suportado para o banco '{dialeto}'")
+
+@dataclass
+class Fingerprint:
+    url: str
+    tipo: str
+    hash_conteudo: Optional[str] = None
+    etag: Optional[str] = None
+    last_modified: Optional[str] = None
+    ultima_verificacao: Optional[datetime] = None
+    ultima_mudanca: Optional[datetime] = None
+
+@dataclass
+class PaginaCrawl:
+    """Resultado de uma busca condicional; `soup` só vem quando a página mudou"""
+    url: str
+    modificada: bool
+    soup: Optional[BeautifulSoup] = None
+
+class ArmazemFingerprints:
+    """
+    Impressões digitais em memória, carregadas do banco em uma consulta por
+    ciclo. Os scrapers registram mudanças de suas threads; o orquestrador
+    grava as pendentes junto com os concursos (mesma transação).
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._fingerprints: Dict[Tuple[str, str], Fingerprint] = {}
+        self._pendentes: Dict[Tuple[str, str], Fingerprint] = {}
+
+    def carregar(self, db):
+        registros = db.query(FingerprintPagina).all()
+        with self._lock:
+            self._pendentes = {}
+            self._fingerprints = {
+                (r.tipo, r.url): Fingerprint(
+                    url=r.url,
+                    tipo=r.tipo,
+                    hash_conteudo=r.hash_conteudo,
+                    etag=r.etag,
+                    last_modified=r.last_modified,
+                    ultima_verificacao=r.ultima_verificacao,
+                    ultima_mudanca=r.ultima_mudanca
+                )
+                for r in registros
+            }
+
+    def obter(self, url: str, tipo: str = TIPO_PAGINA) -> Optional[Fingerprint]:
+        with self._lock:
+            return self._fingerprints.get((tipo, url))
+
+    def registrar(self, url: str, tipo: str, hash_conteudo: str,
+                  etag: Optional[str] = None, last_modified: Optional[str] = None) -> bool:
+        """Registra a versão vista da URL; retorna True se o conteúdo mudou"""
+        agora = datetime.utcnow()
+        with self._lock:
+            anterior = self._fingerprints.get((tipo, url))
+            mudou = anterior is None or anterior.hash_conteudo != hash_conteudo
+            fingerprint = Fingerprint(
+                url=url,
+                tipo=tipo,
+                hash_conteudo=hash_conteudo,
+                etag=etag,
+                last_modified=last_modified,
+                ultima_verificacao=agora,
+                ultima_mudanca=agora if mudou else anterior.ultima_mudanca
+            )
+            self._fingerprints[(tipo, url)] = fingerprint
+            self._pendentes[(tipo, url)] = fingerprint
+        return mudou
+
+    def alterado(self, url: str, tipo: str, hash_conteudo: str) -> bool:
+        anterior = self.obter(url, tipo)
+        return anterior is None or anterior.hash_conteudo != hash_conteudo
+
+    def persistir(self, db, tipos: Iterable[str] = (TIPO_PAGINA, TIPO_ITEM)) -> int:
+        """Upsert das impressões pendentes dos tipos indicados (sem commit)"""
+        tipos = set(tipos)
+        with self._lock:
+            pendentes = [f for chave, f in self._pendentes.items() if chave[0] in tipos]
+            self._pendentes = {chave: f for chave, f in self._pendentes.items() if chave[0] not in tipos}
+
+        if not pendentes:
+            return 0
+
+        stmt = _insert(db, FingerprintPagina.__table__).values([
+            {
+                'url': f.url,
+                'tipo': f.tipo,
+                'hash_conteudo': f.hash_conteudo,
+                'etag': f.etag,
+                'last_modified': f.last_modified,
+                'ultima_verificacao': f.ultima_verificacao,
+                'ultima_mudanca': f.ultima_mudanca
+            }
+            for f in pendentes
+        ])
+        stmt = stmt.on_conflict_do_update(
+            index_elements=['url', 'tipo'],
+            set_={
+                'hash_conteudo': stmt.excluded.hash_conteudo,
+                'etag': stmt.excluded.etag,
+                'last_modified': stmt.excluded.last_modified,
+                'ultima_verificacao': stmt.excluded.ultima_verificacao,
+                'ultima_mudanca': stmt.excluded.ultima_mudanca
+            }
+        )
+        db.execute(stmt)
+        return len(pendentes)
+
+    def descartar_pendentes(self):
+        with self._lock:
+            self._pendentes = {}
+
+class CrawlerIncremental:
+    """Busca condicional de páginas com base nas impressões digitais"""
+
+    def __init__(self, armazem: ArmazemFingerprints, session: Optional[requests.Session] = None):
+        self.armazem = armazem
+        self.session = session or requests.Session()
+        self.session.headers.setdefault('User-Agent', USER_AGENT)
+
+    def buscar(self, url: str, seletor: Optional[str] = None) -> Optional[PaginaCrawl]:
+        """
+        GET condicional da página. Retorna modificada=False para 304 ou
+        conteúdo idêntico; None em caso de erro (o chamador usa o caminho
+        completo). Se `seletor` não estiver no HTML, a página depende de
+        JavaScript e a impressão não é registrada.
+        """
+        try:
+            anterior = self.armazem.obter(url, TIPO_PAGINA)
+            headers = {}
+            if anterior and anterior.etag:
+                headers['If-None-Match'] = anterior.etag
+            if anterior and anterior.last_modified:
+                headers['If-Modified-Since'] = anterior.last_modified
+
+            response = self.session.get(url, headers=headers, timeout=CRAWL_TIMEOUT)
+            if response.status_code == 304 and anterior is not None:
+                self.armazem.registrar(url, TIPO_PAGINA, anterior.hash_conteudo,
+                                       anterior.etag, anterior.last_modified)
+                return PaginaCrawl(url=url, modificada=False)
+            response.raise_for_status()
+
+            soup = BeautifulSoup(response.content, 'html.parser')
+            if seletor and soup.select_one(seletor) is None:
+                logger.info(f"Listagem {url} depende de JavaScript; sem impressão digital")
+                return PaginaCrawl(url=url, modificada=True)
+
+            mudou = self.armazem.registrar(
+                url, TIPO_PAGINA, calcular_hash(response.content),
+                response.headers.get('ETag'), response.headers.get('Last-Modified')
+            )
+            return PaginaCrawl(url=url, modificada=mudou, soup=soup if mudou else None)
+
+        except Exception as e:
+            logger.error(f"Erro na busca incremental de {url}: {e}")
+            return None
+
+    def item_alterado(self, item: Dict) -> bool:
+        return self.armazem.alterado(item.get('link', ''), TIPO_ITEM, hash_item(item))
+
+    def registrar_item(self, item: Dict):
+        self.armazem.registrar(item.get('link', ''), TIPO_ITEM, hash_item(item))
+
+def prioridade_concurso(concurso: Dict) -> int:
+    """Menor valor sai primeiro: inscrições abertas, previstos, demais, encerrados"""
+    status = (concurso.get('status') or '').lower()
+    if 'inscri' in status and 'abert' in status:
+        return 0
+    if any(termo in status for termo in ('previst', 'autoriza', 'em breve')):
+        return 1
+    if any(termo in status for termo in ('encerrad', 'homolog', 'finaliz', 'cancelad')):
+        return 3
+    return 2
+
+class FronteiraCrawl:
+    """
+    Fila de prioridade de concursos a processar, sem duplicatas por URL.
+    Itens que não couberem no ciclo continuam na fila para o próximo.
+    """
+
+    def __init__(self):
+        self._heap: List[Tuple[int, int, str]] = []
+        self._itens: Dict[str, Dict] = {}
+        self._sequencia = itertools.count()
+
+    def adicionar(self, item: Dict, prioridade: Optional[int] = None):
+        url = item.get('link')
+        if not url:
+            return
+        novo = url not in self._itens
+        self._itens[url] = item  # Versão mais recente substitui a anterior
+        if novo:
+            if prioridade is None:
+                prioridade = prioridade_concurso(item)
+            heapq.heappush(self._heap, (prioridade, next(self._sequencia), url))
+
+    def retirar_lote(self, limite: int = CRAWL_MAX_ITENS_POR_CICLO) -> List[Dict]:
+        lote = []
+        while self._heap and len(lote) < limite:
+            _, _, url = heapq.heappop(self._heap)
+            lote.append(self._itens.pop(url))
+        return lote
+
+    def __len__(self) -> int:
+        return len(self._itens)
+
+def _linha_concurso(concurso: Dict, agora: datetime) -> Dict:
+    return {
+        'nome': concurso.get('titulo', ''),
+        'orgao': (concurso.get('informacoes') or {}).get('orgao', ''),
+        'banca_organizadora': concurso.get('fonte', ''),
+        'url_edital': concurso['link'],
+        'status': concurso.get('status') or 'ativo',
+        'created_at': agora,
+        'updated_at': agora
+    }
+
+def upsert_concursos(db, concursos: List[Dict]) -> int:
+    """
+    Insere ou atualiza concursos (chave: url_edital) em uma única instrução,
+    sem consulta prévia por item. Não faz commit.
+    """
+    agora = datetime.utcnow()
+    # ON CONFLICT não aceita a mesma chave duas vezes na instrução: a última versão vence
+    linhas = {c['link']: _linha_concurso(c, agora) for c in concursos if c.get('link')}
+    if not linhas:
+        return 0
+
+    stmt = _insert(db, Concurso.__table__).values(list(linhas.values()))
+    stmt = stmt.on_conflict_do_update(
+        index_elements=['url_edital'],
+        set_={
+            'nome': stmt.excluded.nome,
+            'orgao': stmt.excluded.orgao,
+            'banca_organizadora': stmt.excluded.banca_organizadora,
+            'status': stmt.excluded.status,
+            'updated_at': stmt.excluded.updated_at
+        }
+    )
+    db.execute(stmt)
+    return len(linhas)
@@ -1,8 +1,9 @@
 import asyncio
 import logging
+import os
 from datetime import datetime, timedelta
 from typing import List, Dict, Optional
-from concurrent.futures import ThreadPoolExecutor, as_completed
+from concurrent.futures import ThreadPoolExecutor
 import schedule
 import time
 from threading import Thread
@@ -11,9 +12,15 @@ from ..scrapers.cespe_scraper import CESPEscraper
 from ..scrapers.fgv_scraper import FGVScraper
 from ..models.edital import Concurso, Edital, ScrapingLog, ConfiguracaoScraping
 from ..database import get_db
+from .crawl_incremental import (
+    ArmazemFingerprints, CrawlerIncremental, FronteiraCrawl, TIPO_ITEM, TIPO_PAGINA,
+    CRAWL_MAX_ITENS_POR_CICLO, upsert_concursos
+)
 
 logger = logging.getLogger(__name__)
 
+INTERVALO_VERIFICACAO_MINUTOS = int(os.getenv('SCRAPER_CHECK_INTERVAL_MINUTES', '15'))
+
 class ScrapingOrchestrator:
     """
     Orquestrador que coordena todos os scrapers de editais
@@ -26,9 +33,15 @@ class ScrapingOrchestrator:
             # Adicionar outros scrapers aqui
         }
         self.db = next(get_db())
-        self.executor = ThreadPoolExecutor(max_workers=4)
+        # Scrapers são bloqueantes (Selenium/requests): uma thread por fonte
+        self.executor = ThreadPoolExecutor(max_workers=max(len(self.scrapers), 1))
         self.running = False
         
+        # Crawl incremental da verificação periódica
+        self.fingerprints = ArmazemFingerprints()
+        self.crawler = CrawlerIncremental(self.fingerprints)
+        self.fronteira = FronteiraCrawl()
+        
     def iniciar_scraping_automatico(self):
         """
         Inicia o scraping automático em background
@@ -40,8 +53,8 @@ class ScrapingOrchestrator:
         self.running = True
         
         # Configurar agendamento
-        schedule.every(1).hours.do(self.executar_scraping_completo)
-        schedule.every(30).minutes.do(self.verificar_novos_concursos)
+        schedule.every(1).hours.do(lambda: asyncio.run(self.executar_scraping_completo()))
+        schedule.every(INTERVALO_VERIFICACAO_MINUTOS).minutes.do(lambda: asyncio.run(self.verificar_novos_concursos()))
         
         # Iniciar thread de agendamento
         scheduler_thread = Thread(target=self._executar_scheduler, daemon=True)
@@ -67,20 +80,28 @@ class ScrapingOrchestrator:
         logger.info("Iniciando scraping completo")
         resultados = {}
         
-        # Executar scrapers em paralelo
-        futures = []
-        for nome, scraper in self.scrapers.items():
-            future = self.executor.submit(self._executar_scraper, nome, scraper)
-            futures.append(future)
+        # Executar scrapers em paralelo sem bloquear o event loop;
+        # o tempo total acompanha a fonte mais lenta
+        loop = asyncio.get_running_loop()
+        execucoes = await asyncio.gather(*(
+            loop.run_in_executor(self.executor, self._executar_scraper, nome, scraper)
+            for nome, scraper in self.scrapers.items()
+        ), return_exceptions=True)
         
-        # Coletar resultados
-        for future in as_completed(futures):
-            try:
-                nome, concursos = future.result()
-                resultados[nome] = concursos
-                logger.info(f"Scraper {nome} encontrou {len(concursos)} concursos")
-            except Exception as e:
-                logger.error(f"Erro no scraper: {e}")
+        # Coletar resultados (logs gravados aqui: a sessão do banco não é thread-safe)
+        for execucao in execucoes:
+            if isinstance(execucao, Exception):
+                logger.error(f"Erro no scraper: {execucao}")
+                continue
+            
+            nome, concursos, tempo_execucao, erro = execucao
+            if erro:
+                self._log_scraping(nome, 0, 0, "erro", erro)
+                continue
+            
+            self._log_scraping(nome, len(concursos), tempo_execucao, "sucesso")
+            resultados[nome] = concursos
+            logger.info(f"Scraper {nome} encontrou {len(concursos)} concursos")
         
         # Salvar resultados no banco
         await self._salvar_resultados(resultados)
@@ -90,7 +111,7 @@ class ScrapingOrchestrator:
     
     def _executar_scraper(self, nome: str, scraper) -> tuple:
         """
-        Executa um scraper específico
+        Executa um scraper específico (em thread do executor)
         """
         try:
             inicio = datetime.now()
@@ -98,16 +119,12 @@ class ScrapingOrchestrator:
             # Buscar concursos
             concursos = scraper.buscar_concursos_ativos()
             
-            # Log da execução
             tempo_execucao = (datetime.now() - inicio).total_seconds()
-            self._log_scraping(nome, len(concursos), tempo_execucao, "sucesso")
-            
-            return nome, concursos
+            return nome, concursos, tempo_execucao, None
             
         except Exception as e:
             logger.error(f"Erro no scraper {nome}: {e}")
-            self._log_scraping(nome, 0, 0, "erro", str(e))
-            return nome, []
+            return nome, [], 0, str(e)
     
     def _log_scraping(self, fonte: str, concursos_encontrados: int, 
                      tempo_execucao: float, status: str, erro: str = None):
@@ -132,28 +149,75 @@ class ScrapingOrchestrator:
     
     async def verificar_novos_concursos(self) -> Dict[str, List[Dict]]:
         """
-        Verifica apenas novos concursos desde a última verificação
+        Verifica novos/alterados desde a última verificação (crawl incremental):
+        listagens sem mudança são puladas, itens sem mudança são descartados
+        pelas impressões digitais e o restante entra na fronteira, que é
+        gravada por prioridade com um único upsert por ciclo
         """
         logger.info("Verificando novos concursos")
         novos_concursos = {}
         
-        for nome, scraper in self.scrapers.items():
-            try:
-                # Buscar última verificação
-                ultima_verificacao = self._obter_ultima_verificacao(nome)
-                
-                # Verificar novos concursos
-                novos = scraper.verificar_novos_concursos(ultima_verificacao)
-                
-                if novos:
-                    novos_concursos[nome] = novos
-                    logger.info(f"Encontrados {len(novos)} novos concursos em {nome}")
-                    
-                    # Notificar sobre novos concursos
-                    await self._notificar_novos_concursos(nome, novos)
-                
-            except Exception as e:
-                logger.error(f"Erro ao verificar novos concursos em {nome}: {e}")
+        # Uma consulta por ciclo para as impressões digitais (sessão só na thread do loop)
+        try:
+            self.fingerprints.carregar(self.db)
+        except Exception as e:
+            logger.error(f"Erro ao carregar impressões digitais: {e}")
+            return novos_concursos
+        
+        loop = asyncio.get_running_loop()
+        nomes = list(self.scrapers)
+        verificacoes = await asyncio.gather(*(
+            loop.run_in_executor(
+                self.executor,
+                self.scrapers[nome].verificar_novos_concursos,
+                self._obter_ultima_verificacao(nome),
+                self.crawler
+            )
+            for nome in nomes
+        ), return_exceptions=True)
+        
+        for nome, encontrados in zip(nomes, verificacoes):
+            if isinstance(encontrados, Exception):
+                logger.error(f"Erro ao verificar novos concursos em {nome}: {encontrados}")
+                continue
+            
+            for concurso in encontrados or []:
+                if self.crawler.item_alterado(concurso):
+                    self.fronteira.adicionar(concurso)
+        
+        lote = self.fronteira.retirar_lote(CRAWL_MAX_ITENS_POR_CICLO)
+        try:
+            upsert_concursos(self.db, lote)
+            for concurso in lote:
+                self.crawler.registrar_item(concurso)
+            
+            # Com itens pendentes na fronteira, a listagem é buscada de novo no
+            # próximo ciclo (a fronteira vive só em memória)
+            tipos = (TIPO_PAGINA, TIPO_ITEM) if not len(self.fronteira) else (TIPO_ITEM,)
+            self.fingerprints.persistir(self.db, tipos)
+            self.db.commit()
+            
+        except Exception as e:
+            logger.error(f"Erro ao salvar concursos verificados: {e}")
+            self.db.rollback()
+            self.fingerprints.descartar_pendentes()
+            for concurso in lote:
+                self.fronteira.adicionar(concurso)
+            return novos_concursos
+        
+        self.fingerprints.descartar_pendentes()
+        
+        for concurso in lote:
+            novos_concursos.setdefault(concurso.get('fonte', ''), []).append(concurso)
+        
+        for nome, novos in novos_concursos.items():
+            logger.info(f"Encontrados {len(novos)} concursos novos/alterados em {nome}")
+            
+            # Notificar sobre novos concursos
+            await self._notificar_novos_concursos(nome, novos)
+        
+        if len(self.fronteira):
+            logger.info(f"{len(self.fronteira)} concursos aguardando o próximo ciclo")
         
         return novos_concursos
     
@@ -197,48 +261,27 @@ class ScrapingOrchestrator:
     
     async def _salvar_resultados(self, resultados: Dict[str, List[Dict]]):
         """
-        Salva os resultados do scraping no banco de dados
+        Salva os resultados do scraping no banco de dados (upsert em lote por
+        url_edital, sem consulta por concurso)
         """
         try:
-            for fonte, concursos in resultados.items():
-                for concurso_data in concursos:
-                    await self._salvar_concurso(concurso_data)
+            concursos = [c for lista in resultados.values() for c in lista]
+            total = upsert_concursos(self.db, concursos)
+            
+            # Mantém as impressões dos itens em dia para a verificação incremental
+            self.fingerprints.carregar(self.db)
+            for concurso in concursos:
+                if concurso.get('link'):
+                    self.crawler.registrar_item(concurso)
+            self.fingerprints.persistir(self.db, (TIPO_ITEM,))
             
             self.db.commit()
-            logger.info("Resultados salvos no banco de dados")
+            logger.info(f"Resultados salvos no banco de dados ({total} concursos)")
             
         except Exception as e:
             logger.error(f"Erro ao salvar resultados: {e}")
             self.db.rollback()
-    
-    async def _salvar_concurso(self, concurso_data: Dict):
-        """
-        Salva um concurso no banco de dados
-        """
-        try:
-            # Verificar se o concurso já existe
-            concurso_existente = self.db.query(Concurso).filter(
-                Concurso.url_edital == concurso_data.get('link')
-            ).first()
-            
-            if concurso_existente:
-                # Atualizar dados existentes
-                concurso_existente.updated_at = datetime.now()
-                return
-            
-            # Criar novo concurso
-            concurso = Concurso(
-                nome=concurso_data.get('titulo', ''),
-                orgao=concurso_data.get('informacoes', {}).get('orgao', ''),
-                banca_organizadora=concurso_data.get('fonte', ''),
-                url_edital=concurso_data.get('link', ''),
-                status=concurso_data.get('status', 'ativo')
-            )
-            
-            self.db.add(concurso)
-            
-        except Exception as e:
-            logger.error(f"Erro ao salvar concurso: {e}")
+            self.fingerprints.descartar_pendentes()
     
     def obter_estatisticas_scraping(self) -> Dict:
         """
@@ -3,15 +3,34 @@
 Script para inicializar o banco de dados com dados reais
 """
 
+from sqlalchemy import inspect, text
 from sqlalchemy.orm import Session
 from app.database import engine, SessionLocal
 from app.models import Base, Question
-from app.crud import create_question
+from app.crud import create_question, reshuffle_question_keys
 from app.schemas import QuestionCreate
 import random
+import sys
+
+
+def upgrade_schema():
+    """Add columns and indexes introduced after the tables were first created"""
+    question_columns = {column["name"] for column in inspect(engine).get_columns("questions")}
+    
+    if "random_key" not in question_columns:
+        print("Adding questions.random_key column...")
+        random_expression = "random()" if engine.dialect.name == "postgresql" else "abs(random()) / 9223372036854775807.0"
+        with engine.begin() as connection:
+            connection.execute(text("ALTER TABLE questions ADD COLUMN random_key FLOAT NOT NULL DEFAULT 0"))
+            connection.execute(text(f"UPDATE questions SET random_key = {random_expression}"))
+    
+    for index in Question.__table__.indexes:
+        index.create(bind=engine, checkfirst=True)
+
 
 # Create all tables
 Base.metadata.create_all(bind=engine)
+upgrade_schema()
 
 # Sample questions data
 SAMPLE_QUESTIONS = [
@@ -197,5 +216,21 @@ def init_database():
     finally:
         db.close()
 
+def reshuffle_keys():
+    """Give every question a new random_key (run periodically, e.g. from cron)"""
+    db = SessionLocal()
+    
+    try:
+        updated = reshuffle_question_keys(db)
+        print(f"Reshuffled random keys of {updated} questions.")
+    except Exception as e:
+        print(f"Error reshuffling question keys: {e}")
+        db.rollback()
+    finally:
+        db.close()
+
 if __name__ == "__main__":
-    init_database()
+    if "--reshuffle-keys" in sys.argv[1:]:
+        reshuffle_keys()
+    else:
+        init_database()
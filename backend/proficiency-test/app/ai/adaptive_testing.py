@@ -4,13 +4,158 @@ from typing import List, Dict, Optional, Tuple
 import logging
 from datetime import datetime
 import json
+import hashlib
+import threading
+import time
+import uuid
+from collections import OrderedDict
+import redis
 from sklearn.ensemble import RandomForestClassifier
 from sklearn.model_selection import train_test_split
 from sklearn.metrics import accuracy_score
 import math
+import os
+
+from app.ai.irt import CalibradorIRT, PosteriorHabilidade, informacao_fisher
 
 logger = logging.getLogger(__name__)
 
+# Tamanho do vetor produzido por _extrair_caracteristicas_questao
+NUM_CARACTERISTICAS = 19
+DIFICULDADE_POR_NIVEL = {'facil': 0.2, 'medio': 0.5, 'dificil': 0.8}
+
+# Critério de parada: erro padrão da habilidade estimada
+IRT_SE_THRESHOLD = float(os.getenv('IRT_SE_THRESHOLD', '0.3'))
+
+# Sessões de teste compartilhadas entre workers
+SESSION_REDIS_URL = os.getenv('PROFICIENCY_SESSION_REDIS_URL')
+SESSION_TTL = int(os.getenv('PROFICIENCY_SESSION_TTL', '7200'))
+SESSION_CACHE_MAX_SIZE = int(os.getenv('PROFICIENCY_SESSION_CACHE_MAX_SIZE', '10000'))
+
+# Controle de exposição dos itens: 'nenhum', 'randomesque' ou 'sympson_hetter'
+EXPOSURE_CONTROL = os.getenv('PROFICIENCY_EXPOSURE_CONTROL', 'randomesque')
+EXPOSURE_TOP_K = int(os.getenv('PROFICIENCY_EXPOSURE_TOP_K', '5'))
+EXPOSURE_MAX_RATE = float(os.getenv('PROFICIENCY_EXPOSURE_MAX_RATE', '0.25'))
+EXPOSURE_SYNC_INTERVAL = float(os.getenv('PROFICIENCY_EXPOSURE_SYNC_INTERVAL', '30'))
+CAMPO_TOTAL_SESSOES = '__sessoes__'
+CHAVE_EXPOSICOES = 'proficiency_item_exposure'
+
+# Bancos de questões já processados no processo
+BANK_CACHE_MAX_SIZE = int(os.getenv('PROFICIENCY_BANK_CACHE_MAX_SIZE', '4'))
+
+class BackendMemoria:
+    """
+    Substituto local do Redis (subconjunto get/set/delete/hincrby/hgetall) com LRU e TTL
+    """
+    
+    def __init__(self, max_size: int = SESSION_CACHE_MAX_SIZE):
+        self.max_size = max_size
+        self._dados: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+    
+    def get(self, chave: str):
+        with self._lock:
+            item = self._dados.get(chave)
+            if item is None:
+                return None
+            valor, expira_em = item
+            if expira_em is not None and expira_em <= time.monotonic():
+                del self._dados[chave]
+                return None
+            self._dados.move_to_end(chave)
+            return valor
+    
+    def set(self, chave: str, valor, ex: Optional[int] = None):
+        with self._lock:
+            expira_em = time.monotonic() + ex if ex else None
+            self._dados[chave] = (valor, expira_em)
+            self._dados.move_to_end(chave)
+            while len(self._dados) > self.max_size:
+                self._dados.popitem(last=False)
+    
+    def delete(self, chave: str):
+        with self._lock:
+            self._dados.pop(chave, None)
+    
+    def hincrby(self, chave: str, campo: str, quantidade: int = 1) -> int:
+        with self._lock:
+            hash_, expira_em = self._dados.get(chave, ({}, None))
+            hash_[campo] = hash_.get(campo, 0) + quantidade
+            self._dados[chave] = (hash_, expira_em)
+            return hash_[campo]
+    
+    def hgetall(self, chave: str) -> Dict:
+        with self._lock:
+            hash_, _ = self._dados.get(chave, ({}, None))
+            return dict(hash_)
+
+class SessionStore:
+    """
+    Estado das sessões de teste adaptativo (posteriori da habilidade, questões respondidas)
+    e contadores de exposição dos itens, em Redis quando configurado
+    """
+    
+    def __init__(self, redis_url: Optional[str] = None, ttl: int = SESSION_TTL):
+        self.ttl = ttl
+        self.backend = BackendMemoria()
+        if redis_url:
+            try:
+                self.backend = redis.Redis.from_url(redis_url, decode_responses=True)
+            except Exception as e:
+                logger.warning(f"Store Redis de sessões indisponível, usando memória: {e}")
+    
+    @staticmethod
+    def _chave(session_id: str) -> str:
+        return f"proficiency_session:{session_id}"
+    
+    def obter(self, session_id: str) -> Optional[Dict]:
+        dados = self.backend.get(self._chave(session_id))
+        return json.loads(dados) if dados else None
+    
+    def salvar(self, session_id: str, sessao: Dict):
+        self.backend.set(self._chave(session_id), json.dumps(sessao, default=str), ex=self.ttl)
+    
+    def remover(self, session_id: str):
+        self.backend.delete(self._chave(session_id))
+    
+    def obter_exposicoes(self) -> Dict[str, int]:
+        return {k: int(v) for k, v in self.backend.hgetall(CHAVE_EXPOSICOES).items()}
+    
+    def sincronizar_exposicoes(self, incrementos: Dict[str, int]) -> Dict[str, int]:
+        """
+        Soma os incrementos acumulados aos contadores compartilhados e retorna os totais,
+        em uma única ida ao Redis
+        """
+        if isinstance(self.backend, BackendMemoria):
+            for campo, quantidade in incrementos.items():
+                self.backend.hincrby(CHAVE_EXPOSICOES, campo, quantidade)
+            return self.obter_exposicoes()
+        
+        pipe = self.backend.pipeline(transaction=False)
+        for campo, quantidade in incrementos.items():
+            pipe.hincrby(CHAVE_EXPOSICOES, campo, quantidade)
+        pipe.hgetall(CHAVE_EXPOSICOES)
+        totais = pipe.execute()[-1]
+        return {k: int(v) for k, v in totais.items()}
+
+session_store = SessionStore(redis_url=SESSION_REDIS_URL)
+
+# Estruturas do banco compartilhadas pelas instâncias do motor no processo
+# (carregadas antes do fork dos workers, ficam em memória copy-on-write)
+_bancos_processo: OrderedDict = OrderedDict()
+_bancos_lock = threading.Lock()
+
+# Campos da questão que alimentam ATRIBUTOS_BANCO (qualquer mudança invalida o banco em cache)
+CAMPOS_CHAVE_BANCO = (
+    'id', 'enunciado', 'opcoes', 'gabarito', 'disciplina', 'nivel_dificuldade', 'peso', 'tags',
+    'a', 'b', 'c', 'updated_at'
+)
+
+ATRIBUTOS_BANCO = (
+    'question_bank', '_indice_por_id', '_matriz_caracteristicas', '_pesos', '_tags',
+    '_codigos_disciplina', '_nomes_disciplina', '_codigos_nivel', '_nomes_nivel'
+)
+
 class AdaptiveTestingEngine:
     """
     Motor de teste adaptativo para avaliação de proficiência
@@ -22,15 +167,76 @@ class AdaptiveTestingEngine:
         self.question_bank = []
         self.user_responses = []
         self.difficulty_levels = ['facil', 'medio', 'dificil']
-        self.confidence_threshold = 0.8
+        self.se_threshold = IRT_SE_THRESHOLD
         self.max_questions = 50
         self.min_questions = 10
+        self.session_store = session_store
+        
+        # Controle de exposição e balanceamento de conteúdo
+        self.exposure_control = EXPOSURE_CONTROL
+        self.exposure_top_k = EXPOSURE_TOP_K
+        self.exposure_max_rate = EXPOSURE_MAX_RATE
+        self.metas_disciplina: Dict[str, float] = {}
+        self.metas_tags: Dict[str, float] = {}
+        self._rng = np.random.default_rng()
+        self._exposicoes = np.zeros(0)
+        self._total_sessoes = 0
+        self._exposicoes_sincronizadas_em = 0.0
+        self._exposicoes_pendentes: Dict[str, int] = {}
+        self._mascaras_tags: Dict[str, np.ndarray] = {}
+        
+        # Representação vetorizada do banco (montada em carregar_banco_questoes)
+        self._indice_por_id: Dict = {}
+        self._matriz_caracteristicas = np.zeros((0, NUM_CARACTERISTICAS))
+        self._dificuldades = np.zeros(0)
+        self._pesos = np.zeros(0)
+        self._tags = np.zeros(0, dtype=object)
+        self._codigos_disciplina = np.zeros(0, dtype=int)
+        self._nomes_disciplina = np.zeros(0, dtype=object)
+        self._codigos_nivel = np.zeros(0, dtype=int)
+        self._nomes_nivel = np.zeros(0, dtype=object)
+        
+        # Parâmetros IRT por item (a: discriminação, b: dificuldade, c: acerto casual)
+        self._irt_a = np.zeros(0)
+        self._irt_b = np.zeros(0)
+        self._irt_c = np.zeros(0)
+        self._irt_calibrado = np.zeros(0, dtype=bool)
+        
+    @staticmethod
+    def _chave_banco(questoes: List[Dict], versao_banco: Optional[str]) -> str:
+        """
+        Chave do banco no cache do processo: a versão informada pelo chamador ou,
+        sem ela, o hash de todos os campos de cada questão que entram no banco
+        carregado (CAMPOS_CHAVE_BANCO)
+        """
+        if versao_banco is not None:
+            return f"versao:{versao_banco}"
         
-    def carregar_banco_questoes(self, questoes: List[Dict]):
+        resumo = hashlib.sha1()
+        for questao in questoes:
+            campos = tuple(questao.get(campo) for campo in CAMPOS_CHAVE_BANCO)
+            resumo.update(repr(campos).encode('utf-8'))
+        return resumo.hexdigest()
+    
+    def carregar_banco_questoes(self, questoes: List[Dict], versao_banco: Optional[str] = None):
         """
         Carrega o banco de questões para o teste adaptativo
         """
         try:
+            chave_banco = self._chave_banco(questoes, versao_banco)
+            
+            with _bancos_lock:
+                banco = _bancos_processo.get(chave_banco)
+                if banco is not None:
+                    _bancos_processo.move_to_end(chave_banco)
+            
+            if banco is not None:
+                for atributo in ATRIBUTOS_BANCO:
+                    setattr(self, atributo, banco[atributo])
+                self._inicializar_parametros_itens()
+                logger.info(f"Banco de questões reutilizado do processo: {len(self.question_bank)} questões")
+                return
+            
             self.question_bank = []
             
             for questao in questoes:
@@ -47,11 +253,96 @@ class AdaptiveTestingEngine:
                 }
                 self.question_bank.append(questao_data)
             
+            self._montar_arrays_banco()
+            
+            with _bancos_lock:
+                _bancos_processo[chave_banco] = {atributo: getattr(self, atributo) for atributo in ATRIBUTOS_BANCO}
+                while len(_bancos_processo) > BANK_CACHE_MAX_SIZE:
+                    _bancos_processo.popitem(last=False)
+            
             logger.info(f"Banco de questões carregado: {len(self.question_bank)} questões")
             
         except Exception as e:
             logger.error(f"Erro ao carregar banco de questões: {e}")
     
+    def _montar_arrays_banco(self):
+        """
+        Monta a matriz de características e os vetores por item usados na seleção
+        """
+        self._indice_por_id = {q['id']: i for i, q in enumerate(self.question_bank)}
+        
+        if self.question_bank:
+            self._matriz_caracteristicas = np.array(
+                [q['caracteristicas'] for q in self.question_bank], dtype=float
+            )
+        else:
+            self._matriz_caracteristicas = np.zeros((0, NUM_CARACTERISTICAS))
+        
+        self._pesos = np.array([q['peso'] for q in self.question_bank], dtype=float)
+        self._tags = pd.Series([tuple(q['tags']) for q in self.question_bank], dtype=object).to_numpy()
+        
+        # Colunas categóricas codificadas como inteiros para agregações com bincount
+        codigos, nomes = pd.factorize(pd.Series([q['disciplina'] for q in self.question_bank], dtype=object))
+        self._codigos_disciplina, self._nomes_disciplina = codigos, np.asarray(nomes, dtype=object)
+        codigos, nomes = pd.factorize(pd.Series([q['nivel_dificuldade'] for q in self.question_bank], dtype=object))
+        self._codigos_nivel, self._nomes_nivel = codigos, np.asarray(nomes, dtype=object)
+        
+        self._inicializar_parametros_itens()
+    
+    def _inicializar_parametros_itens(self):
+        """
+        Parâmetros por item próprios desta instância (o restante do banco é compartilhado)
+        """
+        n_itens = len(self.question_bank)
+        self._irt_a = np.ones(n_itens)
+        self._irt_b = np.zeros(n_itens)
+        self._irt_c = np.zeros(n_itens)
+        self._irt_calibrado = np.zeros(n_itens, dtype=bool)
+        self._exposicoes = np.zeros(n_itens)
+        self._exposicoes_sincronizadas_em = 0.0
+        self._mascaras_tags = {}
+        self._calcular_dificuldades_banco()
+    
+    def _calcular_dificuldades_banco(self):
+        """
+        Pré-calcula a dificuldade (0-1) de todos os itens, em lote quando o modelo está treinado
+        """
+        if self.is_trained and len(self.question_bank):
+            self._dificuldades = (self.model.predict(self._matriz_caracteristicas) - 1) / 2
+        else:
+            dificuldade_nivel = np.array(
+                [DIFICULDADE_POR_NIVEL.get(nivel, 0.5) for nivel in self._nomes_nivel], dtype=float
+            )
+            self._dificuldades = dificuldade_nivel[self._codigos_nivel]
+        
+        # Itens sem calibração usam a dificuldade heurística/predita na escala theta
+        nao_calibrados = ~self._irt_calibrado
+        self._irt_b[nao_calibrados] = (self._dificuldades[nao_calibrados] - 0.5) * 4
+    
+    def calibrar_itens(self, dados_respostas: List[Dict], modelo: str = '2PL'):
+        """
+        Calibra os parâmetros IRT (2PL/3PL) dos itens do banco a partir de respostas
+        históricas no formato {usuario_id, questao_id, acertou}
+        """
+        try:
+            if not self.question_bank or not dados_respostas:
+                logger.warning("Nenhum dado disponível para calibração IRT")
+                return
+            
+            ids_itens = [q['id'] for q in self.question_bank]
+            parametros = CalibradorIRT(modelo=modelo).calibrar_registros(dados_respostas, ids_itens)
+            
+            calibrados = parametros['calibrado']
+            self._irt_a[calibrados] = parametros['a'][calibrados]
+            self._irt_b[calibrados] = parametros['b'][calibrados]
+            self._irt_c[calibrados] = parametros['c'][calibrados]
+            self._irt_calibrado |= calibrados
+            
+            logger.info(f"Parâmetros IRT calibrados para {int(calibrados.sum())} questões")
+            
+        except Exception as e:
+            logger.error(f"Erro na calibração IRT: {e}")
+    
     def _extrair_caracteristicas_questao(self, questao: Dict) -> List[float]:
         """
         Extrai características numéricas de uma questão para o modelo
@@ -103,7 +394,7 @@ class AdaptiveTestingEngine:
             
         except Exception as e:
             logger.error(f"Erro ao extrair características da questão: {e}")
-            return [0] * 15  # Retornar vetor de zeros com tamanho padrão
+            return [0] * NUM_CARACTERISTICAS  # Retornar vetor de zeros com tamanho padrão
     
     def treinar_modelo(self, dados_historicos: List[Dict]):
         """
@@ -115,25 +406,22 @@ class AdaptiveTestingEngine:
                 return
             
             # Preparar dados para treinamento
-            X = []  # Características das questões
-            y = []  # Dificuldade real (baseada na taxa de acerto)
+            indices = []
+            taxas_acerto = []
             
             for dado in dados_historicos:
-                questao_id = dado.get('questao_id')
-                taxa_acerto = dado.get('taxa_acerto', 0.5)
-                
                 # Encontrar questão no banco
-                questao = next((q for q in self.question_bank if q['id'] == questao_id), None)
-                if questao:
-                    X.append(questao['caracteristicas'])
-                    
-                    # Converter taxa de acerto em nível de dificuldade
-                    if taxa_acerto >= 0.7:
-                        y.append(1)  # Fácil
-                    elif taxa_acerto >= 0.4:
-                        y.append(2)  # Médio
-                    else:
-                        y.append(3)  # Difícil
+                indice = self._indice_por_id.get(dado.get('questao_id'))
+                if indice is not None:
+                    indices.append(indice)
+                    taxas_acerto.append(dado.get('taxa_acerto', 0.5))
+            
+            # Características das questões
+            X = self._matriz_caracteristicas[indices]
+            
+            # Dificuldade real: fácil (1), médio (2) ou difícil (3) pela taxa de acerto
+            taxas_acerto = np.array(taxas_acerto, dtype=float)
+            y = np.where(taxas_acerto >= 0.7, 1, np.where(taxas_acerto >= 0.4, 2, 3))
             
             if len(X) < 10:
                 logger.warning("Dados insuficientes para treinamento")
@@ -149,6 +437,7 @@ class AdaptiveTestingEngine:
             accuracy = accuracy_score(y_test, y_pred)
             
             self.is_trained = True
+            self._calcular_dificuldades_banco()
             logger.info(f"Modelo treinado com precisão: {accuracy:.3f}")
             
         except Exception as e:
@@ -164,24 +453,27 @@ class AdaptiveTestingEngine:
                 logger.error("Banco de questões não carregado")
                 return None
             
-            # Calcular nível de proficiência atual
-            proficiencia_atual = self._calcular_proficiencia_atual(respostas_usuario)
+            # Estimar habilidade atual (EAP) e seu erro padrão
+            posterior = self._estimar_posterior(respostas_usuario)
             
-            # Calcular confiança na estimativa
-            confianca = self._calcular_confianca(respostas_usuario)
-            
-            # Se confiança é alta e temos questões suficientes, finalizar teste
-            if confianca >= self.confidence_threshold and len(respostas_usuario) >= self.min_questions:
+            # Se a estimativa é precisa e temos questões suficientes, finalizar teste
+            if posterior.erro_padrao() <= self.se_threshold and len(respostas_usuario) >= self.min_questions:
                 return None
             
             # Se atingiu limite máximo, finalizar teste
             if len(respostas_usuario) >= self.max_questions:
                 return None
             
-            # Selecionar questão baseada na proficiência atual
+            # Primeira questão de um teste sem sessão conta como nova sessão
+            if not respostas_usuario:
+                self._registrar_inicio_teste()
+            
+            # Selecionar questão de máxima informação na habilidade estimada
             questao_selecionada = self._selecionar_questao_otima(
-                proficiencia_atual, confianca, questoes_respondidas
+                posterior.eap(), questoes_respondidas
             )
+            if questao_selecionada is not None:
+                self._registrar_exposicao(questao_selecionada['id'])
             
             return questao_selecionada
             
@@ -189,45 +481,160 @@ class AdaptiveTestingEngine:
             logger.error(f"Erro ao selecionar próxima questão: {e}")
             return None
     
+    def iniciar_sessao(self, session_id: Optional[str] = None) -> str:
+        """
+        Cria uma sessão de teste cujo estado fica no session store, acessível por qualquer worker
+        """
+        session_id = session_id or str(uuid.uuid4())
+        self.session_store.salvar(session_id, {
+            'posterior': PosteriorHabilidade().to_dict(),
+            'respondidas': [],
+            'respostas': [],
+            'questao_atual': None,
+            'criada_em': datetime.now().isoformat()
+        })
+        self._registrar_inicio_teste()
+        return session_id
+    
+    def proxima_questao_sessao(self, session_id: str) -> Optional[Dict]:
+        """
+        Seleciona a próxima questão de uma sessão a partir do estado salvo, sem reprocessar as respostas
+        """
+        try:
+            sessao = self.session_store.obter(session_id)
+            if sessao is None:
+                raise ValueError(f"Sessão {session_id} não encontrada")
+            
+            posterior = PosteriorHabilidade.from_dict(sessao['posterior'])
+            total_respostas = len(sessao['respondidas'])
+            
+            if posterior.erro_padrao() <= self.se_threshold and total_respostas >= self.min_questions:
+                return None
+            if total_respostas >= self.max_questions:
+                return None
+            
+            questao = self._selecionar_questao_otima(posterior.eap(), sessao['respondidas'])
+            if questao is None:
+                return None
+            
+            sessao['questao_atual'] = questao['id']
+            self.session_store.salvar(session_id, sessao)
+            self._registrar_exposicao(questao['id'])
+            
+            return questao
+            
+        except ValueError:
+            raise
+        except Exception as e:
+            logger.error(f"Erro ao selecionar próxima questão da sessão {session_id}: {e}")
+            return None
+    
+    def registrar_resposta_sessao(self, session_id: str, questao_id, acertou: bool,
+                                  tempo_resposta: float = 0) -> Dict:
+        """
+        Registra uma resposta na sessão, atualizando a posteriori da habilidade em O(pontos de quadratura)
+        """
+        sessao = self.session_store.obter(session_id)
+        if sessao is None:
+            raise ValueError(f"Sessão {session_id} não encontrada")
+        
+        if questao_id != sessao.get('questao_atual'):
+            raise ValueError(f"Questão {questao_id} não é a questão atual da sessão {session_id}")
+        if questao_id in sessao['respondidas']:
+            raise ValueError(f"Questão {questao_id} já foi respondida na sessão {session_id}")
+        
+        indice = self._indice_por_id.get(questao_id)
+        if indice is None:
+            raise ValueError(f"Questão {questao_id} não está no banco")
+        
+        posterior = PosteriorHabilidade.from_dict(sessao['posterior'])
+        posterior.atualizar(self._irt_a[indice], self._irt_b[indice], self._irt_c[indice], acertou)
+        
+        sessao['posterior'] = posterior.to_dict()
+        sessao['respondidas'].append(questao_id)
+        sessao['respostas'].append({'questao_id': questao_id, 'acertou': acertou, 'tempo_resposta': tempo_resposta})
+        sessao['questao_atual'] = None
+        self.session_store.salvar(session_id, sessao)
+        
+        return {
+            'theta': posterior.eap(),
+            'erro_padrao': posterior.erro_padrao(),
+            'total_respostas': len(sessao['respondidas'])
+        }
+    
+    def gerar_relatorio_sessao(self, session_id: str) -> Dict:
+        """
+        Relatório de proficiência de uma sessão
+        """
+        sessao = self.session_store.obter(session_id)
+        if sessao is None:
+            return {"erro": f"Sessão {session_id} não encontrada"}
+        return self.gerar_relatorio_proficiencia(sessao['respostas'])
+    
+    def _estimar_posterior(self, respostas_usuario: List[Dict]) -> PosteriorHabilidade:
+        """
+        Posteriori da habilidade dadas as respostas do usuário
+        """
+        posterior = PosteriorHabilidade()
+        
+        indices, acertos = self._indexar_respostas(respostas_usuario)
+        posterior.atualizar_lote(self._irt_a[indices], self._irt_b[indices], self._irt_c[indices], acertos)
+        return posterior
+    
+    def _indexar_respostas(self, respostas_usuario: List[Dict]) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Índices no banco e acertos das respostas cujas questões estão no banco
+        """
+        indices, acertos = [], []
+        for resposta in respostas_usuario:
+            indice = self._indice_por_id.get(resposta.get('questao_id'))
+            if indice is not None:
+                indices.append(indice)
+                acertos.append(resposta.get('acertou', False))
+        
+        return np.array(indices, dtype=int), np.array(acertos, dtype=bool)
+    
+    @staticmethod
+    def _agregar_acertos(codigos: np.ndarray, nomes: np.ndarray, acertos: np.ndarray) -> Dict:
+        """
+        Acertos, total e taxa de acerto por categoria, na ordem de primeira ocorrência
+        """
+        if len(codigos) == 0:
+            return {}
+        
+        totais = np.bincount(codigos, minlength=len(nomes))
+        acertos_categoria = np.bincount(codigos, weights=acertos, minlength=len(nomes))
+        _, primeiras = np.unique(codigos, return_index=True)
+        
+        return {
+            nomes[codigo]: {
+                'acertos': int(acertos_categoria[codigo]),
+                'total': int(totais[codigo]),
+                'taxa_acerto': float(acertos_categoria[codigo] / totais[codigo])
+            }
+            for codigo in codigos[np.sort(primeiras)]
+        }
+    
+    @staticmethod
+    def _theta_para_proficiencia(theta: float) -> float:
+        """
+        Converte a habilidade theta (escala N(0, 1)) para a escala 0-1 usada nos relatórios
+        """
+        return 0.5 * (1 + math.erf(theta / math.sqrt(2)))
+    
+    @staticmethod
+    def _confianca_posterior(posterior: PosteriorHabilidade) -> float:
+        """
+        Confiança na estimativa: fidedignidade 1 - SE² (a priori tem variância 1)
+        """
+        return max(0.0, 1 - posterior.erro_padrao() ** 2)
+    
     def _calcular_proficiencia_atual(self, respostas_usuario: List[Dict]) -> float:
         """
-        Calcula o nível de proficiência atual do usuário
+        Calcula o nível de proficiência atual do usuário (EAP convertido para 0-1)
         """
         try:
-            if not respostas_usuario:
-                return 0.5  # Nível médio inicial
-            
-            # Calcular proficiência usando modelo IRT simplificado
-            proficiencia = 0.5  # Valor inicial
-            
-            for resposta in respostas_usuario:
-                questao_id = resposta.get('questao_id')
-                acertou = resposta.get('acertou', False)
-                tempo_resposta = resposta.get('tempo_resposta', 30)
-                
-                # Encontrar questão
-                questao = next((q for q in self.question_bank if q['id'] == questao_id), None)
-                if not questao:
-                    continue
-                
-                # Calcular dificuldade da questão
-                dificuldade = self._calcular_dificuldade_questao(questao)
-                
-                # Atualizar proficiência usando algoritmo adaptativo
-                if acertou:
-                    proficiencia += 0.1 * (1 - proficiencia) * (1 - dificuldade)
-                else:
-                    proficiencia -= 0.1 * proficiencia * dificuldade
-                
-                # Ajustar baseado no tempo de resposta
-                tempo_ideal = 60  # 1 minuto por questão
-                if tempo_resposta < tempo_ideal * 0.5:
-                    proficiencia += 0.05  # Respondeu muito rápido (pode ser fácil)
-                elif tempo_resposta > tempo_ideal * 2:
-                    proficiencia -= 0.05  # Respondeu muito lento
-            
-            # Manter proficiência entre 0 e 1
-            return max(0, min(1, proficiencia))
+            return self._theta_para_proficiencia(self._estimar_posterior(respostas_usuario).eap())
             
         except Exception as e:
             logger.error(f"Erro ao calcular proficiência: {e}")
@@ -238,24 +645,7 @@ class AdaptiveTestingEngine:
         Calcula a confiança na estimativa de proficiência
         """
         try:
-            if len(respostas_usuario) < 3:
-                return 0.0
-            
-            # Calcular variância das respostas recentes
-            respostas_recentes = respostas_usuario[-10:]  # Últimas 10 respostas
-            acertos = [r.get('acertou', False) for r in respostas_recentes]
-            
-            taxa_acerto = sum(acertos) / len(acertos)
-            variância = sum((acerto - taxa_acerto) ** 2 for acerto in acertos) / len(acertos)
-            
-            # Confiança baseada na consistência (baixa variância = alta confiança)
-            confianca = max(0, 1 - variância * 2)
-            
-            # Ajustar baseado no número de respostas
-            fator_amostra = min(1, len(respostas_usuario) / 20)
-            confianca *= fator_amostra
-            
-            return confianca
+            return self._confianca_posterior(self._estimar_posterior(respostas_usuario))
             
         except Exception as e:
             logger.error(f"Erro ao calcular confiança: {e}")
@@ -266,6 +656,11 @@ class AdaptiveTestingEngine:
         Calcula a dificuldade de uma questão
         """
         try:
+            # Valor pré-calculado para itens do banco
+            indice = self._indice_por_id.get(questao.get('id'))
+            if indice is not None and indice < len(self._dificuldades):
+                return float(self._dificuldades[indice])
+            
             if self.is_trained:
                 # Usar modelo treinado
                 caracteristicas = questao.get('caracteristicas', [])
@@ -283,67 +678,158 @@ class AdaptiveTestingEngine:
             logger.error(f"Erro ao calcular dificuldade da questão: {e}")
             return 0.5
     
-    def _selecionar_questao_otima(self, proficiencia: float, confianca: float, 
-                                questoes_respondidas: List[int]) -> Optional[Dict]:
+    def definir_balanceamento(self, metas_disciplina: Optional[Dict[str, float]] = None,
+                              metas_tags: Optional[Dict[str, float]] = None):
+        """
+        Define as proporções mínimas do teste por disciplina e por tag (ex.: {'português': 0.3})
+        """
+        self.metas_disciplina = dict(metas_disciplina or {})
+        self.metas_tags = dict(metas_tags or {})
+    
+    def _selecionar_questao_otima(self, theta: float, questoes_respondidas: List[int]) -> Optional[Dict]:
         """
-        Seleciona a questão ótima baseada na proficiência e confiança
+        Seleciona a questão de máxima informação de Fisher na habilidade estimada,
+        respeitando o balanceamento de conteúdo e o controle de exposição
         """
         try:
-            # Filtrar questões não respondidas
-            questoes_disponiveis = [
-                q for q in self.question_bank 
-                if q['id'] not in questoes_respondidas
-            ]
+            if not self.question_bank:
+                return None
             
-            if not questoes_disponiveis:
+            # Máscara de itens ainda disponíveis
+            disponiveis = np.ones(len(self.question_bank), dtype=bool)
+            indices_respondidos = np.array([
+                self._indice_por_id[questao_id] for questao_id in questoes_respondidas
+                if questao_id in self._indice_por_id
+            ], dtype=int)
+            disponiveis[indices_respondidos] = False
+            
+            if not disponiveis.any():
                 return None
             
-            # Calcular score para cada questão
-            scores = []
-            for questao in questoes_disponiveis:
-                score = self._calcular_score_questao(questao, proficiencia, confianca)
-                scores.append((score, questao))
+            elegiveis = self._aplicar_balanceamento(disponiveis, indices_respondidos)
+            
+            if self.exposure_control == 'sympson_hetter':
+                elegiveis = self._filtrar_exposicao(elegiveis)
             
-            # Ordenar por score e selecionar a melhor
-            scores.sort(key=lambda x: x[0], reverse=True)
+            # Informação ponderada pelo peso da questão
+            scores = informacao_fisher(theta, self._irt_a, self._irt_b, self._irt_c) * self._pesos
+            scores[~elegiveis] = -np.inf
             
-            return scores[0][1]
+            # Randomesque: sorteio entre os k itens mais informativos
+            k = 1 if self.exposure_control == 'nenhum' else min(self.exposure_top_k, int(elegiveis.sum()))
+            if k <= 1:
+                return self.question_bank[int(np.argmax(scores))]
+            
+            melhores = np.argpartition(scores, -k)[-k:]
+            return self.question_bank[int(self._rng.choice(melhores))]
             
         except Exception as e:
             logger.error(f"Erro ao selecionar questão ótima: {e}")
             return None
     
-    def _calcular_score_questao(self, questao: Dict, proficiencia: float, 
-                              confianca: float) -> float:
+    def _aplicar_balanceamento(self, disponiveis: np.ndarray, indices_respondidos: np.ndarray) -> np.ndarray:
+        """
+        Restringe os itens à disciplina/tag mais abaixo da sua meta de proporção no teste
+        """
+        elegiveis = disponiveis
+        proxima_posicao = len(indices_respondidos) + 1
+        
+        if self.metas_disciplina:
+            contagem = np.bincount(
+                self._codigos_disciplina[indices_respondidos], minlength=len(self._nomes_disciplina)
+            )
+            codigo_por_nome = {nome: codigo for codigo, nome in enumerate(self._nomes_disciplina)}
+            deficits = [
+                (meta * proxima_posicao - contagem[codigo_por_nome[disciplina]], codigo_por_nome[disciplina])
+                for disciplina, meta in self.metas_disciplina.items() if disciplina in codigo_por_nome
+            ]
+            for deficit, codigo in sorted(deficits, reverse=True):
+                if deficit <= 0:
+                    break
+                mascara = elegiveis & (self._codigos_disciplina == codigo)
+                if mascara.any():
+                    elegiveis = mascara
+                    break
+        
+        if self.metas_tags:
+            deficits = []
+            for tag, meta in self.metas_tags.items():
+                mascara_tag = self._obter_mascara_tag(tag)
+                deficits.append((meta * proxima_posicao - int(mascara_tag[indices_respondidos].sum()), tag))
+            for deficit, tag in sorted(deficits, reverse=True):
+                if deficit <= 0:
+                    break
+                mascara = elegiveis & self._obter_mascara_tag(tag)
+                if mascara.any():
+                    elegiveis = mascara
+                    break
+        
+        return elegiveis
+    
+    def _obter_mascara_tag(self, tag: str) -> np.ndarray:
+        mascara = self._mascaras_tags.get(tag)
+        if mascara is None:
+            mascara = np.fromiter((tag in tags for tags in self._tags), dtype=bool, count=len(self._tags))
+            self._mascaras_tags[tag] = mascara
+        return mascara
+    
+    def _filtrar_exposicao(self, elegiveis: np.ndarray) -> np.ndarray:
         """
-        Calcula o score de uma questão para seleção
+        Sympson-Hetter: cada item passa com probabilidade min(1, taxa máxima / taxa de exposição)
         """
+        self._sincronizar_exposicoes()
+        if self._total_sessoes == 0:
+            return elegiveis
+        
+        taxas = self._exposicoes / self._total_sessoes
+        probabilidades = np.minimum(1.0, self.exposure_max_rate / np.maximum(taxas, 1e-12))
+        filtrados = elegiveis & (self._rng.random(len(elegiveis)) < probabilidades)
+        return filtrados if filtrados.any() else elegiveis
+    
+    def _sincronizar_exposicoes(self):
+        """
+        Envia as exposições acumuladas localmente e atualiza os contadores locais com os
+        compartilhados, no máximo a cada EXPOSURE_SYNC_INTERVAL s
+        """
+        agora = time.monotonic()
+        if agora - self._exposicoes_sincronizadas_em < EXPOSURE_SYNC_INTERVAL:
+            return
+        self._exposicoes_sincronizadas_em = agora
+        
+        pendentes, self._exposicoes_pendentes = self._exposicoes_pendentes, {}
         try:
-            dificuldade = self._calcular_dificuldade_questao(questao)
-            
-            # Score baseado na proximidade da dificuldade com a proficiência
-            proximidade = 1 - abs(dificuldade - proficiencia)
-            
-            # Ajustar baseado na confiança
-            # Se confiança é baixa, preferir questões de dificuldade média
-            if confianca < 0.5:
-                if 0.3 <= dificuldade <= 0.7:
-                    proximidade += 0.2
-            
-            # Ajustar baseado na disciplina (preferir disciplinas mais testadas)
-            disciplina = questao.get('disciplina', '')
-            if disciplina in ['português', 'matemática']:
-                proximidade += 0.1
-            
-            # Ajustar baseado no peso da questão
-            peso = questao.get('peso', 1.0)
-            proximidade *= peso
-            
-            return proximidade
+            contagens = self.session_store.sincronizar_exposicoes(pendentes)
+            self._total_sessoes = contagens.pop(CAMPO_TOTAL_SESSOES, self._total_sessoes)
+            
+            exposicoes = np.zeros(len(self.question_bank))
+            for questao_id, total in contagens.items():
+                indice = self._indice_por_id.get(questao_id)
+                if indice is None and questao_id.lstrip('-').isdigit():
+                    indice = self._indice_por_id.get(int(questao_id))
+                if indice is not None:
+                    exposicoes[indice] = total
+            self._exposicoes = exposicoes
             
         except Exception as e:
-            logger.error(f"Erro ao calcular score da questão: {e}")
-            return 0.0
+            # Incrementos não enviados voltam para o próximo envio
+            for campo, quantidade in pendentes.items():
+                self._exposicoes_pendentes[campo] = self._exposicoes_pendentes.get(campo, 0) + quantidade
+            logger.warning(f"Erro ao sincronizar contadores de exposição: {e}")
+    
+    def _acumular_exposicao(self, campo: str):
+        """Conta localmente; o envio ao store compartilhado sai em lote na sincronização"""
+        self._exposicoes_pendentes[campo] = self._exposicoes_pendentes.get(campo, 0) + 1
+        self._sincronizar_exposicoes()
+    
+    def _registrar_exposicao(self, questao_id):
+        indice = self._indice_por_id.get(questao_id)
+        if indice is not None:
+            self._exposicoes[indice] += 1
+        self._acumular_exposicao(str(questao_id))
+    
+    def _registrar_inicio_teste(self):
+        self._total_sessoes += 1
+        self._acumular_exposicao(CAMPO_TOTAL_SESSOES)
     
     def gerar_relatorio_proficiencia(self, respostas_usuario: List[Dict]) -> Dict:
         """
@@ -359,48 +845,19 @@ class AdaptiveTestingEngine:
             taxa_acerto = acertos / total_questoes
             
             # Calcular proficiência final
-            proficiencia_final = self._calcular_proficiencia_atual(respostas_usuario)
-            confianca_final = self._calcular_confianca(respostas_usuario)
-            
-            # Análise por disciplina
-            disciplinas = {}
-            for resposta in respostas_usuario:
-                questao_id = resposta.get('questao_id')
-                questao = next((q for q in self.question_bank if q['id'] == questao_id), None)
-                
-                if questao:
-                    disciplina = questao.get('disciplina', 'Não identificada')
-                    if disciplina not in disciplinas:
-                        disciplinas[disciplina] = {'acertos': 0, 'total': 0}
-                    
-                    disciplinas[disciplina]['total'] += 1
-                    if resposta.get('acertou', False):
-                        disciplinas[disciplina]['acertos'] += 1
-            
-            # Calcular taxa de acerto por disciplina
-            for disciplina in disciplinas:
-                dados = disciplinas[disciplina]
-                dados['taxa_acerto'] = dados['acertos'] / dados['total']
-            
-            # Análise por nível de dificuldade
-            niveis = {}
-            for resposta in respostas_usuario:
-                questao_id = resposta.get('questao_id')
-                questao = next((q for q in self.question_bank if q['id'] == questao_id), None)
-                
-                if questao:
-                    nivel = questao.get('nivel_dificuldade', 'medio')
-                    if nivel not in niveis:
-                        niveis[nivel] = {'acertos': 0, 'total': 0}
-                    
-                    niveis[nivel]['total'] += 1
-                    if resposta.get('acertou', False):
-                        niveis[nivel]['acertos'] += 1
-            
-            # Calcular taxa de acerto por nível
-            for nivel in niveis:
-                dados = niveis[nivel]
-                dados['taxa_acerto'] = dados['acertos'] / dados['total']
+            posterior = self._estimar_posterior(respostas_usuario)
+            theta = posterior.eap()
+            proficiencia_final = self._theta_para_proficiencia(theta)
+            confianca_final = self._confianca_posterior(posterior)
+            
+            # Análise por disciplina e por nível de dificuldade
+            indices, acertos_respostas = self._indexar_respostas(respostas_usuario)
+            disciplinas = self._agregar_acertos(
+                self._codigos_disciplina[indices], self._nomes_disciplina, acertos_respostas
+            )
+            niveis = self._agregar_acertos(
+                self._codigos_nivel[indices], self._nomes_nivel, acertos_respostas
+            )
             
             # Tempo médio de resposta
             tempos = [r.get('tempo_resposta', 0) for r in respostas_usuario]
@@ -414,10 +871,12 @@ class AdaptiveTestingEngine:
                     'data_teste': datetime.now().isoformat(),
                     'total_questoes': total_questoes,
                     'tempo_total': sum(tempos),
-                    'versao_algoritmo': '1.0'
+                    'versao_algoritmo': '2.0'
                 },
                 'proficiencia': {
                     'nivel_geral': proficiencia_final,
+                    'theta': theta,
+                    'erro_padrao': posterior.erro_padrao(),
                     'confianca': confianca_final,
                     'taxa_acerto_geral': taxa_acerto,
                     'classificacao': self._classificar_proficiencia(proficiencia_final)
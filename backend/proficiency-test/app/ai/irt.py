@@ -0,0 +1,227 @@
+import numpy as np
+from scipy import sparse
+from typing import List, Dict, Optional, Tuple
+import logging
+import os
+
+logger = logging.getLogger(__name__)
+
+# Configuração da Teoria de Resposta ao Item
+IRT_QUADRATURA_PONTOS = int(os.getenv('IRT_QUADRATURE_POINTS', '41'))
+IRT_THETA_LIMITE = float(os.getenv('IRT_THETA_LIMIT', '4.0'))
+IRT_EM_MAX_ITER = int(os.getenv('IRT_EM_MAX_ITER', '100'))
+IRT_EM_TOLERANCIA = float(os.getenv('IRT_EM_TOLERANCE', '1e-4'))
+
+# Limites dos parâmetros dos itens durante a calibração
+LIMITES_DISCRIMINACAO = (0.2, 4.0)
+LIMITES_DIFICULDADE = (-4.0, 4.0)
+LIMITES_ACERTO_CASUAL = (0.0, 0.35)
+
+def _nos_quadratura(pontos: int = IRT_QUADRATURA_PONTOS) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Nós igualmente espaçados e pesos da distribuição a priori N(0, 1)
+    """
+    nos = np.linspace(-IRT_THETA_LIMITE, IRT_THETA_LIMITE, pontos)
+    pesos = np.exp(-0.5 * nos ** 2)
+    return nos, pesos / pesos.sum()
+
+NOS_QUADRATURA, PESOS_QUADRATURA = _nos_quadratura()
+
+def probabilidade_acerto(theta, a, b, c=0.0) -> np.ndarray:
+    """
+    Probabilidade de acerto no modelo logístico de 3 parâmetros (2PL quando c = 0)
+    """
+    return c + (1 - c) / (1 + np.exp(-a * (theta - b)))
+
+def informacao_fisher(theta, a, b, c=0.0) -> np.ndarray:
+    """
+    Informação de Fisher dos itens no nível de habilidade theta
+    """
+    p = probabilidade_acerto(theta, a, b, c)
+    return a ** 2 * ((p - c) / (1 - c)) ** 2 * (1 - p) / p
+
+class PosteriorHabilidade:
+    """
+    Distribuição a posteriori da habilidade em uma grade de quadratura
+
+    Cada resposta custa O(pontos de quadratura); EAP, MAP e erro padrão
+    são lidos diretamente da grade.
+    """
+
+    def __init__(self, log_posterior: Optional[np.ndarray] = None):
+        if log_posterior is None:
+            log_posterior = np.log(PESOS_QUADRATURA)
+        self.log_posterior = np.asarray(log_posterior, dtype=float).copy()
+        self.total_respostas = 0
+
+    def atualizar(self, a: float, b: float, c: float, acertou: bool):
+        """
+        Incorpora uma resposta à posteriori
+        """
+        p = probabilidade_acerto(NOS_QUADRATURA, a, b, c)
+        self.log_posterior += np.log(p if acertou else 1 - p)
+        # Reancorar para evitar underflow em testes longos
+        self.log_posterior -= self.log_posterior.max()
+        self.total_respostas += 1
+
+    def atualizar_lote(self, a: np.ndarray, b: np.ndarray, c: np.ndarray, acertos: np.ndarray):
+        """
+        Incorpora várias respostas de uma vez
+        """
+        if len(a) == 0:
+            return
+        p = probabilidade_acerto(NOS_QUADRATURA[None, :], a[:, None], b[:, None], c[:, None])
+        acertos = np.asarray(acertos, dtype=bool)[:, None]
+        self.log_posterior += np.where(acertos, np.log(p), np.log(1 - p)).sum(axis=0)
+        self.log_posterior -= self.log_posterior.max()
+        self.total_respostas += len(a)
+
+    def _pesos(self) -> np.ndarray:
+        pesos = np.exp(self.log_posterior - self.log_posterior.max())
+        return pesos / pesos.sum()
+
+    def eap(self) -> float:
+        """Estimativa EAP (média a posteriori) da habilidade"""
+        return float(np.dot(self._pesos(), NOS_QUADRATURA))
+
+    def map(self) -> float:
+        """Estimativa MAP (moda a posteriori) da habilidade"""
+        return float(NOS_QUADRATURA[int(np.argmax(self.log_posterior))])
+
+    def erro_padrao(self) -> float:
+        """Desvio padrão a posteriori da habilidade"""
+        pesos = self._pesos()
+        media = np.dot(pesos, NOS_QUADRATURA)
+        return float(np.sqrt(np.dot(pesos, (NOS_QUADRATURA - media) ** 2)))
+
+    def to_dict(self) -> Dict:
+        return {'log_posterior': self.log_posterior.tolist(), 'total_respostas': self.total_respostas}
+
+    @classmethod
+    def from_dict(cls, dados: Dict) -> 'PosteriorHabilidade':
+        posterior = cls(dados['log_posterior'])
+        posterior.total_respostas = dados.get('total_respostas', 0)
+        return posterior
+
+class CalibradorIRT:
+    """
+    Calibração em lote dos parâmetros dos itens (2PL/3PL) por máxima verossimilhança
+    marginal via EM (Bock-Aitkin), vetorizada sobre todos os itens
+    """
+
+    def __init__(self, modelo: str = '2PL', max_iter: int = IRT_EM_MAX_ITER,
+                 tolerancia: float = IRT_EM_TOLERANCIA):
+        if modelo not in ('2PL', '3PL'):
+            raise ValueError(f"Modelo IRT não suportado: {modelo}")
+        self.modelo = modelo
+        self.max_iter = max_iter
+        self.tolerancia = tolerancia
+
+    def calibrar(self, respostas: np.ndarray) -> Dict[str, np.ndarray]:
+        """
+        Calibra os itens a partir da matriz respostas (pessoas x itens) com 1 = acerto,
+        0 = erro e NaN = item não apresentado
+        """
+        respostas = np.asarray(respostas, dtype=float)
+        observado = ~np.isnan(respostas)
+        acertos = np.where(observado, respostas, 0.0)
+        return self._calibrar_esparso(sparse.csr_matrix(acertos), sparse.csr_matrix(observado, dtype=float))
+
+    def _calibrar_esparso(self, acertos: sparse.csr_matrix, observado: sparse.csr_matrix) -> Dict[str, np.ndarray]:
+        """
+        EM sobre matrizes esparsas (pessoas x itens) de acertos e de itens apresentados:
+        a memória cresce com o número de respostas, não com pessoas x itens
+        """
+        erros = (observado - acertos).tocsr()
+        observado_t = observado.T.tocsr()
+        acertos_t = acertos.T.tocsr()
+
+        n_itens = observado.shape[1]
+        a = np.ones(n_itens)
+        b = self._dificuldade_inicial(acertos, observado)
+        c = np.full(n_itens, 0.2 if self.modelo == '3PL' else 0.0)
+
+        log_verossimilhanca_anterior = -np.inf
+        for iteracao in range(self.max_iter):
+            # Passo E: posteriori de cada pessoa nos nós de quadratura (pessoas x nós)
+            p = probabilidade_acerto(NOS_QUADRATURA[None, :], a[:, None], b[:, None], c[:, None])
+            log_verossimilhanca = acertos @ np.log(p) + erros @ np.log(1 - p) + np.log(PESOS_QUADRATURA)
+            maximo = log_verossimilhanca.max(axis=1, keepdims=True)
+            posteriori = np.exp(log_verossimilhanca - maximo)
+            marginal = posteriori.sum(axis=1, keepdims=True)
+            posteriori /= marginal
+
+            # Contagens esperadas por item e nó
+            n_esperado = observado_t @ posteriori
+            r_esperado = acertos_t @ posteriori
+
+            # Passo M: um passo de Fisher scoring para todos os itens
+            a, b, c = self._passo_m(a, b, c, r_esperado, n_esperado)
+
+            log_verossimilhanca_total = float(np.sum(np.log(marginal) + maximo))
+            if abs(log_verossimilhanca_total - log_verossimilhanca_anterior) < self.tolerancia * max(1.0, abs(log_verossimilhanca_total)):
+                break
+            log_verossimilhanca_anterior = log_verossimilhanca_total
+
+        logger.info(f"Calibração IRT ({self.modelo}) concluída em {iteracao + 1} iterações")
+        return {'a': a, 'b': b, 'c': c, 'calibrado': observado.getnnz(axis=0) > 0}
+
+    @staticmethod
+    def _dificuldade_inicial(acertos: sparse.csr_matrix, observado: sparse.csr_matrix) -> np.ndarray:
+        total = np.asarray(observado.sum(axis=0)).ravel()
+        taxa = (np.asarray(acertos.sum(axis=0)).ravel() + 0.5) / (total + 1.0)
+        return np.clip(-np.log(taxa / (1 - taxa)), *LIMITES_DIFICULDADE)
+
+    def _passo_m(self, a: np.ndarray, b: np.ndarray, c: np.ndarray,
+                 r: np.ndarray, n: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        theta = NOS_QUADRATURA[None, :]
+        logistica = 1 / (1 + np.exp(-a[:, None] * (theta - b[:, None])))
+        p = c[:, None] + (1 - c[:, None]) * logistica
+        pq = np.clip(p * (1 - p), 1e-9, None)
+
+        # Derivadas de P em relação a (a, b[, c])
+        derivada_base = (1 - c[:, None]) * logistica * (1 - logistica)
+        derivadas = [derivada_base * (theta - b[:, None]), -derivada_base * a[:, None]]
+        if self.modelo == '3PL':
+            derivadas.append(1 - logistica)
+        derivadas = np.stack(derivadas, axis=-1)  # itens x nós x parâmetros
+
+        residuo = (r - n * p) / pq
+        gradiente = np.einsum('jk,jkp->jp', residuo, derivadas)
+        informacao = np.einsum('jk,jkp,jkq->jpq', n / pq, derivadas, derivadas)
+        informacao += 1e-3 * np.eye(derivadas.shape[-1])
+
+        passo = np.linalg.solve(informacao, gradiente[..., None])[..., 0]
+
+        a = np.clip(a + passo[:, 0], *LIMITES_DISCRIMINACAO)
+        b = np.clip(b + passo[:, 1], *LIMITES_DIFICULDADE)
+        if self.modelo == '3PL':
+            c = np.clip(c + passo[:, 2], *LIMITES_ACERTO_CASUAL)
+        return a, b, c
+
+    def calibrar_registros(self, registros: List[Dict], ids_itens: List) -> Dict[str, np.ndarray]:
+        """
+        Monta a matriz de respostas a partir de registros {usuario_id, questao_id, acertou}
+        e calibra os itens na ordem de ids_itens
+        """
+        indice_itens = {item_id: j for j, item_id in enumerate(ids_itens)}
+        indice_usuarios: Dict = {}
+        respostas: Dict[Tuple[int, int], float] = {}
+
+        for registro in registros:
+            j = indice_itens.get(registro.get('questao_id'))
+            if j is None:
+                continue
+            i = indice_usuarios.setdefault(registro.get('usuario_id'), len(indice_usuarios))
+            # Resposta repetida da mesma pessoa ao mesmo item: vale a última
+            respostas[(i, j)] = 1.0 if registro.get('acertou', False) else 0.0
+
+        forma = (len(indice_usuarios), len(ids_itens))
+        linhas = np.fromiter((i for i, _ in respostas), dtype=np.int64, count=len(respostas))
+        colunas = np.fromiter((j for _, j in respostas), dtype=np.int64, count=len(respostas))
+        valores = np.fromiter(respostas.values(), dtype=float, count=len(respostas))
+
+        observado = sparse.csr_matrix((np.ones(len(valores)), (linhas, colunas)), shape=forma)
+        acertos = sparse.csr_matrix((valores, (linhas, colunas)), shape=forma)
+        acertos.eliminate_zeros()
+        return self._calibrar_esparso(acertos, observado)
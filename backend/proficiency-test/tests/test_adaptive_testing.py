@@ -0,0 +1,99 @@
+"""Testes do cache de bancos de questões do motor adaptativo"""
+import copy
+
+import pytest
+
+from app.ai import adaptive_testing
+from app.ai.adaptive_testing import AdaptiveTestingEngine
+
+QUESTOES = [
+    {
+        'id': 1,
+        'enunciado': 'Qual é a capital do Brasil?',
+        'opcoes': ['São Paulo', 'Rio de Janeiro', 'Brasília', 'Salvador'],
+        'gabarito': 'C',
+        'disciplina': 'matemática',
+        'nivel_dificuldade': 'facil',
+        'tags': ['capitais']
+    },
+    {
+        'id': 2,
+        'enunciado': 'Calcule a derivada de x²',
+        'opcoes': ['x', '2x', 'x²', '2x²'],
+        'gabarito': 'B',
+        'disciplina': 'matemática',
+        'nivel_dificuldade': 'medio'
+    }
+]
+
+
+@pytest.fixture(autouse=True)
+def limpar_bancos():
+    adaptive_testing._bancos_processo.clear()
+    yield
+    adaptive_testing._bancos_processo.clear()
+
+
+def carregar(questoes, **kwargs):
+    engine = AdaptiveTestingEngine()
+    engine.carregar_banco_questoes(questoes, **kwargs)
+    return engine
+
+
+def test_banco_identico_reutiliza_cache():
+    primeiro = carregar(QUESTOES)
+    segundo = carregar(copy.deepcopy(QUESTOES))
+    
+    assert len(adaptive_testing._bancos_processo) == 1
+    assert segundo.question_bank is primeiro.question_bank
+
+
+@pytest.mark.parametrize('campo, valor', [
+    ('disciplina', 'geografia'),
+    ('gabarito', 'A'),
+    ('nivel_dificuldade', 'dificil'),
+    ('tags', ['geografia']),
+])
+def test_questao_editada_recarrega_banco(campo, valor):
+    carregar(QUESTOES)
+    
+    editadas = copy.deepcopy(QUESTOES)
+    editadas[0][campo] = valor
+    engine = carregar(editadas)
+    
+    assert engine.question_bank[0][campo] == valor
+    assert len(adaptive_testing._bancos_processo) == 2
+
+
+def test_versao_banco_informada_define_a_chave():
+    carregar(QUESTOES, versao_banco='v1')
+    
+    editadas = copy.deepcopy(QUESTOES)
+    editadas[0]['disciplina'] = 'geografia'
+    assert carregar(editadas, versao_banco='v2').question_bank[0]['disciplina'] == 'geografia'
+    assert carregar(editadas, versao_banco='v1').question_bank[0]['disciplina'] == 'matemática'
+
+
+def test_exposicoes_sao_enviadas_em_lote_na_sincronizacao(monkeypatch):
+    store = adaptive_testing.SessionStore()
+    envios = []
+    sincronizar = store.sincronizar_exposicoes
+    monkeypatch.setattr(store, 'sincronizar_exposicoes', lambda incrementos: envios.append(dict(incrementos)) or sincronizar(incrementos))
+    
+    engine = carregar(QUESTOES)
+    engine.session_store = store
+    for _ in range(5):
+        engine._registrar_inicio_teste()
+        engine._registrar_exposicao(1)
+        engine._registrar_exposicao(2)
+    
+    # Apenas a primeira chamada sincroniza; as demais ficam acumuladas até o intervalo vencer
+    assert envios == [{adaptive_testing.CAMPO_TOTAL_SESSOES: 1}]
+    
+    engine._exposicoes_sincronizadas_em = 0.0
+    engine._sincronizar_exposicoes()
+    
+    assert len(envios) == 2
+    assert store.obter_exposicoes() == {adaptive_testing.CAMPO_TOTAL_SESSOES: 5, '1': 5, '2': 5}
+    assert engine._total_sessoes == 5
+    assert list(engine._exposicoes) == [5, 5]
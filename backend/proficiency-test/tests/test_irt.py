@@ -0,0 +1,47 @@
+"""Testes da calibração IRT a partir de registros de respostas"""
+import numpy as np
+
+from app.ai.irt import CalibradorIRT
+
+
+def gerar_registros(n_usuarios=300, n_itens=40, por_usuario=12, semente=0):
+    rng = np.random.default_rng(semente)
+    dificuldades = np.linspace(-2, 2, n_itens)
+    registros = []
+    for usuario in range(n_usuarios):
+        theta = rng.normal()
+        for item in rng.choice(n_itens, por_usuario, replace=False):
+            acerto = rng.random() < 1 / (1 + np.exp(-(theta - dificuldades[item])))
+            registros.append({'usuario_id': usuario, 'questao_id': int(item), 'acertou': bool(acerto)})
+    return registros
+
+
+def matriz_densa(registros, n_itens):
+    usuarios = sorted({r['usuario_id'] for r in registros})
+    respostas = np.full((len(usuarios), n_itens), np.nan)
+    for registro in registros:
+        respostas[usuarios.index(registro['usuario_id']), registro['questao_id']] = float(registro['acertou'])
+    return respostas
+
+
+def test_calibracao_por_registros_igual_a_matriz_densa():
+    registros = gerar_registros()
+    calibrador = CalibradorIRT(modelo='2PL')
+    
+    esparsa = calibrador.calibrar_registros(registros, list(range(40)))
+    densa = calibrador.calibrar(matriz_densa(registros, 40))
+    
+    for parametro in ('a', 'b', 'c', 'calibrado'):
+        np.testing.assert_allclose(esparsa[parametro], densa[parametro])
+
+
+def test_itens_sem_respostas_nao_sao_calibrados_e_resposta_repetida_vale_a_ultima():
+    registros = gerar_registros(n_itens=10, por_usuario=5)
+    repetida = dict(registros[0], acertou=not registros[0]['acertou'])
+    
+    parametros = CalibradorIRT().calibrar_registros(registros + [repetida], list(range(12)))
+    sem_repeticao = CalibradorIRT().calibrar_registros(registros[1:] + [repetida], list(range(12)))
+    
+    assert parametros['calibrado'][:10].all()
+    assert not parametros['calibrado'][10:].any()
+    np.testing.assert_allclose(parametros['b'], sem_repeticao['b'])
@@ -0,0 +1,70 @@
+"""
+Atualização do esquema do scraper de provas
+
+Cria as tabelas e índices introduzidos depois da criação inicial do banco.
+O upsert em lote do crawler (ON CONFLICT em url_original) exige o índice único
+ux_provas_url_original; antes de criá-lo, provas duplicadas por URL são
+mescladas no registro mais antigo.
+
+Uso (no diretório do serviço): DATABASE_URL=postgresql://... python -m app.init_db
+Suporta PostgreSQL e SQLite, os mesmos bancos dos upserts em lote.
+"""
+
+import logging
+
+from sqlalchemy import inspect, text
+
+from .database import engine
+from .models.prova import Base, FingerprintPagina, Prova
+
+logger = logging.getLogger(__name__)
+
+def _mesclar_duplicados(conexao, tabela, coluna: str, tabelas_existentes) -> int:
+    """
+    Mantém o menor id de cada valor de `coluna`: referências das outras tabelas
+    são redirecionadas para ele e os demais registros são removidos
+    """
+    duplicados = (
+        f"SELECT id FROM {tabela.name} WHERE {coluna} IS NOT NULL AND id NOT IN "
+        f"(SELECT MIN(id) FROM {tabela.name} WHERE {coluna} IS NOT NULL GROUP BY {coluna})"
+    )
+    total = conexao.execute(text(f"SELECT COUNT(*) FROM ({duplicados}) AS duplicados")).scalar()
+    if not total:
+        return 0
+
+    for tabela_filha in Base.metadata.tables.values():
+        if tabela_filha.name not in tabelas_existentes:
+            continue
+        for fk in tabela_filha.foreign_keys:
+            if fk.target_fullname != f"{tabela.name}.id":
+                continue
+            conexao.execute(text(
+                f"UPDATE {tabela_filha.name} SET {fk.parent.name} = ("
+                f"SELECT MIN(mantido.id) FROM {tabela.name} mantido "
+                f"JOIN {tabela.name} duplicado ON duplicado.{coluna} = mantido.{coluna} "
+                f"WHERE duplicado.id = {tabela_filha.name}.{fk.parent.name}) "
+                f"WHERE {fk.parent.name} IN ({duplicados})"
+            ))
+
+    conexao.execute(text(f"DELETE FROM {tabela.name} WHERE id IN ({duplicados})"))
+    return total
+
+def atualizar_esquema():
+    """Cria tabelas e índices novos, removendo antes as duplicatas que violariam os índices únicos"""
+    tabelas_existentes = set(inspect(engine).get_table_names())
+
+    FingerprintPagina.__table__.create(bind=engine, checkfirst=True)
+
+    if Prova.__tablename__ in tabelas_existentes:
+        with engine.begin() as conexao:
+            removidos = _mesclar_duplicados(conexao, Prova.__table__, 'url_original', tabelas_existentes)
+        if removidos:
+            logger.info(f"{removidos} provas duplicadas por url_original mescladas")
+
+    for tabela in (Prova.__table__, FingerprintPagina.__table__):
+        for indice in tabela.indexes:
+            indice.create(bind=engine, checkfirst=True)
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    atualizar_esquema()
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Text, DateTime, Boolean, JSON, ForeignKey, Float
+from sqlalchemy import Column, Integer, String, Text, DateTime, Boolean, JSON, ForeignKey, Float, Index
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import relationship
 from datetime import datetime
@@ -43,6 +43,11 @@ class Prova(Base):
     # Relacionamentos
     banca = relationship("Banca", back_populates="provas")
     questoes = relationship("Questao", back_populates="prova")
+    
+    # Chave de deduplicação usada pelo upsert em lote do crawler
+    __table_args__ = (
+        Index("ux_provas_url_original", "url_original", unique=True),
+    )
 
 class Questao(Base):
     __tablename__ = "questoes"
@@ -174,3 +179,19 @@ class ScrapingProvaLog(Base):
     tempo_execucao = Column(Integer)  # em segundos
     metadados = Column(JSON)
     created_at = Column(DateTime, default=datetime.utcnow)
+
+class FingerprintPagina(Base):
+    __tablename__ = "fingerprints_paginas_provas"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    url = Column(Text, nullable=False)
+    tipo = Column(String(20), nullable=False, default="pagina")  # pagina (listagem) ou item (prova)
+    hash_conteudo = Column(String(64))
+    etag = Column(String(255))
+    last_modified = Column(String(255))
+    ultima_verificacao = Column(DateTime, default=datetime.utcnow)
+    ultima_mudanca = Column(DateTime, default=datetime.utcnow)
+    
+    __table_args__ = (
+        Index("ux_fingerprints_paginas_provas_url_tipo", "url", "tipo", unique=True),
+    )
@@ -1,10 +1,8 @@
 import requests
 from bs4 import BeautifulSoup
-from selenium import webdriver
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
-from selenium.webdriver.chrome.options import Options
 from typing import List, Dict, Optional, Tuple
 import time
 import logging
@@ -15,6 +13,8 @@ import re
 from urllib.parse import urljoin, urlparse
 import os
 
+from .pool_navegadores import pool_navegadores, buscar_html_estatico
+
 logger = logging.getLogger(__name__)
 
 class ProvaScraper:
@@ -30,22 +30,6 @@ class ProvaScraper:
         }
         self.session = requests.Session()
         self.session.headers.update(self.headers)
-        
-    def setup_driver(self) -> webdriver.Chrome:
-        """Configura o driver do Selenium"""
-        chrome_options = Options()
-        chrome_options.add_argument('--headless')
-        chrome_options.add_argument('--no-sandbox')
-        chrome_options.add_argument('--disable-dev-shm-usage')
-        chrome_options.add_argument('--disable-gpu')
-        chrome_options.add_argument('--window-size=1920,1080')
-        
-        try:
-            driver = webdriver.Chrome(options=chrome_options)
-            return driver
-        except Exception as e:
-            logger.error(f"Erro ao configurar driver: {e}")
-            raise
     
     def buscar_provas(self, limite: int = 50) -> List[Dict]:
         """
@@ -53,6 +37,47 @@ class ProvaScraper:
         """
         raise NotImplementedError("Método deve ser implementado pelas subclasses")
     
+    def _extrair_provas_soup(self, soup, limite: int) -> List[Dict]:
+        """
+        Extrai provas de uma listagem estática (método abstrato - deve ser implementado pelas subclasses)
+        """
+        raise NotImplementedError("Método deve ser implementado pelas subclasses")
+    
+    def verificar_novas_provas(self, limite: int = 10, crawler=None) -> List[Dict]:
+        """
+        Busca a listagem para a verificação periódica. Com um CrawlerIncremental,
+        a listagem sem mudança (304 ou mesmo hash) é pulada; a seleção das
+        novas/alteradas fica com as impressões digitais dos itens.
+        """
+        if crawler is not None:
+            pagina = crawler.buscar(self.provas_url, self.seletor_provas)
+            if pagina is not None and not pagina.modificada:
+                return []
+            if pagina is not None and pagina.soup is not None:
+                return self._extrair_provas_soup(pagina.soup, limite)
+        
+        return self.buscar_provas(limite=limite)
+    
+    def _montar_provas(self, links: List[Tuple[str, str]]) -> List[Dict]:
+        """Filtra os links que são provas e monta os registros"""
+        provas = []
+        for url, texto in links:
+            try:
+                if self._eh_prova_valida(texto, url):
+                    prova_data = {
+                        'titulo': texto,
+                        'url': url,
+                        'banca': self.banca,
+                        'data_coleta': datetime.now().isoformat()
+                    }
+                    provas.append(prova_data)
+                    
+            except Exception as e:
+                logger.error(f"Erro ao processar link de prova: {e}")
+                continue
+        
+        return provas
+    
     def extrair_questoes_prova(self, url_prova: str) -> List[Dict]:
         """
         Extrai questões de uma prova específica (método abstrato)
@@ -251,55 +276,52 @@ class CESPEProvaScraper(ProvaScraper):
     Scraper específico para provas do CESPE/CEBRASPE
     """
     
+    seletor_provas = "a[href*='prova'], a[href*='gabarito'], a[href*='pdf']"
+    
     def __init__(self):
         super().__init__("CESPE", "https://www.cespe.unb.br")
         self.provas_url = "https://www.cespe.unb.br/concursos"
     
+    def _extrair_provas_soup(self, soup, limite: int) -> List[Dict]:
+        return self._montar_provas([
+            (urljoin(self.provas_url, link.get('href')), link.get_text(strip=True))
+            for link in soup.select(self.seletor_provas)[:limite]
+        ])
+    
     def buscar_provas(self, limite: int = 50) -> List[Dict]:
         """
         Busca provas do CESPE
         """
-        provas = []
+        seletor_links = self.seletor_provas
         
         try:
-            driver = self.setup_driver()
-            driver.get(self.provas_url)
-            
-            # Aguardar carregamento
-            WebDriverWait(driver, 10).until(
-                EC.presence_of_element_located((By.TAG_NAME, "body"))
-            )
-            
-            # Buscar links de provas
-            prova_links = driver.find_elements(By.CSS_SELECTOR, 
-                "a[href*='prova'], a[href*='gabarito'], a[href*='pdf']")
-            
-            for link in prova_links[:limite]:
-                try:
-                    url = link.get_attribute("href")
-                    texto = link.text.strip()
+            # Caminho rápido: links de provas já presentes no HTML estático
+            soup = buscar_html_estatico(self.provas_url, seletor_links, self.session)
+            if soup is not None:
+                return self._extrair_provas_soup(soup, limite)
+            else:
+                with pool_navegadores.navegador() as driver:
+                    driver.get(self.provas_url)
                     
-                    if self._eh_prova_valida(texto, url):
-                        prova_data = {
-                            'titulo': texto,
-                            'url': url,
-                            'banca': self.banca,
-                            'data_coleta': datetime.now().isoformat()
-                        }
-                        provas.append(prova_data)
-                        
-                except Exception as e:
-                    logger.error(f"Erro ao processar link de prova: {e}")
-                    continue
-            
-            driver.quit()
+                    # Aguardar carregamento
+                    WebDriverWait(driver, 10).until(
+                        EC.presence_of_element_located((By.TAG_NAME, "body"))
+                    )
+                    
+                    # Buscar links de provas
+                    prova_links = driver.find_elements(By.CSS_SELECTOR, seletor_links)
+                    links = []
+                    for link in prova_links[:limite]:
+                        try:
+                            links.append((link.get_attribute("href"), link.text.strip()))
+                        except Exception as e:
+                            logger.error(f"Erro ao processar link de prova: {e}")
             
         except Exception as e:
             logger.error(f"Erro ao buscar provas do CESPE: {e}")
-            if 'driver' in locals():
-                driver.quit()
+            return []
         
-        return provas
+        return self._montar_provas(links)
     
     def extrair_questoes_prova(self, url_prova: str) -> List[Dict]:
         """
@@ -414,52 +436,41 @@ class FGVProvaScraper(ProvaScraper):
     Scraper específico para provas da FGV
     """
     
+    seletor_provas = "a[href*='prova' i], a[href*='gabarito' i], a[href*='pdf' i]"
+    
     def __init__(self):
         super().__init__("FGV", "https://www.fgv.br")
         self.provas_url = "https://www.fgv.br/concursos"
     
+    def _extrair_provas_soup(self, soup, limite: int) -> List[Dict]:
+        # Buscar links de provas
+        prova_links = soup.find_all('a', href=lambda x: x and any(
+            palavra in x.lower() for palavra in ['prova', 'gabarito', 'pdf']
+        ))
+        
+        links = []
+        for link in prova_links[:limite]:
+            url = link.get('href')
+            if not url.startswith('http'):
+                url = urljoin(self.base_url, url)
+            links.append((url, link.get_text().strip()))
+        
+        return self._montar_provas(links)
+    
     def buscar_provas(self, limite: int = 50) -> List[Dict]:
         """
         Busca provas da FGV
         """
-        provas = []
-        
         try:
             response = self.session.get(self.provas_url)
             response.raise_for_status()
             
             soup = BeautifulSoup(response.content, 'html.parser')
-            
-            # Buscar links de provas
-            prova_links = soup.find_all('a', href=lambda x: x and any(
-                palavra in x.lower() for palavra in ['prova', 'gabarito', 'pdf']
-            ))
-            
-            for link in prova_links[:limite]:
-                try:
-                    url = link.get('href')
-                    texto = link.get_text().strip()
-                    
-                    if not url.startswith('http'):
-                        url = urljoin(self.base_url, url)
-                    
-                    if self._eh_prova_valida(texto, url):
-                        prova_data = {
-                            'titulo': texto,
-                            'url': url,
-                            'banca': self.banca,
-                            'data_coleta': datetime.now().isoformat()
-                        }
-                        provas.append(prova_data)
-                        
-                except Exception as e:
-                    logger.error(f"Erro ao processar link de prova: {e}")
-                    continue
+            return self._extrair_provas_soup(soup, limite)
             
         except Exception as e:
             logger.error(f"Erro ao buscar provas da FGV: {e}")
-        
-        return provas
+            return []
     
     def extrair_questoes_prova(self, url_prova: str) -> List[Dict]:
         """
@@ -0,0 +1,110 @@
+"""
+Canal lateral de progresso do processamento de provas
+
+A ingestão das questões roda em uma única transação; o progresso não pode
+depender dela. Com PROVA_PROGRESS_REDIS_URL o progresso vai para um hash
+no Redis; sem Redis, o registro de ProcessamentoProva é atualizado em uma
+conexão separada, no máximo a cada PROVA_PROGRESS_INTERVAL segundos.
+"""
+
+import logging
+import os
+import time
+from typing import Dict, Optional
+
+from sqlalchemy import update
+
+from ..models.prova import ProcessamentoProva
+
+logger = logging.getLogger(__name__)
+
+PROGRESSO_REDIS_URL = os.getenv('PROVA_PROGRESS_REDIS_URL', '')
+PROGRESSO_INTERVALO = float(os.getenv('PROVA_PROGRESS_INTERVAL', '2'))
+PROGRESSO_TTL = int(os.getenv('PROVA_PROGRESS_TTL', '3600'))
+
+class ProgressoProcessamento:
+    """Reporta e consulta o progresso sem commits na sessão da ingestão"""
+
+    def __init__(self, redis_url: str = PROGRESSO_REDIS_URL, intervalo: float = PROGRESSO_INTERVALO):
+        self.intervalo = intervalo
+        self.redis = None
+        self._ultimo_envio: Dict[int, float] = {}
+
+        if redis_url:
+            try:
+                import redis
+                self.redis = redis.Redis.from_url(redis_url, decode_responses=True)
+            except Exception as e:
+                logger.error(f"Erro ao conectar ao Redis de progresso: {e}")
+
+    @staticmethod
+    def _chave(processamento_id: int) -> str:
+        return f"processamento_prova:{processamento_id}"
+
+    def reportar(self, db, processamento_id: int, processadas: int, total: int):
+        """Publica o progresso; sem Redis, respeita o intervalo mínimo entre gravações"""
+        progresso = int(processadas / total * 100) if total else 100
+
+        try:
+            if self.redis is not None:
+                chave = self._chave(processamento_id)
+                pipe = self.redis.pipeline()
+                pipe.hset(chave, mapping={
+                    'questoes_processadas': processadas,
+                    'questoes_total': total,
+                    'progresso': progresso
+                })
+                pipe.expire(chave, PROGRESSO_TTL)
+                pipe.execute()
+                return
+
+            engine = db.get_bind()
+            if engine.dialect.name == 'sqlite':
+                # SQLite serializa escritores: a conexão separada esperaria o lock da ingestão
+                return
+
+            agora = time.monotonic()
+            if agora - self._ultimo_envio.get(processamento_id, 0) < self.intervalo:
+                return
+            self._ultimo_envio[processamento_id] = agora
+
+            # Conexão própria: visível para outros leitores antes do commit da ingestão
+            with engine.begin() as conexao:
+                conexao.execute(
+                    update(ProcessamentoProva.__table__)
+                    .where(ProcessamentoProva.id == processamento_id)
+                    .values(questoes_processadas=processadas, progresso=progresso)
+                )
+
+        except Exception as e:
+            logger.error(f"Erro ao reportar progresso do processamento {processamento_id}: {e}")
+
+    def obter(self, processamento_id: int) -> Optional[Dict]:
+        """Progresso publicado no Redis (None sem Redis ou sem registro)"""
+        if self.redis is None:
+            return None
+        try:
+            dados = self.redis.hgetall(self._chave(processamento_id))
+            return {k: int(v) for k, v in dados.items()} if dados else None
+        except Exception as e:
+            logger.error(f"Erro ao obter progresso do processamento {processamento_id}: {e}")
+            return None
+
+    def finalizar(self, processamento_id: int, processadas: int, total: int):
+        """
+        Encerra o acompanhamento. O estado final no banco é gravado pelo
+        commit da ingestão; no Redis, o progresso é fechado em 100%.
+        """
+        self._ultimo_envio.pop(processamento_id, None)
+        if self.redis is None:
+            return
+        try:
+            chave = self._chave(processamento_id)
+            self.redis.hset(chave, mapping={
+                'questoes_processadas': processadas,
+                'questoes_total': total,
+                'progresso': 100
+            })
+            self.redis.expire(chave, PROGRESSO_TTL)
+        except Exception as e:
+            logger.error(f"Erro ao finalizar progresso do processamento {processamento_id}: {e}")
@@ -1,11 +1,13 @@
 import asyncio
 import logging
+import os
 from datetime import datetime, timedelta
 from typing import List, Dict, Optional
 from concurrent.futures import ThreadPoolExecutor, as_completed
 import schedule
 import time
 from threading import Thread
+from sqlalchemy import insert
 
 from ..scrapers.prova_scraper import CESPEProvaScraper, FGVProvaScraper
 from ..models.prova import (
@@ -13,9 +15,19 @@ from ..models.prova import (
     EstatisticaProva, ScrapingProvaLog
 )
 from ..database import get_db
+from .crawl_incremental import (
+    ArmazemFingerprints, CrawlerIncremental, FronteiraCrawl, TIPO_ITEM, TIPO_PAGINA,
+    CRAWL_MAX_ITENS_POR_CICLO, upsert_provas
+)
+from .progresso_processamento import ProgressoProcessamento
 
 logger = logging.getLogger(__name__)
 
+# Questões por INSERT em lote na ingestão de uma prova
+PROVA_LOTE_QUESTOES = int(os.getenv('PROVA_INSERT_BATCH_SIZE', '100'))
+
+INTERVALO_VERIFICACAO_MINUTOS = int(os.getenv('SCRAPER_CHECK_INTERVAL_MINUTES', '15'))
+
 class ProvaOrchestrator:
     """
     Orquestrador que coordena a busca e processamento de provas
@@ -31,6 +43,13 @@ class ProvaOrchestrator:
         self.executor = ThreadPoolExecutor(max_workers=4)
         self.running = False
         
+        # Crawl incremental da verificação periódica
+        self.fingerprints = ArmazemFingerprints()
+        self.crawler = CrawlerIncremental(self.fingerprints)
+        self.fronteira = FronteiraCrawl()
+        
+        self.progresso = ProgressoProcessamento()
+        
     def iniciar_busca_automatica(self):
         """
         Inicia a busca automática de provas em background
@@ -42,8 +61,8 @@ class ProvaOrchestrator:
         self.running = True
         
         # Configurar agendamento
-        schedule.every(6).hours.do(self.executar_busca_completa)
-        schedule.every(2).hours.do(self.verificar_novas_provas)
+        schedule.every(6).hours.do(lambda: asyncio.run(self.executar_busca_completa()))
+        schedule.every(INTERVALO_VERIFICACAO_MINUTOS).minutes.do(lambda: asyncio.run(self.verificar_novas_provas()))
         
         # Iniciar thread de agendamento
         scheduler_thread = Thread(target=self._executar_scheduler, daemon=True)
@@ -55,7 +74,7 @@ class ProvaOrchestrator:
         """Executa o scheduler em loop"""
         while self.running:
             schedule.run_pending()
-            time.sleep(300)  # Verificar a cada 5 minutos
+            time.sleep(60)  # Verificar a cada minuto
     
     def parar_busca_automatica(self):
         """Para a busca automática de provas"""
@@ -158,16 +177,13 @@ class ProvaOrchestrator:
                     status_processamento="processando"
                 )
                 self.db.add(prova)
-                self.db.commit()
-                self.db.refresh(prova)
             else:
                 prova = prova_existente
                 prova.status_processamento = "processando"
-                self.db.commit()
             
-            # Criar log de processamento
+            # Criar log de processamento (mesmo commit da prova)
             processamento = ProcessamentoProva(
-                prova_id=prova.id,
+                prova=prova,
                 status="iniciado",
                 progresso=0
             )
@@ -186,72 +202,111 @@ class ProvaOrchestrator:
             processamento.questoes_total = len(questoes_raw)
             self.db.commit()
             
-            # Processar e salvar questões
-            questoes_salvas = 0
+            # Validar e avaliar as questões em memória
+            questoes = []
             for i, questao_raw in enumerate(questoes_raw):
                 try:
                     questao_processada = scraper._processar_questao(questao_raw)
                     if questao_processada:
-                        questao = Questao(
-                            prova_id=prova.id,
-                            numero=questao_processada['numero'],
-                            enunciado=questao_processada['enunciado'],
-                            opcoes=questao_processada['opcoes'],
-                            gabarito=questao_processada['gabarito'],
-                            disciplina=questao_processada['disciplina'],
-                            nivel_dificuldade=questao_processada['nivel_dificuldade'],
-                            explicacao=questao_processada.get('explicacao', ''),
-                            fonte=questao_processada['fonte'],
-                            ano_original=questao_processada.get('ano'),
-                            banca_original=questao_processada['fonte'],
-                            tags=questao_processada.get('tags', [])
-                        )
-                        
-                        self.db.add(questao)
-                        questoes_salvas += 1
-                        
-                        # Avaliar qualidade da questão
-                        self._avaliar_qualidade_questao(questao)
-                        
+                        questoes.append((
+                            self._mapear_questao(prova.id, questao_processada),
+                            self._avaliar_qualidade_questao(questao_processada)
+                        ))
                 except Exception as e:
                     logger.error(f"Erro ao processar questão {i + 1}: {e}")
                     continue
+            
+            # Inserir questões e avaliações em lotes, na mesma transação
+            questoes_salvas = []
+            for inicio in range(0, len(questoes), PROVA_LOTE_QUESTOES):
+                lote = questoes[inicio:inicio + PROVA_LOTE_QUESTOES]
+                ids = self.db.execute(
+                    insert(Questao.__table__).returning(Questao.id, sort_by_parameter_order=True),
+                    [questao for questao, _ in lote]
+                ).scalars().all()
+                self.db.execute(
+                    insert(QualidadeQuestao.__table__),
+                    [{**qualidade, 'questao_id': questao_id} for questao_id, (_, qualidade) in zip(ids, lote)]
+                )
+                questoes_salvas.extend({**questao, 'id': questao_id} for questao_id, (questao, _) in zip(ids, lote))
                 
-                # Atualizar progresso
-                processamento.questoes_processadas = i + 1
-                processamento.progresso = int((i + 1) / len(questoes_raw) * 100)
-                self.db.commit()
+                self.progresso.reportar(self.db, processamento.id, len(questoes_salvas), len(questoes))
+            
+            # Gerar estatísticas da prova a partir do lote em memória
+            await self._gerar_estatisticas_prova(prova.id, questoes_salvas)
             
             # Finalizar processamento
             prova.status_processamento = "processado"
             processamento.status = "concluido"
             processamento.progresso = 100
+            processamento.questoes_processadas = len(questoes_raw)
             processamento.tempo_processamento = int((datetime.now() - processamento.created_at).total_seconds())
             
             self.db.commit()
+            self.progresso.finalizar(processamento.id, len(questoes_raw), len(questoes_raw))
             
-            # Gerar estatísticas da prova
-            await self._gerar_estatisticas_prova(prova.id)
-            
-            logger.info(f"Prova processada com sucesso: {questoes_salvas} questões salvas")
+            logger.info(f"Prova processada com sucesso: {len(questoes_salvas)} questões salvas")
             
             return {
                 "status": "sucesso",
                 "prova_id": prova.id,
-                "questoes_salvas": questoes_salvas,
+                "questoes_salvas": len(questoes_salvas),
                 "questoes_total": len(questoes_raw)
             }
             
         except Exception as e:
             logger.error(f"Erro ao processar prova: {e}")
+            self.db.rollback()
             
             # Marcar como erro
             if 'prova' in locals():
                 prova.status_processamento = "erro"
+                if 'processamento' in locals():
+                    processamento.status = "erro"
+                    processamento.erros = [str(e)]
                 self.db.commit()
             
             return {"status": "erro", "erro": str(e)}
     
+    @staticmethod
+    def _mapear_questao(prova_id: int, questao_processada: Dict) -> Dict:
+        """Linha da tabela questoes para o INSERT em lote"""
+        return {
+            'prova_id': prova_id,
+            'numero': questao_processada['numero'],
+            'enunciado': questao_processada['enunciado'],
+            'opcoes': questao_processada['opcoes'],
+            'gabarito': questao_processada['gabarito'],
+            'disciplina': questao_processada['disciplina'],
+            'nivel_dificuldade': questao_processada['nivel_dificuldade'],
+            'explicacao': questao_processada.get('explicacao', ''),
+            'fonte': questao_processada['fonte'],
+            'ano_original': questao_processada.get('ano'),
+            'banca_original': questao_processada['fonte'],
+            'tags': questao_processada.get('tags', [])
+        }
+    
+    def obter_progresso_processamento(self, processamento_id: int) -> Optional[Dict]:
+        """
+        Progresso de um processamento: Redis quando configurado, senão o
+        registro de ProcessamentoProva
+        """
+        progresso = self.progresso.obter(processamento_id)
+        if progresso is not None:
+            return progresso
+        
+        processamento = self.db.query(ProcessamentoProva).filter(
+            ProcessamentoProva.id == processamento_id
+        ).first()
+        if not processamento:
+            return None
+        
+        return {
+            'questoes_processadas': processamento.questoes_processadas,
+            'questoes_total': processamento.questoes_total,
+            'progresso': processamento.progresso
+        }
+    
     def _obter_banca_id(self, nome_banca: str) -> int:
         """
         Obtém o ID da banca no banco de dados
@@ -271,9 +326,10 @@ class ProvaOrchestrator:
         
         return banca.id
     
-    def _avaliar_qualidade_questao(self, questao: Questao):
+    def _avaliar_qualidade_questao(self, questao: Dict) -> Dict:
         """
-        Avalia a qualidade de uma questão
+        Avalia a qualidade de uma questão (em memória; o questao_id é
+        preenchido no INSERT em lote)
         """
         try:
             criterios = {}
@@ -281,11 +337,11 @@ class ProvaOrchestrator:
             sugestoes = []
             
             # Critério: Clareza do enunciado
-            if len(questao.enunciado) < 50:
+            if len(questao['enunciado']) < 50:
                 criterios['clareza'] = 0.3
                 problemas.append("Enunciado muito curto")
                 sugestoes.append("Expandir o enunciado")
-            elif len(questao.enunciado) > 1000:
+            elif len(questao['enunciado']) > 1000:
                 criterios['clareza'] = 0.6
                 problemas.append("Enunciado muito longo")
                 sugestoes.append("Simplificar o enunciado")
@@ -293,11 +349,11 @@ class ProvaOrchestrator:
                 criterios['clareza'] = 0.9
             
             # Critério: Número de opções
-            if len(questao.opcoes) < 4:
+            if len(questao['opcoes']) < 4:
                 criterios['opcoes'] = 0.5
                 problemas.append("Número insuficiente de opções")
                 sugestoes.append("Adicionar mais opções")
-            elif len(questao.opcoes) > 5:
+            elif len(questao['opcoes']) > 5:
                 criterios['opcoes'] = 0.7
                 problemas.append("Muitas opções")
                 sugestoes.append("Reduzir número de opções")
@@ -305,7 +361,7 @@ class ProvaOrchestrator:
                 criterios['opcoes'] = 1.0
             
             # Critério: Disciplina identificada
-            if questao.disciplina and questao.disciplina != 'geral':
+            if questao.get('disciplina') and questao['disciplina'] != 'geral':
                 criterios['disciplina'] = 1.0
             else:
                 criterios['disciplina'] = 0.5
@@ -313,7 +369,7 @@ class ProvaOrchestrator:
                 sugestoes.append("Classificar disciplina")
             
             # Critério: Gabarito válido
-            if questao.gabarito and questao.gabarito in ['A', 'B', 'C', 'D', 'E']:
+            if questao.get('gabarito') and questao['gabarito'] in ['A', 'B', 'C', 'D', 'E']:
                 criterios['gabarito'] = 1.0
             else:
                 criterios['gabarito'] = 0.0
@@ -323,33 +379,34 @@ class ProvaOrchestrator:
             # Calcular score geral
             score_qualidade = sum(criterios.values()) / len(criterios)
             
-            # Criar avaliação de qualidade
-            qualidade = QualidadeQuestao(
-                questao_id=questao.id,
-                score_qualidade=score_qualidade,
-                criterios_avaliacao=criterios,
-                problemas_identificados=problemas,
-                sugestoes_melhoria=sugestoes,
-                aprovada=score_qualidade >= 0.7,
-                revisada_por="sistema"
-            )
-            
-            self.db.add(qualidade)
+            return {
+                'score_qualidade': score_qualidade,
+                'criterios_avaliacao': criterios,
+                'problemas_identificados': problemas,
+                'sugestoes_melhoria': sugestoes,
+                'aprovada': score_qualidade >= 0.7,
+                'revisada_por': "sistema",
+                'data_avaliacao': datetime.utcnow()
+            }
             
         except Exception as e:
             logger.error(f"Erro ao avaliar qualidade da questão: {e}")
+            return {
+                'score_qualidade': 0.0,
+                'criterios_avaliacao': {},
+                'problemas_identificados': [f"Falha na avaliação: {e}"],
+                'sugestoes_melhoria': [],
+                'aprovada': False,
+                'revisada_por': "sistema",
+                'data_avaliacao': datetime.utcnow()
+            }
     
-    async def _gerar_estatisticas_prova(self, prova_id: int):
+    async def _gerar_estatisticas_prova(self, prova_id: int, questoes: List[Dict]):
         """
-        Gera estatísticas de uma prova
+        Gera estatísticas de uma prova a partir das questões recém-inseridas
+        (com 'id'); o commit fica com o chamador
         """
         try:
-            prova = self.db.query(Prova).filter(Prova.id == prova_id).first()
-            if not prova:
-                return
-            
-            questoes = self.db.query(Questao).filter(Questao.prova_id == prova_id).all()
-            
             if not questoes:
                 return
             
@@ -359,17 +416,17 @@ class ProvaOrchestrator:
             # Questões por disciplina
             disciplinas = {}
             for questao in questoes:
-                disciplina = questao.disciplina or 'Não identificada'
+                disciplina = questao.get('disciplina') or 'Não identificada'
                 disciplinas[disciplina] = disciplinas.get(disciplina, 0) + 1
             
             # Nível de dificuldade médio
             niveis = {'facil': 1, 'medio': 2, 'dificil': 3}
-            dificuldade_media = sum(niveis.get(q.nivel_dificuldade, 2) for q in questoes) / total_questoes
+            dificuldade_media = sum(niveis.get(q.get('nivel_dificuldade'), 2) for q in questoes) / total_questoes
             
             # Questões mais difíceis e mais fáceis
-            questoes_ordenadas = sorted(questoes, key=lambda q: niveis.get(q.nivel_dificuldade, 2))
-            mais_faceis = [q.id for q in questoes_ordenadas[:5]]
-            mais_dificeis = [q.id for q in questoes_ordenadas[-5:]]
+            questoes_ordenadas = sorted(questoes, key=lambda q: niveis.get(q.get('nivel_dificuldade'), 2))
+            mais_faceis = [q['id'] for q in questoes_ordenadas[:5]]
+            mais_dificeis = [q['id'] for q in questoes_ordenadas[-5:]]
             
             # Criar estatísticas
             estatisticas = EstatisticaProva(
@@ -385,55 +442,44 @@ class ProvaOrchestrator:
             )
             
             self.db.add(estatisticas)
-            self.db.commit()
             
         except Exception as e:
             logger.error(f"Erro ao gerar estatísticas da prova: {e}")
     
     async def _salvar_provas(self, resultados: Dict[str, List[Dict]]):
         """
-        Salva as provas encontradas no banco de dados
+        Salva as provas encontradas no banco de dados (upsert em lote por
+        url_original, sem consulta por prova)
         """
         try:
-            for banca, provas in resultados.items():
-                for prova_data in provas:
-                    await self._salvar_prova(prova_data, banca)
+            provas = [
+                {**prova_data, 'banca': banca}
+                for banca, lista in resultados.items() for prova_data in lista
+            ]
+            total = self._upsert_provas(provas)
+            
+            # Mantém as impressões dos itens em dia para a verificação incremental
+            self.fingerprints.carregar(self.db)
+            for prova_data in provas:
+                if prova_data.get('url'):
+                    self.crawler.registrar_item(prova_data)
+            self.fingerprints.persistir(self.db, (TIPO_ITEM,))
             
             self.db.commit()
-            logger.info("Provas salvas no banco de dados")
+            logger.info(f"Provas salvas no banco de dados ({total} provas)")
             
         except Exception as e:
             logger.error(f"Erro ao salvar provas: {e}")
             self.db.rollback()
+            self.fingerprints.descartar_pendentes()
     
-    async def _salvar_prova(self, prova_data: Dict, banca: str):
-        """
-        Salva uma prova no banco de dados
-        """
-        try:
-            # Verificar se a prova já existe
-            prova_existente = self.db.query(Prova).filter(
-                Prova.url_original == prova_data.get('url')
-            ).first()
-            
-            if prova_existente:
-                # Atualizar dados existentes
-                prova_existente.updated_at = datetime.now()
-                return
-            
-            # Criar nova prova
-            prova = Prova(
-                banca_id=self._obter_banca_id(banca),
-                titulo=prova_data.get('titulo', ''),
-                url_original=prova_data.get('url', ''),
-                status_processamento="pendente",
-                metadados=prova_data
-            )
-            
-            self.db.add(prova)
-            
-        except Exception as e:
-            logger.error(f"Erro ao salvar prova: {e}")
+    def _upsert_provas(self, provas: List[Dict]) -> int:
+        """Upsert em lote, resolvendo o ID de cada banca uma única vez"""
+        banca_ids = {
+            banca: self._obter_banca_id(banca)
+            for banca in {p.get('banca') for p in provas if p.get('url')}
+        }
+        return upsert_provas(self.db, provas, banca_ids)
     
     def obter_estatisticas_provas(self) -> Dict:
         """
@@ -483,32 +529,67 @@ class ProvaOrchestrator:
     
     async def verificar_novas_provas(self) -> Dict[str, List[Dict]]:
         """
-        Verifica se há novas provas desde a última verificação
+        Verifica novas/alteradas desde a última verificação (crawl incremental):
+        listagens sem mudança são puladas, provas sem mudança são descartadas
+        pelas impressões digitais e o restante entra na fronteira, gravada por
+        prioridade com um único upsert por ciclo
         """
         logger.info("Verificando novas provas")
         novas_provas = {}
         
-        for nome, scraper in self.scrapers.items():
-            try:
-                # Buscar provas
-                provas = scraper.buscar_provas(limite=10)
-                
-                # Verificar quais são novas
-                provas_novas = []
-                for prova in provas:
-                    existe = self.db.query(Prova).filter(
-                        Prova.url_original == prova['url']
-                    ).first()
-                    
-                    if not existe:
-                        provas_novas.append(prova)
-                
-                if provas_novas:
-                    novas_provas[nome] = provas_novas
-                    logger.info(f"Encontradas {len(provas_novas)} novas provas em {nome}")
-                
-            except Exception as e:
-                logger.error(f"Erro ao verificar novas provas em {nome}: {e}")
+        # Uma consulta por ciclo para as impressões digitais (sessão só na thread do loop)
+        try:
+            self.fingerprints.carregar(self.db)
+        except Exception as e:
+            logger.error(f"Erro ao carregar impressões digitais: {e}")
+            return novas_provas
+        
+        loop = asyncio.get_running_loop()
+        nomes = list(self.scrapers)
+        verificacoes = await asyncio.gather(*(
+            loop.run_in_executor(self.executor, self.scrapers[nome].verificar_novas_provas, 10, self.crawler)
+            for nome in nomes
+        ), return_exceptions=True)
+        
+        for nome, encontradas in zip(nomes, verificacoes):
+            if isinstance(encontradas, Exception):
+                logger.error(f"Erro ao verificar novas provas em {nome}: {encontradas}")
+                continue
+            
+            for prova in encontradas or []:
+                if self.crawler.item_alterado(prova):
+                    self.fronteira.adicionar(prova)
+        
+        lote = self.fronteira.retirar_lote(CRAWL_MAX_ITENS_POR_CICLO)
+        try:
+            self._upsert_provas(lote)
+            for prova in lote:
+                self.crawler.registrar_item(prova)
+            
+            # Com itens pendentes na fronteira, a listagem é buscada de novo no
+            # próximo ciclo (a fronteira vive só em memória)
+            tipos = (TIPO_PAGINA, TIPO_ITEM) if not len(self.fronteira) else (TIPO_ITEM,)
+            self.fingerprints.persistir(self.db, tipos)
+            self.db.commit()
+            
+        except Exception as e:
+            logger.error(f"Erro ao salvar provas verificadas: {e}")
+            self.db.rollback()
+            self.fingerprints.descartar_pendentes()
+            for prova in lote:
+                self.fronteira.adicionar(prova)
+            return novas_provas
+        
+        self.fingerprints.descartar_pendentes()
+        
+        for prova in lote:
+            novas_provas.setdefault(prova.get('banca', ''), []).append(prova)
+        
+        for nome, novas in novas_provas.items():
+            logger.info(f"Encontradas {len(novas)} novas provas em {nome}")
+        
+        if len(self.fronteira):
+            logger.info(f"{len(self.fronteira)} provas aguardando o próximo ciclo")
         
         return novas_provas
 
@@ -0,0 +1,43 @@
+import os
+import sys
+import tempfile
+
+# The app binds its engine at import time, so point it at a scratch database first
+_db_dir = tempfile.mkdtemp(prefix="concurso_ai_tests_")
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(_db_dir, 'test.db')}"
+os.environ.pop("CLOUD_SQL_DATABASE_URL", None)
+os.environ.pop("USER_CACHE_REDIS_URL", None)
+os.environ.pop("DATABASE_ASYNC", None)
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.auth import user_cache
+from app.database import engine
+from app.main import app
+from app.models import Base
+
+
+@pytest.fixture
+def client():
+    Base.metadata.create_all(bind=engine)
+    user_cache.clear()
+    try:
+        with TestClient(app) as test_client:
+            yield test_client
+    finally:
+        Base.metadata.drop_all(bind=engine)
+
+
+@pytest.fixture
+def auth_headers(client):
+    """Register and log in a user; returns the Authorization header"""
+    user = {"email": "candidato@example.com", "name": "Candidato", "password": "senha-segura-123"}
+    response = client.post("/auth/register", json=user)
+    assert response.status_code == 200, response.text
+    
+    response = client.post("/auth/login", data={"username": user["email"], "password": user["password"]})
+    assert response.status_code == 200, response.text
+    return {"Authorization": f"Bearer {response.json()['access_token']}"}
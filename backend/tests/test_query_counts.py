@@ -0,0 +1,120 @@
+"""Statement-count regression tests for the simulado and dashboard endpoints"""
+from contextlib import contextmanager
+
+import pytest
+from sqlalchemy import event
+
+from app.database import SessionLocal, engine
+from app.models import Question
+
+SUBJECTS = ["Direito Constitucional", "Português"]
+
+
+@contextmanager
+def count_statements():
+    """Collect the SQL statements sent to the engine inside the block"""
+    statements = []
+    
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+    
+    event.listen(engine, "before_cursor_execute", before_cursor_execute)
+    try:
+        yield statements
+    finally:
+        event.remove(engine, "before_cursor_execute", before_cursor_execute)
+
+
+def seed_questions(count_per_subject: int):
+    db = SessionLocal()
+    try:
+        for subject in SUBJECTS:
+            for i in range(count_per_subject):
+                db.add(Question(
+                    text=f"{subject} {i}",
+                    options=["a", "b", "c", "d"],
+                    correct_answer=i % 4,
+                    subject=subject,
+                    banca="CESPE",
+                    level="intermediario",
+                    year=2023
+                ))
+        db.commit()
+    finally:
+        db.close()
+
+
+def create_simulado(client, headers, num_questions: int) -> dict:
+    config = {
+        "banca": "CESPE",
+        "subjects": SUBJECTS,
+        "num_questions": num_questions,
+        "time_limit": 60,
+        "level": "intermediario"
+    }
+    response = client.post("/simulados/", headers=headers, json={
+        "title": f"Simulado {num_questions}",
+        "config": config,
+        "time_limit": 60,
+        "total_questions": num_questions
+    })
+    assert response.status_code == 200, response.text
+    
+    response = client.get(f"/simulados/{response.json()['id']}", headers=headers)
+    assert response.status_code == 200, response.text
+    return response.json()
+
+
+def submit(client, headers, simulado: dict):
+    answers = {str(question["id"]): 0 for question in simulado["questions"]}
+    return client.post(f"/simulados/{simulado['id']}/submit", headers=headers, json={
+        "simulado_id": simulado["id"],
+        "answers": answers,
+        "time_spent": 600,
+        "subject_scores": {}
+    })
+
+
+@pytest.mark.parametrize("num_questions", [4, 40])
+def test_get_simulado_uses_two_statements(client, auth_headers, num_questions):
+    seed_questions(40)
+    simulado = create_simulado(client, auth_headers, num_questions)
+    assert len(simulado["questions"]) == num_questions
+    
+    with count_statements() as statements:
+        response = client.get(f"/simulados/{simulado['id']}", headers=auth_headers)
+    
+    assert response.status_code == 200
+    assert len(statements) == 2, statements
+
+
+def test_submit_statement_count_does_not_grow_with_questions(client, auth_headers):
+    seed_questions(40)
+    small = create_simulado(client, auth_headers, 4)
+    large = create_simulado(client, auth_headers, 40)
+    
+    counts = []
+    for simulado in (small, large):
+        with count_statements() as statements:
+            response = submit(client, auth_headers, simulado)
+        assert response.status_code == 200, response.text
+        counts.append(len(statements))
+    
+    assert counts[0] == counts[1]
+    assert counts[1] <= 10
+
+
+def test_dashboard_statement_count_does_not_grow_with_questions(client, auth_headers):
+    seed_questions(40)
+    client.get("/dashboard/stats", headers=auth_headers)
+    
+    counts = []
+    for num_questions in (4, 40):
+        assert submit(client, auth_headers, create_simulado(client, auth_headers, num_questions)).status_code == 200
+        with count_statements() as statements:
+            response = client.get("/dashboard/stats", headers=auth_headers)
+        assert response.status_code == 200, response.text
+        counts.append(len(statements))
+    
+    assert counts[0] == counts[1]
+    assert counts[1] == 1
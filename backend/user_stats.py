@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+"""
+Script para recalcular e verificar as estatísticas materializadas do dashboard
+
+Uso:
+    python user_stats.py backfill [--user-id ID]
+    python user_stats.py check [--fix]
+"""
+
+import argparse
+from app.database import engine, SessionLocal
+from app.models import Base, User
+from app import crud
+
+# Create the user_stats table if missing
+Base.metadata.create_all(bind=engine)
+
+
+def _user_ids(db, user_id=None):
+    if user_id is not None:
+        return [user_id]
+    return [row.id for row in db.query(User.id).order_by(User.id).yield_per(1000)]
+
+
+def backfill(user_id=None):
+    """Recompute stats for all users (or a single user)"""
+    db = SessionLocal()
+    try:
+        user_ids = _user_ids(db, user_id)
+        for uid in user_ids:
+            crud.rebuild_user_stats(db, uid)
+        print(f"Rebuilt stats for {len(user_ids)} users.")
+    finally:
+        db.close()
+
+
+def check(fix=False):
+    """Report users whose stored stats differ from their history"""
+    db = SessionLocal()
+    try:
+        inconsistent = 0
+        for uid in _user_ids(db):
+            differences = crud.check_user_stats(db, uid)
+            if not differences:
+                continue
+            
+            inconsistent += 1
+            print(f"User {uid}: {differences}")
+            if fix:
+                crud.rebuild_user_stats(db, uid)
+        
+        print(f"{inconsistent} users with inconsistent stats" + (" (fixed)" if fix and inconsistent else ""))
+        return inconsistent
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Dashboard stats maintenance")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    
+    backfill_parser = subparsers.add_parser("backfill", help="Recompute stats from history")
+    backfill_parser.add_argument("--user-id", type=int)
+    
+    check_parser = subparsers.add_parser("check", help="Verify stored stats against history")
+    check_parser.add_argument("--fix", action="store_true", help="Rebuild inconsistent stats")
+    
+    args = parser.parse_args()
+    if args.command == "backfill":
+        backfill(args.user_id)
+    else:
+        raise SystemExit(1 if check(args.fix) else 0)
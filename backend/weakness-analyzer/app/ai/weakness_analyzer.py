@@ -1,7 +1,9 @@
 import numpy as np
 import pandas as pd
 from typing import List, Dict, Optional, Tuple, Any
+import hashlib
 import logging
+import os
 from datetime import datetime, timedelta
 import json
 from sklearn.cluster import KMeans, DBSCAN
@@ -12,16 +14,233 @@ from sklearn.metrics import silhouette_score
 import spacy
 from textblob import TextBlob
 import re
-from collections import defaultdict, Counter
+from collections import defaultdict, Counter, OrderedDict
+from concurrent.futures import ProcessPoolExecutor
 import math
+import random
+import threading
+import time
+import redis
 
 logger = logging.getLogger(__name__)
 
+# Cache de features de NLP dos enunciados
+NLP_CACHE_MAX_SIZE = int(os.getenv('WEAKNESS_NLP_CACHE_SIZE', '50000'))
+NLP_CACHE_REDIS_URL = os.getenv('WEAKNESS_NLP_CACHE_REDIS_URL')
+NLP_CACHE_TTL = int(os.getenv('WEAKNESS_NLP_CACHE_TTL', str(30 * 24 * 3600)))
+NLP_PROCESS_POOL_MIN_TEXTS = int(os.getenv('WEAKNESS_NLP_POOL_MIN_TEXTS', '2000'))
+NLP_PROCESS_POOL_WORKERS = int(os.getenv('WEAKNESS_NLP_POOL_WORKERS', '0')) or os.cpu_count() or 1
+
+def _calcular_features_textos(textos: List[str]) -> List[Dict]:
+    """
+    Calcula as features de NLP de um lote de enunciados (pode rodar em outro processo)
+    """
+    features = []
+    for texto in textos:
+        texto_lower = texto.lower()
+        features.append({
+            'sentimento': TextBlob(texto).sentiment.polarity,
+            'negacao': 'não' in texto_lower or 'exceto' in texto_lower
+        })
+    return features
+
+class NLPFeatureCache:
+    """
+    Features de NLP por enunciado, memoizadas pelo hash do texto
+    
+    Mantém um LRU em memória compartilhado por todas as análises do processo e, se
+    configurado, um cache persistente no Redis compartilhado entre réplicas. Textos
+    ausentes são processados em lote, em um pool de processos quando o lote é grande.
+    """
+    
+    def __init__(self, max_size: int = 50000, redis_url: Optional[str] = None, ttl: int = NLP_CACHE_TTL):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._cache: "OrderedDict[str, Dict]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.redis = None
+        if redis_url:
+            try:
+                self.redis = redis.Redis.from_url(redis_url, decode_responses=True)
+            except Exception as e:
+                logger.warning(f"Cache Redis de NLP indisponível: {e}")
+    
+    @staticmethod
+    def chave(texto: str) -> str:
+        return hashlib.sha1(texto.encode('utf-8')).hexdigest()
+    
+    def _guardar(self, chave: str, features: Dict):
+        with self._lock:
+            self._cache[chave] = features
+            self._cache.move_to_end(chave)
+            while len(self._cache) > self.max_size:
+                self._cache.popitem(last=False)
+    
+    def obter_features(self, textos: List[str]) -> Dict[str, Dict]:
+        """
+        Retorna um dict texto -> features para todos os textos informados
+        """
+        resultado = {}
+        pendentes = {}
+        
+        with self._lock:
+            for texto in set(textos):
+                chave = self.chave(texto)
+                features = self._cache.get(chave)
+                if features is not None:
+                    self._cache.move_to_end(chave)
+                    resultado[texto] = features
+                else:
+                    pendentes[chave] = texto
+        
+        if pendentes and self.redis is not None:
+            self._carregar_redis(pendentes, resultado)
+        
+        if pendentes:
+            chaves = list(pendentes)
+            calculadas = self._calcular([pendentes[chave] for chave in chaves])
+            for chave, features in zip(chaves, calculadas):
+                self._guardar(chave, features)
+                resultado[pendentes[chave]] = features
+            
+            if self.redis is not None:
+                self._salvar_redis({chave: features for chave, features in zip(chaves, calculadas)})
+        
+        return resultado
+    
+    def _calcular(self, textos: List[str]) -> List[Dict]:
+        if len(textos) < NLP_PROCESS_POOL_MIN_TEXTS or NLP_PROCESS_POOL_WORKERS < 2:
+            return _calcular_features_textos(textos)
+        
+        tamanho_lote = math.ceil(len(textos) / (NLP_PROCESS_POOL_WORKERS * 4))
+        lotes = [textos[i:i + tamanho_lote] for i in range(0, len(textos), tamanho_lote)]
+        try:
+            with ProcessPoolExecutor(max_workers=NLP_PROCESS_POOL_WORKERS) as executor:
+                return [features for lote in executor.map(_calcular_features_textos, lotes) for features in lote]
+        except Exception as e:
+            logger.warning(f"Pool de processos de NLP indisponível, processando localmente: {e}")
+            return _calcular_features_textos(textos)
+    
+    def _carregar_redis(self, pendentes: Dict[str, str], resultado: Dict[str, Dict]):
+        chaves = list(pendentes)
+        try:
+            valores = self.redis.mget([f"nlp_features:{chave}" for chave in chaves])
+        except Exception as e:
+            logger.warning(f"Erro ao ler cache Redis de NLP: {e}")
+            return
+        
+        for chave, valor in zip(chaves, valores):
+            if valor:
+                features = json.loads(valor)
+                self._guardar(chave, features)
+                resultado[pendentes.pop(chave)] = features
+    
+    def _salvar_redis(self, features_por_chave: Dict[str, Dict]):
+        try:
+            pipe = self.redis.pipeline(transaction=False)
+            for chave, features in features_por_chave.items():
+                pipe.setex(f"nlp_features:{chave}", self.ttl, json.dumps(features))
+            pipe.execute()
+        except Exception as e:
+            logger.warning(f"Erro ao gravar cache Redis de NLP: {e}")
+
+# Cache compartilhado por todas as instâncias do analisador no processo
+nlp_feature_cache = NLPFeatureCache(max_size=NLP_CACHE_MAX_SIZE, redis_url=NLP_CACHE_REDIS_URL)
+
+# Estatísticas suficientes por usuário (análise incremental)
+WEAKNESS_STATS_REDIS_URL = os.getenv('WEAKNESS_STATS_REDIS_URL')
+WEAKNESS_STATS_MEMORY_MAX_USERS = int(os.getenv('WEAKNESS_STATS_MEMORY_MAX_USERS', '10000'))
+# Tamanho da amostra (reservoir) de erros usada no clustering
+WEAKNESS_ERROS_AMOSTRA = int(os.getenv('WEAKNESS_ERRORS_SAMPLE_SIZE', '256'))
+VERSAO_ESTATISTICAS = 2
+
+class EstatisticasStore:
+    """
+    Armazena as estatísticas acumuladas de cada usuário (Redis quando configurado, senão
+    memória limitada a `max_usuarios`, com descarte LRU)
+    
+    `atualizar` aplica a função de atualização de forma atômica: WATCH/MULTI no Redis,
+    lock no modo em memória.
+    """
+    
+    def __init__(self, redis_url: Optional[str] = None, max_usuarios: int = WEAKNESS_STATS_MEMORY_MAX_USERS,
+                 tentativas: int = 20):
+        self.max_usuarios = max_usuarios
+        self.tentativas = tentativas
+        self._memoria: "OrderedDict[str, str]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.redis = None
+        if redis_url:
+            try:
+                self.redis = redis.Redis.from_url(redis_url, decode_responses=True)
+            except Exception as e:
+                logger.warning(f"Store Redis de estatísticas indisponível, usando memória: {e}")
+    
+    @staticmethod
+    def _chave(user_id: str) -> str:
+        return f"weakness_stats:{user_id}"
+    
+    def _guardar_memoria(self, chave: str, dados: str):
+        self._memoria[chave] = dados
+        self._memoria.move_to_end(chave)
+        while len(self._memoria) > self.max_usuarios:
+            self._memoria.popitem(last=False)
+    
+    def carregar(self, user_id: str) -> Optional[Dict]:
+        if self.redis is not None:
+            dados = self.redis.get(self._chave(user_id))
+        else:
+            with self._lock:
+                dados = self._memoria.get(self._chave(user_id))
+        return json.loads(dados) if dados else None
+    
+    def salvar(self, user_id: str, estatisticas: Dict):
+        dados = json.dumps(estatisticas, default=str)
+        if self.redis is not None:
+            self.redis.set(self._chave(user_id), dados)
+        else:
+            with self._lock:
+                self._guardar_memoria(self._chave(user_id), dados)
+    
+    def atualizar(self, user_id: str, funcao) -> Dict:
+        """
+        Lê o estado do usuário, aplica `funcao(estado_ou_None) -> novo_estado` e grava,
+        sem perder atualizações concorrentes (a função pode ser reaplicada em conflito)
+        """
+        chave = self._chave(user_id)
+        
+        if self.redis is None:
+            with self._lock:
+                dados = self._memoria.get(chave)
+                estatisticas = funcao(json.loads(dados) if dados else None)
+                self._guardar_memoria(chave, json.dumps(estatisticas, default=str))
+                return estatisticas
+        
+        with self.redis.pipeline() as pipe:
+            for tentativa in range(self.tentativas):
+                try:
+                    pipe.watch(chave)
+                    dados = pipe.get(chave)
+                    estatisticas = funcao(json.loads(dados) if dados else None)
+                    pipe.multi()
+                    pipe.set(chave, json.dumps(estatisticas, default=str))
+                    pipe.execute()
+                    return estatisticas
+                except redis.WatchError:
+                    # Espera aleatória crescente para desfazer a disputa entre réplicas
+                    time.sleep(random.uniform(0, 0.01 * (tentativa + 1)))
+        
+        raise RuntimeError(f"Conflito persistente ao atualizar estatísticas do usuário {user_id}")
+
+estatisticas_store = EstatisticasStore(redis_url=WEAKNESS_STATS_REDIS_URL)
+
 class WeaknessAnalyzer:
     """
     Analisador de pontos fracos e fortes usando IA avançada
     """
     
+    NIVEIS_DIFICULDADE = {'facil': 1, 'medio': 2, 'dificil': 3}
+    
     def __init__(self):
         self.nlp = None
         self._carregar_modelo_nlp()
@@ -29,6 +248,7 @@ class WeaknessAnalyzer:
         self.habilidades_mapeadas = {}
         self.modelo_clustering = None
         self.scaler = StandardScaler()
+        self.stats_store = estatisticas_store
         
     def _carregar_modelo_nlp(self):
         """
@@ -45,195 +265,450 @@ class WeaknessAnalyzer:
                 logger.error("Nenhum modelo spaCy disponível")
                 self.nlp = None
     
-    def analisar_pontos_fracos_completo(self, dados_usuario: Dict) -> Dict:
+    def analisar_pontos_fracos_completo(self, dados_usuario: Dict, user_id: Optional[str] = None) -> Dict:
         """
         Análise completa de pontos fracos e fortes do usuário
+        
+        Se `user_id` for informado, as estatísticas acumuladas são gravadas e servem de
+        base para as próximas chamadas de analisar_pontos_fracos_incremental.
         """
         try:
             logger.info("Iniciando análise completa de pontos fracos")
             
-            # Extrair dados do usuário
-            simulados = dados_usuario.get('simulados', [])
             questoes_respondidas = dados_usuario.get('questoes_respondidas', [])
-            tempo_estudo = dados_usuario.get('tempo_estudo', {})
-            historico_performance = dados_usuario.get('historico_performance', [])
-            
-            # Análise multidimensional
-            analise_disciplinas = self._analisar_por_disciplina(questoes_respondidas)
-            analise_padroes_erro = self._identificar_padroes_erro(questoes_respondidas)
-            analise_tempo = self._analisar_tempo_resposta(questoes_respondidas)
-            analise_evolucao = self._analisar_evolucao_performance(historico_performance)
-            analise_habilidades = self._mapear_habilidades(questoes_respondidas)
-            analise_clustering = self._analisar_clusters_erro(questoes_respondidas)
-            
-            # Análise de tendências
-            tendencias = self._identificar_tendencias(historico_performance)
-            
-            # Predição de melhoria
-            predicao_melhoria = self._predizer_melhoria(analise_disciplinas, analise_evolucao)
-            
-            # Recomendações personalizadas
-            recomendacoes = self._gerar_recomendacoes_personalizadas(
-                analise_disciplinas, analise_padroes_erro, analise_habilidades, predicao_melhoria
-            )
             
-            # Score de pontos fracos
-            score_pontos_fracos = self._calcular_score_pontos_fracos(analise_disciplinas, analise_padroes_erro)
+            estatisticas = self._estatisticas_vazias()
+            df_questoes = self._filtrar_respostas_novas(estatisticas, self._montar_frame_questoes(questoes_respondidas))
+            self._acumular_estatisticas(estatisticas, df_questoes)
             
-            return {
-                'metadados': {
-                    'data_analise': datetime.now().isoformat(),
-                    'total_simulados': len(simulados),
-                    'total_questoes': len(questoes_respondidas),
-                    'periodo_analise': self._calcular_periodo_analise(questoes_respondidas),
-                    'versao_algoritmo': '2.0'
-                },
-                'analise_disciplinas': analise_disciplinas,
-                'padroes_erro': analise_padroes_erro,
-                'analise_tempo': analise_tempo,
-                'evolucao_performance': analise_evolucao,
-                'mapeamento_habilidades': analise_habilidades,
-                'clusters_erro': analise_clustering,
-                'tendencias': tendencias,
-                'predicao_melhoria': predicao_melhoria,
-                'recomendacoes': recomendacoes,
-                'score_pontos_fracos': score_pontos_fracos,
-                'resumo_executivo': self._gerar_resumo_executivo(
-                    analise_disciplinas, score_pontos_fracos, recomendacoes
-                )
-            }
+            if user_id is not None:
+                self.stats_store.salvar(user_id, estatisticas)
+            
+            return self._gerar_relatorio(estatisticas, dados_usuario)
             
         except Exception as e:
             logger.error(f"Erro na análise completa de pontos fracos: {e}")
             return {"erro": str(e)}
     
-    def _analisar_por_disciplina(self, questoes_respondidas: List[Dict]) -> Dict:
+    def analisar_pontos_fracos_incremental(self, user_id: str, dados_usuario: Dict) -> Dict:
         """
-        Análise detalhada por disciplina
+        Análise de pontos fracos atualizada apenas com as novas respostas do usuário
+        
+        `dados_usuario['questoes_respondidas']` deve conter as respostas posteriores à última
+        análise do usuário; respostas com `id` até a marca d'água já processada são ignoradas,
+        de modo que reenviar respostas não as conta duas vezes. O custo é proporcional às
+        respostas novas: o estado guardado tem tamanho fixo.
         """
         try:
-            disciplinas = defaultdict(lambda: {
+            logger.info(f"Iniciando análise incremental de pontos fracos do usuário {user_id}")
+            
+            novas_questoes = dados_usuario.get('questoes_respondidas', [])
+            df_novas = self._montar_frame_questoes(novas_questoes)
+            
+            def acumular(estatisticas: Optional[Dict]) -> Dict:
+                if estatisticas is None:
+                    estatisticas = self._estatisticas_vazias()
+                elif estatisticas.get('versao') != VERSAO_ESTATISTICAS:
+                    raise ValueError("Estatísticas do usuário incompatíveis com esta versão; execute a análise completa")
+                self._acumular_estatisticas(estatisticas, self._filtrar_respostas_novas(estatisticas, df_novas))
+                return estatisticas
+            
+            estatisticas = self.stats_store.atualizar(user_id, acumular)
+            
+            return self._gerar_relatorio(estatisticas, dados_usuario)
+            
+        except Exception as e:
+            logger.error(f"Erro na análise incremental de pontos fracos: {e}")
+            return {"erro": str(e)}
+    
+    def _gerar_relatorio(self, estatisticas: Dict, dados_usuario: Dict) -> Dict:
+        """
+        Gera o relatório de pontos fracos a partir das estatísticas acumuladas
+        """
+        # Extrair dados do usuário
+        simulados = dados_usuario.get('simulados', [])
+        tempo_estudo = dados_usuario.get('tempo_estudo', {})
+        historico_performance = dados_usuario.get('historico_performance', [])
+        
+        # Análise multidimensional
+        analise_disciplinas = self._analisar_por_disciplina(estatisticas)
+        analise_padroes_erro = self._identificar_padroes_erro(estatisticas['erros'])
+        analise_tempo = self._analisar_tempo_resposta(estatisticas)
+        analise_evolucao = self._analisar_evolucao_performance(historico_performance)
+        analise_habilidades = self._mapear_habilidades(estatisticas)
+        analise_clustering = self._analisar_clusters_erro(estatisticas['erros'])
+        
+        # Análise de tendências
+        tendencias = self._identificar_tendencias(historico_performance)
+        
+        # Predição de melhoria
+        predicao_melhoria = self._predizer_melhoria(analise_disciplinas, analise_evolucao)
+        
+        # Recomendações personalizadas
+        recomendacoes = self._gerar_recomendacoes_personalizadas(
+            analise_disciplinas, analise_padroes_erro, analise_habilidades, predicao_melhoria
+        )
+        
+        # Score de pontos fracos
+        score_pontos_fracos = self._calcular_score_pontos_fracos(analise_disciplinas, analise_padroes_erro)
+        
+        return {
+            'metadados': {
+                'data_analise': datetime.now().isoformat(),
+                'total_simulados': len(simulados),
+                'total_questoes': estatisticas['total_questoes'],
+                'periodo_analise': self._calcular_periodo_analise(estatisticas),
+                'versao_algoritmo': '2.0'
+            },
+            'analise_disciplinas': analise_disciplinas,
+            'padroes_erro': analise_padroes_erro,
+            'analise_tempo': analise_tempo,
+            'evolucao_performance': analise_evolucao,
+            'mapeamento_habilidades': analise_habilidades,
+            'clusters_erro': analise_clustering,
+            'tendencias': tendencias,
+            'predicao_melhoria': predicao_melhoria,
+            'recomendacoes': recomendacoes,
+            'score_pontos_fracos': score_pontos_fracos,
+            'resumo_executivo': self._gerar_resumo_executivo(
+                analise_disciplinas, score_pontos_fracos, recomendacoes
+            )
+        }
+    
+    def _montar_frame_questoes(self, questoes_respondidas: List[Dict]) -> pd.DataFrame:
+        """
+        Carrega as questões respondidas em um DataFrame compartilhado pelas análises
+        
+        Habilidades são extraídas uma vez por par (enunciado, disciplina) distinto e o tipo
+        de erro é classificado uma vez por questão errada.
+        """
+        colunas_padrao = {
+            'disciplina': 'Não identificada',
+            'acertou': False,
+            'tempo_resposta': 0,
+            'nivel_dificuldade': 'medio',
+            'enunciado': '',
+            'resposta_usuario': '',
+            'gabarito': ''
+        }
+        
+        df = pd.DataFrame.from_records(questoes_respondidas) if questoes_respondidas else pd.DataFrame()
+        for coluna, padrao in colunas_padrao.items():
+            if coluna not in df.columns:
+                df[coluna] = [padrao] * len(df)
+            else:
+                df[coluna] = df[coluna].where(df[coluna].notna(), padrao)
+        
+        df['acertou'] = df['acertou'].astype(bool)
+        df['tempo_resposta'] = pd.to_numeric(df['tempo_resposta'], errors='coerce').fillna(0)
+        df['enunciado'] = df['enunciado'].astype(str)
+        df['disciplina'] = df['disciplina'].astype(str)
+        df['nivel_numerico'] = df['nivel_dificuldade'].map(self.NIVEIS_DIFICULDADE).fillna(2).astype(int)
+        
+        # Habilidades por par distinto (enunciado, disciplina)
+        pares = df[['enunciado', 'disciplina']].drop_duplicates()
+        habilidades_por_par = {
+            (enunciado, disciplina): tuple(self._extrair_habilidades_questao(enunciado, disciplina))
+            for enunciado, disciplina in zip(pares['enunciado'].tolist(), pares['disciplina'].tolist())
+        }
+        df['habilidades'] = [
+            habilidades_por_par[(enunciado, disciplina)]
+            for enunciado, disciplina in zip(df['enunciado'].tolist(), df['disciplina'].tolist())
+        ]
+        
+        # Tipo de erro apenas para as questões erradas
+        erros = ~df['acertou']
+        df['tipo_erro'] = None
+        if erros.any():
+            df.loc[erros, 'tipo_erro'] = self._classificar_tipos_erro(df.loc[erros])
+        
+        return df
+    
+    def _classificar_tipos_erro(self, df_erros: pd.DataFrame) -> List[str]:
+        """
+        Classifica o tipo de erro de cada questão errada
+        """
+        colunas = ['enunciado', 'resposta_usuario', 'gabarito', 'tempo_resposta']
+        questoes = self._registros(df_erros, colunas)
+        
+        # Features de NLP em lote, apenas para os enunciados que chegam à análise de conteúdo
+        features_por_texto = {}
+        if self.nlp:
+            textos = [q['enunciado'] for q in questoes if 10 <= q['tempo_resposta'] <= 300]
+            features_por_texto = nlp_feature_cache.obter_features(textos)
+        
+        return [
+            self._classificar_tipo_erro(questao, features_por_texto.get(questao['enunciado']))
+            for questao in questoes
+        ]
+    
+    @staticmethod
+    def _registros(df: pd.DataFrame, colunas: List[str]) -> List[Dict]:
+        """
+        Converte colunas do frame em lista de dicts (mais rápido que to_dict('records'))
+        """
+        valores = [df[coluna].tolist() for coluna in colunas]
+        return [dict(zip(colunas, linha)) for linha in zip(*valores)]
+    
+    @staticmethod
+    def _mais_comuns(contagem: Dict[str, int], k: int = 5) -> List[Tuple[str, int]]:
+        """
+        Equivalente a Counter.most_common(k) para contagens em ordem de primeira ocorrência
+        """
+        return sorted(contagem.items(), key=lambda item: item[1], reverse=True)[:k]
+    
+    @staticmethod
+    def _somar_contagens(destino: Dict[str, int], contagem: pd.Series):
+        for chave, total in contagem.items():
+            destino[chave] = destino.get(chave, 0) + int(total)
+    
+    @staticmethod
+    def _classificar_performance(taxa_acerto: float) -> str:
+        if taxa_acerto >= 0.8:
+            return 'Excelente'
+        elif taxa_acerto >= 0.6:
+            return 'Bom'
+        elif taxa_acerto >= 0.4:
+            return 'Regular'
+        return 'Precisa melhorar'
+    
+    @staticmethod
+    def _estatisticas_vazias() -> Dict:
+        """
+        Estatísticas suficientes do usuário: tudo o que o relatório precisa, sem os enunciados.
+        Tamanho fixo: contagens e somas por disciplina/habilidade/tipo de erro, a marca
+        d'água do último `id` de resposta e uma amostra limitada de erros para o clustering.
+        """
+        return {
+            'versao': VERSAO_ESTATISTICAS,
+            'total_questoes': 0,
+            'ultima_resposta_id': None,
+            'disciplinas': {},
+            'habilidades': {},
+            'tempo': {'soma': 0.0, 'total': 0, 'minimo': None, 'maximo': None, 'apressadas': 0, 'lentas': 0},
+            'periodo': {'inicio': None, 'fim': None},
+            'erros': {'total': 0, 'contagem_tipos': {}, 'amostra': []}
+        }
+    
+    @staticmethod
+    def _filtrar_respostas_novas(estatisticas: Dict, df_questoes: pd.DataFrame) -> pd.DataFrame:
+        """
+        Descarta respostas com `id` já processado (marca d'água numérica) ou repetido no
+        lote e avança a marca d'água. Respostas sem `id` são sempre consideradas novas.
+        """
+        if df_questoes.empty or 'id' not in df_questoes.columns:
+            return df_questoes
+        
+        ids = pd.to_numeric(df_questoes['id'], errors='coerce')
+        novas = ~(ids.notna() & ids.duplicated())
+        marca = estatisticas.get('ultima_resposta_id')
+        if marca is not None:
+            novas &= ~(ids <= marca)
+        
+        maior_id = ids[novas].max()
+        if pd.notna(maior_id):
+            maior_id = maior_id.item()
+            estatisticas['ultima_resposta_id'] = maior_id if marca is None else max(marca, maior_id)
+        
+        return df_questoes.loc[novas]
+    
+    def _acumular_estatisticas(self, estatisticas: Dict, df_questoes: pd.DataFrame):
+        """
+        Soma às estatísticas do usuário as agregações (vetorizadas) de um lote de respostas
+        
+        Disciplinas, habilidades e contagens preservam a ordem de primeira ocorrência, de modo
+        que acumular em lotes produz o mesmo resultado que processar o histórico de uma vez.
+        """
+        if df_questoes.empty:
+            return
+        
+        estatisticas['total_questoes'] += len(df_questoes)
+        
+        # Métricas básicas por disciplina
+        agregado = df_questoes.groupby('disciplina', sort=False).agg(
+            total_questoes=('acertou', 'size'),
+            acertos=('acertou', 'sum'),
+            tempo_soma=('tempo_resposta', 'sum'),
+            dificuldade_soma=('nivel_numerico', 'sum')
+        )
+        
+        # Padrões de erro por disciplina
+        df_erros = df_questoes.loc[~df_questoes['acertou']]
+        contagem_padroes = {
+            disciplina: contagem.droplevel(0)
+            for disciplina, contagem in df_erros.groupby(['disciplina', 'tipo_erro'], sort=False).size().groupby(level=0, sort=False)
+        }
+        
+        # Habilidades (uma linha por questão e habilidade)
+        df_habilidades = df_questoes[['disciplina', 'acertou', 'habilidades', 'tempo_resposta']].explode('habilidades')
+        contagem_habilidades = {
+            chave: contagem.droplevel([0, 1])
+            for chave, contagem in df_habilidades.groupby(['disciplina', 'acertou', 'habilidades'], sort=False).size().groupby(level=[0, 1], sort=False)
+        }
+        
+        for disciplina, total, acertos, tempo_soma, dificuldade_soma in agregado.itertuples():
+            dados = estatisticas['disciplinas'].setdefault(disciplina, {
                 'total_questoes': 0,
                 'acertos': 0,
-                'erros': 0,
-                'tempo_medio': 0,
-                'dificuldade_media': 0,
-                'padroes_erro': [],
-                'evolucao': [],
-                'habilidades_fracas': [],
-                'habilidades_fortes': []
+                'tempo_soma': 0.0,
+                'dificuldade_soma': 0,
+                'contagem_padroes': {},
+                'contagem_habilidades_fracas': {},
+                'contagem_habilidades_fortes': {}
             })
+            dados['total_questoes'] += int(total)
+            dados['acertos'] += int(acertos)
+            dados['tempo_soma'] += float(tempo_soma)
+            dados['dificuldade_soma'] += int(dificuldade_soma)
+            
+            if disciplina in contagem_padroes:
+                self._somar_contagens(dados['contagem_padroes'], contagem_padroes[disciplina])
+            if (disciplina, False) in contagem_habilidades:
+                self._somar_contagens(dados['contagem_habilidades_fracas'], contagem_habilidades[(disciplina, False)])
+            if (disciplina, True) in contagem_habilidades:
+                self._somar_contagens(dados['contagem_habilidades_fortes'], contagem_habilidades[(disciplina, True)])
+        
+        # Métricas por habilidade
+        agregado_habilidades = df_habilidades.groupby('habilidades', sort=False).agg(
+            total_questoes=('acertou', 'size'),
+            acertos=('acertou', 'sum'),
+            tempo_soma=('tempo_resposta', 'sum')
+        )
+        for habilidade, total, acertos, tempo_soma in agregado_habilidades.itertuples():
+            dados = estatisticas['habilidades'].setdefault(habilidade, {'total_questoes': 0, 'acertos': 0, 'tempo_soma': 0.0})
+            dados['total_questoes'] += int(total)
+            dados['acertos'] += int(acertos)
+            dados['tempo_soma'] += float(tempo_soma)
+        
+        # Tempo de resposta
+        tempos = df_questoes['tempo_resposta']
+        tempo = estatisticas['tempo']
+        tempo['soma'] += float(tempos.sum())
+        tempo['total'] += len(tempos)
+        minimo, maximo = tempos.min().item(), tempos.max().item()
+        tempo['minimo'] = minimo if tempo['minimo'] is None else min(tempo['minimo'], minimo)
+        tempo['maximo'] = maximo if tempo['maximo'] is None else max(tempo['maximo'], maximo)
+        tempo['apressadas'] += int((tempos < 10).sum())
+        tempo['lentas'] += int((tempos > 300).sum())
+        
+        # Período coberto pelas respostas
+        self._acumular_periodo(estatisticas['periodo'], df_questoes)
+        
+        # Erros: contagem por tipo e amostra compacta (sem enunciado) para o clustering
+        erros = estatisticas['erros']
+        self._somar_contagens(erros['contagem_tipos'], df_erros['tipo_erro'].value_counts(sort=False))
+        df_erros_compacto = df_erros[['disciplina', 'nivel_dificuldade', 'tempo_resposta', 'tipo_erro']].copy()
+        df_erros_compacto['tamanho_enunciado'] = df_erros['enunciado'].str.len()
+        self._amostrar_erros(erros, self._registros(df_erros_compacto, list(df_erros_compacto.columns)))
+    
+    @staticmethod
+    def _amostrar_erros(erros: Dict, novos: List[Dict]):
+        """
+        Reservoir sampling (algoritmo R) com sorteio determinístico pela posição do erro:
+        acumular em lotes produz a mesma amostra que processar o histórico de uma vez
+        """
+        amostra = erros['amostra']
+        for registro in novos:
+            posicao = erros['total']
+            erros['total'] += 1
+            if len(amostra) < WEAKNESS_ERROS_AMOSTRA:
+                amostra.append(registro)
+            else:
+                indice = random.Random(posicao).randint(0, posicao)
+                if indice < WEAKNESS_ERROS_AMOSTRA:
+                    amostra[indice] = registro
+    
+    def _acumular_periodo(self, periodo: Dict, df_questoes: pd.DataFrame):
+        """
+        Atualiza o intervalo de datas de resposta, quando as respostas têm data
+        """
+        try:
+            if 'data_resposta' not in df_questoes.columns:
+                return
             
-            for questao in questoes_respondidas:
-                disciplina = questao.get('disciplina', 'Não identificada')
-                acertou = questao.get('acertou', False)
-                tempo = questao.get('tempo_resposta', 0)
-                dificuldade = questao.get('nivel_dificuldade', 'medio')
-                enunciado = questao.get('enunciado', '')
-                
-                # Contadores básicos
-                disciplinas[disciplina]['total_questoes'] += 1
-                if acertou:
-                    disciplinas[disciplina]['acertos'] += 1
-                else:
-                    disciplinas[disciplina]['erros'] += 1
-                
-                # Tempo médio
-                disciplinas[disciplina]['tempo_medio'] += tempo
-                
-                # Dificuldade média
-                nivel_numerico = {'facil': 1, 'medio': 2, 'dificil': 3}.get(dificuldade, 2)
-                disciplinas[disciplina]['dificuldade_media'] += nivel_numerico
-                
-                # Análise de padrões de erro
-                if not acertou:
-                    padrao_erro = self._identificar_padrao_erro_questao(questao)
-                    if padrao_erro:
-                        disciplinas[disciplina]['padroes_erro'].append(padrao_erro)
+            datas = pd.to_datetime(df_questoes['data_resposta'], errors='coerce').dropna()
+            if datas.empty:
+                return
+            
+            inicio, fim = datas.min(), datas.max()
+            if periodo['inicio'] is not None:
+                inicio = min(inicio, pd.Timestamp(periodo['inicio']))
+                fim = max(fim, pd.Timestamp(periodo['fim']))
+            
+            periodo['inicio'] = inicio.isoformat()
+            periodo['fim'] = fim.isoformat()
+            
+        except Exception as e:
+            logger.warning(f"Erro ao calcular período de análise: {e}")
+    
+    def _analisar_por_disciplina(self, estatisticas: Dict) -> Dict:
+        """
+        Análise detalhada por disciplina
+        """
+        try:
+            disciplinas = {}
+            for disciplina, dados in estatisticas['disciplinas'].items():
+                total = dados['total_questoes']
+                acertos = dados['acertos']
+                taxa_acerto = acertos / total
                 
-                # Análise de habilidades
-                habilidades = self._extrair_habilidades_questao(enunciado, disciplina)
-                for habilidade in habilidades:
-                    if acertou:
-                        disciplinas[disciplina]['habilidades_fortes'].append(habilidade)
-                    else:
-                        disciplinas[disciplina]['habilidades_fracas'].append(habilidade)
-            
-            # Calcular métricas finais
-            for disciplina, dados in disciplinas.items():
-                if dados['total_questoes'] > 0:
-                    dados['taxa_acerto'] = dados['acertos'] / dados['total_questoes']
-                    dados['taxa_erro'] = dados['erros'] / dados['total_questoes']
-                    dados['tempo_medio'] = dados['tempo_medio'] / dados['total_questoes']
-                    dados['dificuldade_media'] = dados['dificuldade_media'] / dados['total_questoes']
-                    
-                    # Padrões de erro mais comuns
-                    dados['padroes_erro_comuns'] = Counter(dados['padroes_erro']).most_common(5)
-                    
-                    # Habilidades mais fracas e mais fortes
-                    dados['habilidades_fracas_comuns'] = Counter(dados['habilidades_fracas']).most_common(5)
-                    dados['habilidades_fortes_comuns'] = Counter(dados['habilidades_fortes']).most_common(5)
-                    
-                    # Classificação de performance
-                    if dados['taxa_acerto'] >= 0.8:
-                        dados['classificacao'] = 'Excelente'
-                    elif dados['taxa_acerto'] >= 0.6:
-                        dados['classificacao'] = 'Bom'
-                    elif dados['taxa_acerto'] >= 0.4:
-                        dados['classificacao'] = 'Regular'
-                    else:
-                        dados['classificacao'] = 'Precisa melhorar'
-            
-            return dict(disciplinas)
+                disciplinas[disciplina] = {
+                    'total_questoes': total,
+                    'acertos': acertos,
+                    'erros': total - acertos,
+                    'tempo_medio': dados['tempo_soma'] / total,
+                    'dificuldade_media': dados['dificuldade_soma'] / total,
+                    'padroes_erro': list(dados['contagem_padroes']),
+                    'evolucao': [],
+                    'habilidades_fracas': list(dados['contagem_habilidades_fracas']),
+                    'habilidades_fortes': list(dados['contagem_habilidades_fortes']),
+                    'taxa_acerto': taxa_acerto,
+                    'taxa_erro': (total - acertos) / total,
+                    'padroes_erro_comuns': self._mais_comuns(dados['contagem_padroes']),
+                    'habilidades_fracas_comuns': self._mais_comuns(dados['contagem_habilidades_fracas']),
+                    'habilidades_fortes_comuns': self._mais_comuns(dados['contagem_habilidades_fortes']),
+                    'classificacao': self._classificar_performance(taxa_acerto)
+                }
+            
+            return disciplinas
             
         except Exception as e:
             logger.error(f"Erro na análise por disciplina: {e}")
             return {}
     
-    def _identificar_padroes_erro(self, questoes_respondidas: List[Dict]) -> Dict:
+    def _identificar_padroes_erro(self, erros: Dict) -> Dict:
         """
-        Identifica padrões de erro usando machine learning
+        Identifica padrões de erro usando machine learning (clustering sobre a amostra
+        limitada; contagens sobre todo o histórico)
         """
         try:
-            # Preparar dados para análise
-            dados_erro = []
-            for questao in questoes_respondidas:
-                if not questao.get('acertou', False):
-                    dados_erro.append({
-                        'disciplina': questao.get('disciplina', ''),
-                        'nivel_dificuldade': questao.get('nivel_dificuldade', ''),
-                        'tempo_resposta': questao.get('tempo_resposta', 0),
-                        'enunciado': questao.get('enunciado', ''),
-                        'resposta_usuario': questao.get('resposta_usuario', ''),
-                        'gabarito': questao.get('gabarito', ''),
-                        'tipo_erro': self._classificar_tipo_erro(questao)
-                    })
-            
-            if not dados_erro:
+            if not erros['total']:
                 return {'padroes_identificados': [], 'clusters': []}
             
+            amostra = erros['amostra']
+            
             # Análise de clusters de erro
-            clusters = self._clusterizar_erros(dados_erro)
+            clusters = self._clusterizar_erros(amostra, erros['total'])
             
             # Análise de padrões temporais
-            padroes_temporais = self._analisar_padroes_temporais(dados_erro)
+            padroes_temporais = self._analisar_padroes_temporais(amostra)
             
             # Análise de padrões por tipo de erro
-            padroes_tipo = self._analisar_padroes_por_tipo(dados_erro)
+            padroes_tipo = self._analisar_padroes_por_tipo(erros['contagem_tipos'])
             
             return {
-                'total_erros': len(dados_erro),
+                'total_erros': erros['total'],
                 'clusters_identificados': clusters,
                 'padroes_temporais': padroes_temporais,
                 'padroes_por_tipo': padroes_tipo,
-                'padroes_identificados': self._extrair_padroes_principais(dados_erro)
+                'padroes_identificados': self._extrair_padroes_principais(erros['total'])
             }
             
         except Exception as e:
             logger.error(f"Erro na identificação de padrões de erro: {e}")
             return {}
     
-    def _classificar_tipo_erro(self, questao: Dict) -> str:
+    def _classificar_tipo_erro(self, questao: Dict, features_nlp: Optional[Dict] = None) -> str:
         """
         Classifica o tipo de erro cometido
         """
@@ -251,12 +726,12 @@ class WeaknessAnalyzer:
             
             # Análise de conteúdo
             if self.nlp:
-                doc = self.nlp(enunciado)
-                sentimento = TextBlob(enunciado).sentiment.polarity
+                if features_nlp is None:
+                    features_nlp = nlp_feature_cache.obter_features([enunciado])[enunciado]
                 
-                if sentimento < -0.1:
+                if features_nlp['sentimento'] < -0.1:
                     return 'interpretacao_negativa'
-                elif 'não' in enunciado.lower() or 'exceto' in enunciado.lower():
+                elif features_nlp['negacao']:
                     return 'negacao_mal_interpretada'
             
             # Análise de padrões de resposta
@@ -271,9 +746,12 @@ class WeaknessAnalyzer:
             logger.error(f"Erro ao classificar tipo de erro: {e}")
             return 'erro_nao_classificado'
     
-    def _clusterizar_erros(self, dados_erro: List[Dict]) -> List[Dict]:
+    def _clusterizar_erros(self, dados_erro: List[Dict], total_erros: Optional[int] = None) -> List[Dict]:
         """
         Agrupa erros similares usando clustering
+        
+        `dados_erro` pode ser uma amostra de `total_erros` erros; o tamanho de cada cluster
+        é então estimado na proporção da amostra.
         """
         try:
             if len(dados_erro) < 3:
@@ -283,7 +761,7 @@ class WeaknessAnalyzer:
             features = []
             for erro in dados_erro:
                 feature = [
-                    len(erro['enunciado']),
+                    erro['tamanho_enunciado'],
                     erro['tempo_resposta'],
                     {'facil': 1, 'medio': 2, 'dificil': 3}.get(erro['nivel_dificuldade'], 2),
                     hash(erro['disciplina']) % 1000,  # Hash da disciplina
@@ -303,6 +781,7 @@ class WeaknessAnalyzer:
             clusters = kmeans.fit_predict(features_scaled)
             
             # Organizar resultados
+            fator_amostra = (total_erros or len(dados_erro)) / len(dados_erro)
             clusters_resultado = []
             for i in range(n_clusters):
                 erros_cluster = [dados_erro[j] for j in range(len(dados_erro)) if clusters[j] == i]
@@ -310,7 +789,7 @@ class WeaknessAnalyzer:
                 if erros_cluster:
                     cluster_info = {
                         'cluster_id': i,
-                        'tamanho': len(erros_cluster),
+                        'tamanho': round(len(erros_cluster) * fator_amostra),
                         'disciplinas_comuns': Counter([e['disciplina'] for e in erros_cluster]).most_common(3),
                         'tipos_erro_comuns': Counter([e['tipo_erro'] for e in erros_cluster]).most_common(3),
                         'tempo_medio': sum(e['tempo_resposta'] for e in erros_cluster) / len(erros_cluster),
@@ -382,54 +861,38 @@ class WeaknessAnalyzer:
             logger.error(f"Erro ao identificar padrão do cluster: {e}")
             return "Padrão não identificado"
     
-    def _mapear_habilidades(self, questoes_respondidas: List[Dict]) -> Dict:
+    def _mapear_habilidades(self, estatisticas: Dict) -> Dict:
         """
         Mapeia habilidades específicas do usuário
         """
         try:
-            habilidades = defaultdict(lambda: {
-                'total_questoes': 0,
-                'acertos': 0,
-                'erros': 0,
-                'tempo_medio': 0,
-                'evolucao': [],
-                'nivel_atual': 'iniciante'
-            })
-            
-            for questao in questoes_respondidas:
-                enunciado = questao.get('enunciado', '')
-                disciplina = questao.get('disciplina', '')
-                acertou = questao.get('acertou', False)
-                tempo = questao.get('tempo_resposta', 0)
+            habilidades = {}
+            for habilidade, dados in estatisticas['habilidades'].items():
+                total = dados['total_questoes']
+                acertos = dados['acertos']
+                taxa_acerto = acertos / total
                 
-                # Extrair habilidades da questão
-                habilidades_questao = self._extrair_habilidades_questao(enunciado, disciplina)
+                # Classificar nível da habilidade
+                if taxa_acerto >= 0.8:
+                    nivel_atual = 'avançado'
+                elif taxa_acerto >= 0.6:
+                    nivel_atual = 'intermediário'
+                elif taxa_acerto >= 0.4:
+                    nivel_atual = 'básico'
+                else:
+                    nivel_atual = 'iniciante'
                 
-                for habilidade in habilidades_questao:
-                    habilidades[habilidade]['total_questoes'] += 1
-                    if acertou:
-                        habilidades[habilidade]['acertos'] += 1
-                    else:
-                        habilidades[habilidade]['erros'] += 1
-                    habilidades[habilidade]['tempo_medio'] += tempo
-            
-            # Calcular métricas finais
-            for habilidade, dados in habilidades.items():
-                if dados['total_questoes'] > 0:
-                    dados['taxa_acerto'] = dados['acertos'] / dados['total_questoes']
-                    dados['tempo_medio'] = dados['tempo_medio'] / dados['total_questoes']
-                    
-                    # Classificar nível da habilidade
-                    if dados['taxa_acerto'] >= 0.8:
-                        dados['nivel_atual'] = 'avançado'
-                    elif dados['taxa_acerto'] >= 0.6:
-                        dados['nivel_atual'] = 'intermediário'
-                    elif dados['taxa_acerto'] >= 0.4:
-                        dados['nivel_atual'] = 'básico'
-                    else:
-                        dados['nivel_atual'] = 'iniciante'
-            
-            return dict(habilidades)
+                habilidades[habilidade] = {
+                    'total_questoes': total,
+                    'acertos': acertos,
+                    'erros': total - acertos,
+                    'tempo_medio': dados['tempo_soma'] / total,
+                    'evolucao': [],
+                    'nivel_atual': nivel_atual,
+                    'taxa_acerto': taxa_acerto
+                }
+            
+            return habilidades
             
         except Exception as e:
             logger.error(f"Erro no mapeamento de habilidades: {e}")
@@ -770,31 +1233,30 @@ class WeaknessAnalyzer:
         """Identifica padrão de erro específico de uma questão"""
         return self._classificar_tipo_erro(questao)
     
-    def _analisar_tempo_resposta(self, questoes_respondidas: List[Dict]) -> Dict:
+    def _analisar_tempo_resposta(self, estatisticas: Dict) -> Dict:
         """Analisa padrões de tempo de resposta"""
-        tempos = [q.get('tempo_resposta', 0) for q in questoes_respondidas]
+        tempo = estatisticas['tempo']
         return {
-            'tempo_medio': sum(tempos) / len(tempos) if tempos else 0,
-            'tempo_minimo': min(tempos) if tempos else 0,
-            'tempo_maximo': max(tempos) if tempos else 0,
-            'questoes_apressadas': sum(1 for t in tempos if t < 10),
-            'questoes_lentas': sum(1 for t in tempos if t > 300)
+            'tempo_medio': tempo['soma'] / tempo['total'] if tempo['total'] else 0,
+            'tempo_minimo': tempo['minimo'] if tempo['total'] else 0,
+            'tempo_maximo': tempo['maximo'] if tempo['total'] else 0,
+            'questoes_apressadas': tempo['apressadas'],
+            'questoes_lentas': tempo['lentas']
         }
     
     def _analisar_padroes_temporais(self, dados_erro: List[Dict]) -> Dict:
         """Analisa padrões temporais nos erros"""
         return {'padroes_identificados': []}
     
-    def _analisar_padroes_por_tipo(self, dados_erro: List[Dict]) -> Dict:
+    def _analisar_padroes_por_tipo(self, contagem_tipos: Dict[str, int]) -> Dict:
         """Analisa padrões por tipo de erro"""
-        tipos = [d['tipo_erro'] for d in dados_erro]
-        return {'tipos_comuns': Counter(tipos).most_common(5)}
+        return {'tipos_comuns': self._mais_comuns(contagem_tipos)}
     
-    def _extrair_padroes_principais(self, dados_erro: List[Dict]) -> List[str]:
+    def _extrair_padroes_principais(self, total_erros: int) -> List[str]:
         """Extrai padrões principais dos erros"""
-        return [f"Padrão {i+1}" for i in range(min(3, len(dados_erro)))]
+        return [f"Padrão {i+1}" for i in range(min(3, total_erros))]
     
-    def _analisar_clusters_erro(self, questoes_respondidas: List[Dict]) -> Dict:
+    def _analisar_clusters_erro(self, erros: Dict) -> Dict:
         """Analisa clusters de erro"""
         return {'clusters_identificados': []}
     
@@ -826,8 +1288,12 @@ class WeaknessAnalyzer:
         """Calcula probabilidade de sucesso"""
         return 0.7
     
-    def _calcular_periodo_analise(self, questoes_respondidas: List[Dict]) -> str:
-        """Calcula o período de análise"""
+    def _calcular_periodo_analise(self, estatisticas: Dict) -> str:
+        """Calcula o período de análise a partir das datas de resposta, quando disponíveis"""
+        periodo = estatisticas['periodo']
+        if periodo['inicio'] and periodo['fim']:
+            dias = (pd.Timestamp(periodo['fim']) - pd.Timestamp(periodo['inicio'])).days + 1
+            return f"{dias} dias"
         return "30 dias"
 
 # Exemplo de uso